@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Measures the detection of near-duplicates (see `duplicates`) on random melodies, of which some have a variant
+(transposed, with a few notes changed) :
+    - the time to compute the signatures, and to find the clusters, for increasing numbers of scores ;
+    - the number of variants found, and of wrong clusters.
+
+Run from the root of the repository : python3 -m bench.bench_duplicates
+'''
+
+##-Imports
+import random
+from time import perf_counter
+
+from src.duplicates import DuplicateIndex, MelodySink, get_ngrams, get_hash_functions, minhash
+
+##-Utils
+def make_melodies(nb: int, length: int = 200, variants: float = .1, changes: int = 4, seed: int = 0) -> list[list[int]]:
+    '''
+    Returns `nb` random melodies (pitches, by steps of at most 5 semitones), the last ones being variants of the first ones.
+
+    - nb       : the number of melodies ;
+    - length   : the number of notes of each melody ;
+    - variants : the proportion of variants ;
+    - changes  : the number of notes changed in a variant ;
+    - seed     : the seed of the random generator.
+    '''
+
+    r = random.Random(seed)
+    nb_variants = int(nb * variants)
+
+    melodies = []
+    for k in range(nb - nb_variants):
+        p = [0]
+        for j in range(length - 1):
+            p.append(p[-1] + r.randint(-5, 5))
+        melodies.append(p)
+
+    for k in range(nb_variants):
+        shift = r.randint(-12, 12)
+        p = [x + shift for x in melodies[k]]
+        for j in r.sample(range(length), changes):
+            p[j] += r.choice((-2, -1, 1, 2))
+        melodies.append(p)
+
+    return melodies
+
+##-Bench
+def bench_duplicates(sizes: tuple[int, ...] = (1000, 10000, 100000), threshold: float = .6):
+    '''
+    Prints the time spent to compute the signatures and the clusters, and the quality of the clusters, for `sizes` scores.
+
+    - sizes     : the numbers of scores ;
+    - threshold : the similarity threshold. A variant with 4 notes changed among 200 has about 20 different 4-grams,
+                  so a Jaccard index of about 0.8 with its original.
+    '''
+
+    hash_functions = get_hash_functions()
+    print('scores    signatures (s)  clusters (s)  variants found  wrong clusters')
+
+    for nb in sizes:
+        melodies = make_melodies(nb)
+        nb_variants = int(nb * .1)
+
+        index = DuplicateIndex(threshold)
+
+        t0 = perf_counter()
+        sinks = []
+        for p in melodies:
+            sink = MelodySink()
+            sink.signature = minhash(get_ngrams(p), hash_functions)
+            sinks.append(sink)
+        t1 = perf_counter()
+
+        for k, sink in enumerate(sinks):
+            sink.score_id = str(k)
+            index.add(str(k), sink)
+        clusters = index.get_clusters()
+        t2 = perf_counter()
+
+        originals = nb - nb_variants
+        found = sum(1 for c in clusters if len(c['files']) == 2 and int(c['files'][1]) - int(c['files'][0]) == originals)
+        wrong = len(clusters) - found
+
+        print(f'{nb:<9} {t1 - t0:<15.3f} {t2 - t1:<13.3f} {found:>6} / {nb_variants:<7} {wrong}')
+
+##-Run
+if __name__ == '__main__':
+    bench_duplicates()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Loads the dumps into the in-memory stand-in of Neo4j (see `memory_graph`), without a database server :
+    - checks that the dump of each file of `mei/` can be loaded, that it contains the nodes and relationships exported,
+      and that the :NEXT chains are complete (see `check_graph`), with the plain, sharded and direct (`Neo4jSink`) outputs ;
+    - measures the number of statements (clauses) per second through the interpreter, on synthetic scores of increasing size.
+
+Fails (exit code 1) if a file has problems.
+
+Run from the root of the repository : python3 -m bench.bench_loader
+'''
+
+##-Imports
+import glob
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+from bench.synthetic import write_synthetic_mei
+from src.MeiToGraph import MeiToGraph
+from src.memory_graph import CypherInterpreter, MemoryDriver, check_graph
+from src.sinks import CypherSink, ShardedCypherSink, SummarySink, Neo4jSink
+
+##-Check
+def check_file(fn: str, tmp: str) -> list[str]:
+    '''
+    Exports the MEI file `fn` (with the optional links) to the plain, sharded and direct outputs, loads each of them in a new in-memory graph,
+    and returns the problems found.
+
+    - fn  : the MEI filename ;
+    - tmp : a temporary folder, for the shards.
+    '''
+
+    dump = CypherSink()
+    summary = SummarySink(None, fn)
+    shards = ShardedCypherSink(os.path.join(tmp, os.path.basename(fn) + '_shards'), 100)
+    driver = MemoryDriver()
+
+    MeiToGraph(fn).export([dump, summary, shards, Neo4jSink(driver)], grace_bypass=True, unfold_repeats=True)
+
+    loaders = {
+        'cypher': lambda interpreter: interpreter.run(dump.getvalue()),
+        'shards': lambda interpreter: interpreter.run_file(os.path.join(shards.folder, 'manifest.cql')),
+        'neo4j': None
+    }
+
+    problems = []
+    for name, load in loaders.items():
+        if load == None:
+            graph = driver.graph
+        else:
+            interpreter = CypherInterpreter()
+            try:
+                load(interpreter)
+            except ValueError as err:
+                problems.append(f'{name} : {err}')
+                continue
+
+            graph = interpreter.graph
+
+        for kind, expected, found in (('nodes', summary.summary['nodes'], graph.count_nodes()), ('links', summary.summary['links'], graph.count_rels())):
+            if expected != found:
+                problems.append(f'{name} : {kind} exported {expected}, but loaded {found}')
+
+        problems += [f'{name} : {p}' for p in check_graph(graph)]
+
+    return problems
+
+def check_corpus(pattern: str = 'mei/**/*.mei') -> int:
+    '''
+    Checks all the files matching `pattern` (see `check_file`), prints the problems found, and returns the number of files with problems.
+
+    - pattern : the glob pattern of the MEI files.
+    '''
+
+    files = sorted(glob.glob(pattern, recursive=True))
+    nb_err = 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for fn in files:
+            problems = check_file(fn, tmp)
+
+            if len(problems) > 0:
+                nb_err += 1
+                print(f'{fn} :')
+                for p in problems:
+                    print(f'    {p}')
+
+    print(f'Checked {len(files)} files : {len(files) - nb_err} ok, {nb_err} with problems.\n')
+
+    return nb_err
+
+##-Bench
+def bench_interpreter(nb_voices: int = 4, sizes: tuple[int, ...] = (100, 200, 400, 800)):
+    '''
+    Loads the dumps of synthetic scores with `nb_voices` voices and `sizes` measures, and prints the number of clauses per second.
+
+    - nb_voices : the number of voices of the synthetic scores ;
+    - sizes     : the numbers of measures to test.
+    '''
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print('measures  clauses    time (s)   clauses/s')
+
+        for nb_measures in sizes:
+            fn = os.path.join(tmp, f'synthetic_{nb_voices}_{nb_measures}.mei')
+            write_synthetic_mei(fn, nb_voices, nb_measures)
+
+            dump = CypherSink()
+            MeiToGraph(fn).export([dump])
+            text = dump.getvalue()
+
+            interpreter = CypherInterpreter()
+            t0 = perf_counter()
+            interpreter.run(text)
+            t = perf_counter() - t0
+
+            print(f'{nb_measures:<9} {interpreter.nb_clauses:<10} {t:<10.4f} {interpreter.nb_clauses / t:.0f}')
+
+##-Run
+if __name__ == '__main__':
+    nb_err = check_corpus()
+    bench_interpreter()
+
+    if nb_err > 0:
+        sys.exit(1)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Measures the cost of the logs (see `utils.LogWriter`) for a run of many files : one message per file,
+written without buffer (as `print` to a terminal) or with a buffer, as text or as JSON lines.
+
+Run from the root of the repository : python3 -m bench.bench_log
+'''
+
+##-Imports
+import os
+import tempfile
+from time import perf_counter
+
+from src.utils import LogWriter
+
+##-Bench
+def bench_log(nb: int = 100000):
+    '''
+    Prints the time spent to log `nb` messages in a file, for each configuration.
+
+    - nb : the number of messages (one per file of the simulated run).
+    '''
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fn = os.path.join(tmp, 'log')
+
+        print('format  buffer  time (s)   µs/message')
+
+        for json_lines in (False, True):
+            for buffer_size in (1, 64):
+                w = LogWriter('info', json_lines, fn, buffer_size)
+
+                t0 = perf_counter()
+                for k in range(nb):
+                    w.write('info', f'File "corpus/{k}.mei" has been converted to cypher in file "out/{k}_dump.cypher" !', fields={'file': f'corpus/{k}.mei', 'duration': .01})
+                w.close()
+                t = perf_counter() - t0
+
+                os.remove(fn)
+                print(f'{"json" if json_lines else "text":<7} {buffer_size:<7} {t:<10.3f} {t / nb * 1e6:.2f}')
+
+##-Run
+if __name__ == '__main__':
+    bench_log()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Measures the memory used per note to convert synthetic scores of increasing size (see `memprofile.MemProfileSink`),
+with and without streaming, and fails (exit code 1) if it is above the limits, so that a memory regression is noticed.
+
+Run from the root of the repository : python3 -m bench.bench_memory
+'''
+
+##-Imports
+import os
+import sys
+import tempfile
+
+from bench.synthetic import write_synthetic_mei
+from src.MeiToGraph import MeiToGraph
+from src.memprofile import MemProfileSink
+from src.sinks import CypherFileSink
+
+##-Init
+# Limits, in bytes per note (with a margin of about 1.5 to 2 over the values measured on the synthetic scores)
+max_bytes_per_note = 3000 # Memory of the parsed graph
+max_peak_per_note = 6000 # Highest peak of the phases, without streaming
+max_stream_peak_per_note = 800 # Highest peak of the phases, with streaming (for the largest score)
+
+##-Profile
+def profile_file(fn: str, out_fn: str, stream: bool = False) -> dict:
+    '''
+    Converts the MEI file `fn` to the dump `out_fn` while tracing the memory, and returns the profile (see `MemProfileSink.get_report`).
+
+    - fn     : the MEI filename ;
+    - out_fn : the filename of the dump ;
+    - stream : if True, write the dump while parsing.
+    '''
+
+    profiler = MemProfileSink()
+
+    try:
+        converter = MeiToGraph(fn)
+
+        if not stream:
+            converter.parse_mei()
+            profiler.snapshot('parse')
+            profiler.count_graph(converter.score, converter.top_rhythmic)
+
+        converter.export([profiler, CypherFileSink(out_fn)], stream=stream)
+        profiler.snapshot('write')
+
+    finally:
+        profiler.stop()
+
+    return profiler.get_report()
+
+##-Bench
+def bench_memory(nb_voices: int = 4, sizes: tuple[int, ...] = (50, 100, 200)) -> list[str]:
+    '''
+    Profiles synthetic scores with `nb_voices` voices and `sizes` measures, prints the memory per note, and returns the limits exceeded.
+
+    Without streaming, the memory per note should stay (almost) constant when the size doubles. With streaming, it should decrease.
+
+    - nb_voices : the number of voices of the synthetic scores ;
+    - sizes     : the numbers of measures to test.
+    '''
+
+    problems = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print('measures  notes      stream  graph B/note  peak B/note  largest class')
+
+        for nb_measures in sizes:
+            fn = os.path.join(tmp, f'synthetic_{nb_voices}_{nb_measures}.mei')
+            write_synthetic_mei(fn, nb_voices, nb_measures)
+
+            for stream in (False, True):
+                p = profile_file(fn, os.path.join(tmp, 'dump.cypher'), stream)
+
+                largest = ''
+                if p['classes'] != None:
+                    name, c = max(p['classes'].items(), key=lambda t: t[1]['bytes'])
+                    largest = f'{name} ({c["count"]} objects, {c["bytes"] / p["notes"]:.0f} B/note)'
+
+                graph = '' if stream else f'{p["bytes_per_note"]:.0f}'
+                print(f'{nb_measures:<9} {p["notes"]:<10} {str(stream):<7} {graph:<13} {p["peak_per_note"]:<12.0f} {largest}')
+
+                if not stream and p['bytes_per_note'] > max_bytes_per_note:
+                    problems.append(f'{nb_measures} measures : the graph takes {p["bytes_per_note"]:.0f} bytes per note (limit : {max_bytes_per_note})')
+
+                if not stream and p['peak_per_note'] > max_peak_per_note:
+                    problems.append(f'{nb_measures} measures : peak of {p["peak_per_note"]:.0f} bytes per note (limit : {max_peak_per_note})')
+
+                if stream and nb_measures == max(sizes) and p['peak_per_note'] > max_stream_peak_per_note:
+                    problems.append(f'{nb_measures} measures, streaming : peak of {p["peak_per_note"]:.0f} bytes per note (limit : {max_stream_peak_per_note})')
+
+    return problems
+
+##-Run
+if __name__ == '__main__':
+    problems = bench_memory()
+
+    for p in problems:
+        print(p)
+
+    if len(problems) > 0:
+        sys.exit(1)
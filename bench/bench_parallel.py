@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Benchmarks the parsing of one file by ranges of measures (`-J`, see `MeiToGraph._parse_parallel`) against the sequential parsing,
+on synthetic scores, and checks that the dumps are identical.
+
+The workers send back their measures encoded by `GraphCache.encode_graph`, but the main process still rebuilds and stitches
+all the events : the gain needs several free cores, and on one core `-J` is slower than the sequential parsing.
+The CPU time of the main process is printed too : it is the part that is not parallel, so the parsing can not be faster than it.
+
+Run from the root of the repository : python3 -m bench.bench_parallel
+'''
+
+##-Imports
+import os
+import sys
+import tempfile
+from time import perf_counter, process_time
+
+from bench.synthetic import write_synthetic_mei
+from src.MeiToGraph import MeiToGraph
+
+##-Bench
+def bench_parallel(nb_voices: int = 16, sizes: tuple[int, ...] = (100, 400), jobs: tuple[int, ...] = (1, 2, 4)) -> bool:
+    '''
+    Parses synthetic scores with `nb_voices` voices and `sizes` measures with each number of processes of `jobs`,
+    and prints the parsing time and the speedup against the sequential parsing.
+
+    Output: True if all the dumps are identical to the sequential one.
+
+    - nb_voices : the number of voices of the synthetic scores ;
+    - sizes     : the numbers of measures to test ;
+    - jobs      : the numbers of processes to test (the first one is the reference).
+    '''
+
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f'{os.cpu_count()} cores')
+        print('measures  events     jobs  parse (s)  main (s)   speedup')
+
+        for nb_measures in sizes:
+            fn = os.path.join(tmp, f'synthetic_{nb_voices}_{nb_measures}.mei')
+            write_synthetic_mei(fn, nb_voices, nb_measures)
+
+            ref = None
+            for nb_jobs in jobs:
+                converter = MeiToGraph(fn, jobs=nb_jobs)
+
+                t0, c0 = perf_counter(), process_time()
+                converter.parse_mei()
+                t, c = perf_counter() - t0, process_time() - c0
+
+                out_fn = os.path.join(tmp, f'dump_{nb_jobs}.cypher')
+                converter.to_file(out_fn, True)
+                with open(out_fn) as f:
+                    dump = f.read()
+
+                if ref == None:
+                    ref, ref_t = dump, t
+                elif dump != ref:
+                    ok = False
+                    print(f'The dump with {nb_jobs} processes is not the same as with {jobs[0]}')
+
+                nb_events = sum(len(v.events) for v in converter.score.voices)
+                print(f'{nb_measures:<9} {nb_events:<10} {nb_jobs:<5} {t:<10.3f} {c:<10.3f} {ref_t / t:.2f}')
+
+    return ok
+
+##-Run
+if __name__ == '__main__':
+    if not bench_parallel():
+        sys.exit(1)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Checks that the `Scheduler` gets back large results (bigger than the buffer of a pipe) without blocking the processes :
+    - with results of increasing sizes, up to tens of MB ;
+    - with the conversion of a large synthetic score by `main.py -j 2` (its id digests are sent back), with a timeout.
+Also checks that a task killed at its timeout does not leave the processes it started running (e.g the workers of `-J`).
+Fails (exit code 1) if a task does not end in time, or if a process is left.
+
+Run from the root of the repository : python3 -m bench.bench_scheduler
+'''
+
+##-Imports
+import os
+import subprocess
+import sys
+import tempfile
+from time import perf_counter, sleep
+
+from bench.synthetic import write_synthetic_mei
+from src.scheduler import Scheduler, Task
+
+##-Init
+timeout = 120 # Maximum duration of a check, in seconds
+
+##-Utils
+def make_result(size: int) -> bytes:
+    '''
+    Returns a result of `size` bytes (run in the processes of the scheduler).
+
+    - size : the size of the result.
+    '''
+
+    return bytes(size)
+
+def start_child_and_wait(pid_fn: str):
+    '''
+    Starts a child process that sleeps, writes its pid in `pid_fn`, and sleeps (run in the processes of the scheduler, until it is killed).
+
+    - pid_fn : the file where the pid of the child is written.
+    '''
+
+    child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+
+    with open(pid_fn, 'w') as f:
+        f.write(str(child.pid))
+
+    sleep(60)
+
+def is_running(pid: int) -> bool:
+    '''
+    Returns True if the process `pid` is running (a zombie, ended but not waited for, is not).
+
+    - pid : the pid of the process.
+    '''
+
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().split(')')[-1].split()[0] != 'Z'
+
+    except FileNotFoundError:
+        return False
+
+##-Checks
+def check_large_results(sizes: tuple[int, ...] = (1 << 10, 1 << 20, 1 << 25)) -> list[str]:
+    '''
+    Runs tasks returning results of `sizes` bytes, and returns the problems found.
+
+    - sizes : the sizes of the results.
+    '''
+
+    tasks = [Task(f'result of {size} bytes', size, (size,)) for size in sizes]
+
+    t0 = perf_counter()
+    done, dead = Scheduler(make_result, 2, timeout=timeout, retries=0).run(tasks)
+    print(f'Results of {", ".join(str(s) for s in sizes)} bytes : {len(done)} done, {len(dead)} dead in {perf_counter() - t0:.3f}s')
+
+    problems = [f'{t.name} : {t.error}' for t in dead]
+    problems += [f'{t.name} : wrong result' for t in done if len(t.result) != t.size]
+
+    return problems
+
+def check_large_score(nb_voices: int = 16, nb_measures: int = 300) -> list[str]:
+    '''
+    Converts a synthetic score with `main.py -j 2` (with the id check), and returns the problems found.
+
+    - nb_voices   : the number of voices of the score ;
+    - nb_measures : the number of measures.
+    '''
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fn = os.path.join(tmp, 'large.mei')
+        write_synthetic_mei(fn, nb_voices, nb_measures)
+
+        t0 = perf_counter()
+        try:
+            subprocess.run([sys.executable, 'main.py', '-n', '-j', '2', '--timeout', str(timeout), '-o', tmp, fn], timeout=timeout, capture_output=True)
+        except subprocess.TimeoutExpired:
+            return [f'{nb_voices} voices, {nb_measures} measures : the conversion did not end after {timeout}s']
+
+        print(f'{nb_voices} voices, {nb_measures} measures : converted with -j 2 in {perf_counter() - t0:.3f}s')
+
+        if not os.path.isfile(os.path.join(tmp, 'large_dump.cypher')):
+            return [f'{nb_voices} voices, {nb_measures} measures : the dump was not written']
+
+    return []
+
+def check_timeout_kills_children(task_timeout: float = 1.) -> list[str]:
+    '''
+    Runs a task starting a child process, until its timeout, and returns the problems found (the child is still running).
+
+    - task_timeout : the timeout of the task, in seconds.
+    '''
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pid_fn = os.path.join(tmp, 'pid')
+
+        done, dead = Scheduler(start_child_and_wait, 1, timeout=task_timeout, retries=0).run([Task('child', 0, (pid_fn,))])
+        if len(dead) != 1 or not os.path.isfile(pid_fn):
+            return ['timeout with a child process : the task was not killed at its timeout']
+
+        with open(pid_fn) as f:
+            pid = int(f.read())
+
+    sleep(.1)
+    running = is_running(pid)
+    print(f'Timeout with a child process : the child is {"still running" if running else "killed"}')
+
+    if running:
+        os.kill(pid, 9)
+        return ['timeout with a child process : the child was left running']
+
+    return []
+
+##-Run
+if __name__ == '__main__':
+    problems = check_large_results() + check_large_score() + check_timeout_kills_children()
+
+    for p in problems:
+        print(p)
+
+    if len(problems) > 0:
+        sys.exit(1)
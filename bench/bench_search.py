@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Runs a workload of melodic searches (see `search.SearchEngine`) on the files of `mei/` and on synthetic scores of increasing size,
+with several shapes of the graph (with or without indexes, grace notes skipped, repeats unfolded), and prints for each one
+the time to build it and the time and the number of values compared per query, by kind of query.
+
+The shapes that only differ by their indexes must find the same matches : the run fails (exit code 1) otherwise.
+
+Run from the root of the repository : python3 -m bench.bench_search
+'''
+
+##-Imports
+import glob
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter
+
+from bench.synthetic import write_synthetic_mei
+from src.MeiToGraph import MeiToGraph
+from src.search import SearchEngine, Query
+
+##-Init
+# The shapes compared : name -> arguments of `SearchEngine`
+shapes = {
+    'scan': {},
+    'intervals': {'indexes': ('intervals',)},
+    'intervals+rhythm': {'indexes': ('intervals', 'rhythm')},
+    'grace_bypass': {'indexes': ('intervals', 'rhythm'), 'grace_bypass': True},
+    'unfold_repeats': {'indexes': ('intervals', 'rhythm'), 'unfold_repeats': True}
+}
+
+# Queries written by hand (intervals, durations), e.g the beginning of a major scale, an arpeggio, repeated notes, a dotted rhythm
+fixed_queries = (
+    ([2, 2, 1, 2], None),
+    ([-2, -2, -1, -2], None),
+    ([4, 3, 5], None),
+    ([0, 0, 0], None),
+    ([7, -2, -2, -1], None),
+    (None, [.1875, .0625, .1875, .0625]),
+    (None, [.125, .125, .25, .125, .125, .25]),
+    ([2, 1, -3], [.25, .125, .125, .5])
+)
+
+##-Workload
+def make_workload(engine: SearchEngine, nb: int = 20, seed: int = 0) -> list[Query]:
+    '''
+    Returns the queries of the workload : for each kind, `nb` queries taken from random positions of the melodies of `engine`
+    (so that they have at least one match), and the queries of `fixed_queries` (kind 'fixed').
+
+    The kinds are the intervals, the rhythm, or both, exact or with a tolerance (1 semitone, 25 % of the durations), on 4 to 8 notes.
+
+    - engine : the engine giving the melodies ;
+    - nb     : the number of queries of each kind ;
+    - seed   : the seed of the random generator (the same seed gives the same queries).
+    '''
+
+    r = random.Random(seed)
+    melodies = [m for m in engine.melodies if len(m.pitches) >= 8]
+
+    kinds = (
+        ('intervals', True, False, 0, 0),
+        ('intervals~', True, False, 1, 0),
+        ('rhythm', False, True, 0, 0),
+        ('rhythm~', False, True, 0, .25),
+        ('both', True, True, 0, 0),
+        ('both~', True, True, 1, .25)
+    )
+
+    queries = []
+    for name, with_intervals, with_durations, pitch_tolerance, duration_tolerance in kinds:
+        for k in range(nb if len(melodies) > 0 else 0):
+            m = r.choice(melodies)
+            length = r.randint(4, 8)
+            start = r.randrange(len(m.pitches) - length + 1)
+
+            queries.append(Query(
+                m.intervals[start:start + length - 1] if with_intervals else None,
+                m.durations[start:start + length] if with_durations else None,
+                pitch_tolerance,
+                duration_tolerance,
+                name
+            ))
+
+    for intervals, durations in fixed_queries:
+        queries.append(Query(intervals, durations, name='fixed'))
+
+    return queries
+
+def run_workload(engine: SearchEngine, queries: list[Query]) -> tuple[dict[str, tuple[float, float]], list[list]]:
+    '''
+    Runs the queries on `engine`.
+
+    - engine  : the engine ;
+    - queries : the queries.
+
+    Output: (kinds, results), where kinds gives for each kind of query the mean time (in seconds) and the mean number of values compared
+            per query, and results the matches of each query (see `SearchEngine.search`).
+    '''
+
+    totals = {} # kind -> [number of queries, time, values compared]
+    results = []
+
+    for q in queries:
+        compared = engine.compared
+        t0 = perf_counter()
+        results.append(engine.search(q))
+        t = perf_counter() - t0
+
+        total = totals.setdefault(q.name, [0, 0.0, 0])
+        total[0] += 1
+        total[1] += t
+        total[2] += engine.compared - compared
+
+    return {kind: (t / nb, c / nb) for kind, (nb, t, c) in totals.items()}, results
+
+##-Bench
+def bench_corpus(name: str, fns: list[str]) -> list[str]:
+    '''
+    Builds the engines of all the `shapes` from the files `fns`, runs the workload on them, prints the results, and returns the problems found.
+
+    - name : the name of the corpus (printed) ;
+    - fns  : the MEI files.
+    '''
+
+    engines = {shape: SearchEngine(**kwargs) for shape, kwargs in shapes.items()}
+    build = {shape: 0.0 for shape in shapes}
+
+    for fn in fns:
+        converter = MeiToGraph(fn)
+        converter.parse_mei()
+
+        for shape, engine in engines.items():
+            t0 = perf_counter()
+            engine.add_score(converter.score, converter.top_rhythmic)
+            build[shape] += perf_counter() - t0
+
+    queries = make_workload(engines['scan'])
+    kinds = list(dict.fromkeys(q.name for q in queries))
+
+    notes = engines['scan'].get_stats()['notes']
+    print(f'{name} : {len(fns)} files, {notes} notes, {len(queries)} queries. Per kind of query : mean time (ms) / values compared')
+    print(f'{"shape":<17} {"build (s)":<10} {"entries":<8} ' + ' '.join(f'{kind:<16}' for kind in kinds))
+
+    problems = []
+    reference = {} # (grace_bypass, unfold_repeats) -> (shape, results)
+
+    for shape, engine in engines.items():
+        times, results = run_workload(engine, queries)
+
+        entries = sum(engine.get_stats()['index_entries'].values())
+        cells = ' '.join(f'{times[kind][0] * 1000:>7.3f} / {times[kind][1]:<6.0f}' for kind in kinds)
+        print(f'{shape:<17} {build[shape]:<10.3f} {entries:<8} {cells}')
+
+        key = (engine.grace_bypass, engine.unfold_repeats)
+        if key not in reference:
+            reference[key] = (shape, results)
+
+        elif results != reference[key][1]:
+            nb = sum(1 for r1, r2 in zip(results, reference[key][1]) if r1 != r2)
+            problems.append(f'{name} : {shape} and {reference[key][0]} give different matches for {nb} queries')
+
+    print()
+
+    return problems
+
+def bench_search(nb_voices: int = 4, sizes: tuple[int, ...] = (100, 400, 1600)) -> list[str]:
+    '''
+    Runs the workload on the files of `mei/`, then on synthetic scores, and returns the problems found.
+
+    - nb_voices : the number of voices of the synthetic scores ;
+    - sizes     : the numbers of measures of the synthetic scores.
+    '''
+
+    problems = bench_corpus('mei/', sorted(glob.glob('mei/**/*.mei', recursive=True)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for nb_measures in sizes:
+            fn = os.path.join(tmp, f'synthetic_{nb_voices}_{nb_measures}.mei')
+            write_synthetic_mei(fn, nb_voices, nb_measures)
+
+            problems += bench_corpus(f'synthetic ({nb_voices} voices, {nb_measures} measures)', [fn])
+
+    return problems
+
+##-Run
+if __name__ == '__main__':
+    problems = bench_search()
+
+    for p in problems:
+        print(p)
+
+    if len(problems) > 0:
+        sys.exit(1)
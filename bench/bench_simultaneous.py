@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Benchmarks the computation of the :SIMULTANEOUS links on 16-voice synthetic scores of increasing size.
+
+Run from the root of the repository : python3 -m bench.bench_simultaneous
+'''
+
+##-Imports
+import os
+import tempfile
+from time import perf_counter
+
+from bench.synthetic import write_synthetic_mei
+from src.MeiToGraph import MeiToGraph
+
+##-Bench
+def bench_simultaneous(nb_voices: int = 16, sizes: tuple[int, ...] = (50, 100, 200, 400, 800)):
+    '''
+    Parses synthetic scores with `nb_voices` voices and `sizes` measures, and times `Score.find_simultaneous_events`.
+
+    The time per note should stay (almost) constant when the size doubles.
+
+    - nb_voices : the number of voices of the synthetic scores ;
+    - sizes     : the numbers of measures to test.
+    '''
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print('measures  events     pairs      time (s)   µs/event')
+
+        for nb_measures in sizes:
+            fn = os.path.join(tmp, f'synthetic_{nb_voices}_{nb_measures}.mei')
+            write_synthetic_mei(fn, nb_voices, nb_measures)
+
+            converter = MeiToGraph(fn)
+            converter.parse_mei()
+            nb_events = sum(len(v.events) for v in converter.score.voices)
+
+            t0 = perf_counter()
+            pairs = converter.score.find_simultaneous_events()
+            t = perf_counter() - t0
+
+            print(f'{nb_measures:<9} {nb_events:<10} {len(pairs):<10} {t:<10.4f} {t / nb_events * 1e6:.2f}')
+
+##-Run
+if __name__ == '__main__':
+    bench_simultaneous()
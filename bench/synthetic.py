@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''Generates synthetic MEI scores (many voices, many measures) used to benchmark the converter.'''
+
+##-Imports
+import random
+import sys
+
+##-Init
+durations = (2, 4, 8) # Possible durations (half, quarter, eighth)
+pnames = 'cdefgab'
+
+##-Generator
+def make_synthetic_mei(nb_voices: int, nb_measures: int, seed: int = 0) -> str:
+    '''
+    Returns the content of a synthetic MEI file.
+
+    Each measure is a 4/4 measure, and each voice fills it with random notes, rests and chords.
+
+    - nb_voices   : the number of voices (staves) ;
+    - nb_measures : the number of measures ;
+    - seed        : the seed of the random generator (the same seed gives the same score).
+    '''
+
+    rnd = random.Random(seed)
+    lines = []
+
+    lines.append('<?xml version="1.0" encoding="UTF-8"?>')
+    lines.append('<mei xmlns="http://www.music-encoding.org/ns/mei" meiversion="5.0">')
+    lines.append('<meiHead><fileDesc><titleStmt><respStmt>')
+    lines.append('<persName role="composer">Synthetic</persName>')
+    lines.append('<persName role="collection">Synthetic</persName>')
+    lines.append('</respStmt></titleStmt></fileDesc></meiHead>')
+    lines.append('<music><body><mdiv><score><scoreDef>')
+    lines.append(f'<staffGrp xml:id="sg{nb_voices}x{nb_measures}">')
+
+    for v in range(1, nb_voices + 1):
+        lines.append(f'<staffDef xml:id="P{v}" n="{v}" lines="5" />')
+
+    lines.append('</staffGrp></scoreDef><section>')
+
+    k = 0 # Element counter, used to make ids
+    for m in range(1, nb_measures + 1):
+        lines.append(f'<measure xml:id="m{m}" n="{m}">')
+
+        for v in range(1, nb_voices + 1):
+            lines.append(f'<staff n="{v}"><layer n="1">')
+
+            remaining = 8 # In eighth notes
+            while remaining > 0:
+                dur = rnd.choice([d for d in durations if 8 // d <= remaining])
+                remaining -= 8 // dur
+                k += 1
+
+                r = rnd.random()
+                if r < 0.1:
+                    lines.append(f'<rest xml:id="r{k}" dur="{dur}" />')
+
+                elif r < 0.2:
+                    lines.append(f'<chord xml:id="c{k}" dur="{dur}">')
+                    for j in range(3):
+                        lines.append(f'<note xml:id="n{k}_{j}" pname="{rnd.choice(pnames)}" oct="{rnd.randint(3, 5)}" />')
+                    lines.append('</chord>')
+
+                else:
+                    lines.append(f'<note xml:id="n{k}" dur="{dur}" pname="{rnd.choice(pnames)}" oct="{rnd.randint(3, 5)}" />')
+
+            lines.append('</layer></staff>')
+
+        lines.append('</measure>')
+
+    lines.append('</section></score></mdiv></body></music></mei>')
+
+    return '\n'.join(lines)
+
+def write_synthetic_mei(fn: str, nb_voices: int, nb_measures: int, seed: int = 0):
+    '''
+    Writes a synthetic MEI score in the file `fn` (see `make_synthetic_mei`).
+
+    - fn          : the output filename ;
+    - nb_voices   : the number of voices ;
+    - nb_measures : the number of measures ;
+    - seed        : the seed of the random generator.
+    '''
+
+    with open(fn, 'w') as f:
+        f.write(make_synthetic_mei(nb_voices, nb_measures, seed))
+
+##-Run
+if __name__ == '__main__':
+    if len(sys.argv) != 4:
+        print(f'Usage: {sys.argv[0]} output.mei nb_voices nb_measures')
+        sys.exit(1)
+
+    write_synthetic_mei(sys.argv[1], int(sys.argv[2]), int(sys.argv[3]))
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''Checks that MEI files (compressed or not, or in archives, see `archives`) can be converted, without building the internal graph.'''
+
+##-Imports
+#---General
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from os.path import getsize
+from time import perf_counter
+from typing import IO
+import json
+
+#---Project
+from src.MeiToGraph import remove_namespace_from_string, remove_namespace_from_keys
+from src.archives import is_archive, iter_archive, open_mei
+
+##-Init
+max_issues = 50 # Maximum number of errors (and of warnings) kept for one file
+
+##-Main
+class MeiChecker:
+    '''Scans a MEI file tag by tag, and checks the attributes that `MeiToGraph.parse_mei` depends on.'''
+
+    def __init__(self, fn: str|IO[bytes], name: str|None = None, size: int|None = None):
+        '''
+        Initiates the MeiChecker class.
+
+        - fn   : the filename of the MEI file to check (it can be compressed, with the extension '.gz'), or a binary file object (e.g an archive member) ;
+        - name : the name of the file, written in the report. Needed if `fn` is a file object, defaults to `fn` otherwise ;
+        - size : the size of the file, written in the report (None for the size of the file `fn`).
+        '''
+
+        if name == None:
+            if type(fn) != str:
+                raise ValueError('MeiChecker: __init__: `name` is needed when `fn` is a file object')
+
+            name = fn
+
+        self.fn = fn
+        self.name = name
+        self.size = size
+
+        self.errors = [] # Problems that make the conversion fail
+        self.warnings = [] # Problems that make the converter ignore or change some data
+
+        self.nb_voices = 0
+        self.nb_measures = 0
+        self.nb_notes = 0
+
+    def check(self) -> dict:
+        '''
+        Checks the file, and returns the report as a dict (see `_make_report`).
+
+        Only the tags and attributes are read : no `Event` or `Fact` is created, and the XML elements are freed as soon as they are read.
+        '''
+
+        t0 = perf_counter()
+        score = False
+
+        try:
+            if type(self.fn) == str:
+                with open_mei(self.fn) as f:
+                    score = self._check_events(ET.iterparse(f, ['start', 'end']))
+            else:
+                score = self._check_events(ET.iterparse(self.fn, ['start', 'end']))
+
+        except ET.ParseError as err:
+            self._error('xml', None, f'malformed XML : {err}')
+
+        except (OSError, EOFError) as err: # EOFError : truncated gzip file
+            self._error('file', None, f'could not read the file : {err}')
+
+        if not score and len(self.errors) == 0:
+            self._error('staffGrp', None, 'no "staffGrp" found')
+
+        return self._make_report(perf_counter() - t0)
+
+    def _check_events(self, events) -> bool:
+        '''
+        Checks the XML events of the file (see `check`).
+
+        - events : the iterator of (event, element) given by `ET.iterparse` with the events 'start' and 'end'.
+
+        Output: True if a 'staffGrp' was found.
+        '''
+
+        score = False # True when 'staffGrp' has been seen
+        in_measure = False
+        in_chord = False
+        voice_def = False # Same as in `MeiToGraph.parse_mei`
+
+        for event, elem in events:
+            tag = remove_namespace_from_string(elem.tag)
+
+            if event == 'end':
+                if tag == 'measure':
+                    in_measure = False
+                elif tag == 'chord':
+                    in_chord = False
+                elif tag == 'staffDef':
+                    voice_def = False
+
+                elem.clear() # Free the memory
+                continue
+
+            attrib = remove_namespace_from_keys(elem.attrib)
+            id_ = attrib.get('id')
+
+            #---Header
+            if tag == 'persName':
+                if 'role' not in attrib:
+                    self._error('persName', id_, 'attribute "role" not found')
+
+            elif tag == 'staffGrp':
+                score = True
+
+            elif tag == 'staffDef':
+                ppq = self._check_int('staffDef', id_, attrib, 'ppq', False, True)
+                if ppq != None and ppq <= 0:
+                    self._error('staffDef', id_, f'"ppq" should be positive, but {ppq} found')
+
+                self._check_int('staffDef', id_, attrib, 'n', False, True)
+
+                if not score:
+                    self._error('staffDef', id_, '"staffDef" found before "staffGrp"')
+                elif self.nb_measures > 0:
+                    pass # A new definition of an existing staff (e.g a change of clef or key), not a new voice
+                elif 'id' in attrib:
+                    self.nb_voices += 1
+                else:
+                    voice_def = True
+
+            elif voice_def and tag == 'label':
+                self.nb_voices += 1
+                voice_def = False # Only the first label names the voice
+
+            #---Notes
+            elif tag == 'measure':
+                in_measure = True
+                self.nb_measures += 1
+
+                if not score:
+                    self._error('measure', id_, '"measure" found before "staffGrp"')
+                self._check_id('measure', id_)
+
+            elif tag == 'staff':
+                n = self._check_int('staff', id_, attrib, 'n', True)
+                if n != None and not (1 <= n <= self.nb_voices):
+                    self._error('staff', id_, f'staff number {n} does not match any voice (number of voices : {self.nb_voices})')
+
+            elif tag == 'tuplet':
+                if 'num' in attrib and 'numbase' in attrib: # Otherwise the tuplet is ignored
+                    for k in ('num', 'numbase'):
+                        value = self._check_int('tuplet', id_, attrib, k, True)
+                        if value != None and value <= 0:
+                            self._error('tuplet', id_, f'"{k}" should be positive, but {value} found')
+
+            elif tag == 'chord':
+                in_chord = True
+                self._check_id('chord', id_)
+                self._check_in_measure('chord', id_, in_measure)
+                self._check_dur('chord', id_, attrib)
+
+            elif tag == 'note':
+                self.nb_notes += 1
+                self._check_id('note', id_)
+                self._check_in_measure('note', id_, in_measure)
+                self._check_note(id_, attrib, in_chord)
+
+            elif tag == 'rest':
+                self._check_id('rest', id_)
+                self._check_in_measure('rest', id_, in_measure)
+                self._check_dur('rest', id_, attrib)
+                self._check_int('rest', id_, attrib, 'dots', False)
+
+        return score
+
+    def _check_note(self, id_: str|None, attrib: dict[str, str], in_chord: bool):
+        '''
+        Checks the attributes of a 'note' tag.
+
+        - id_      : the id of the note ;
+        - attrib   : the attributes of the note (without namespace) ;
+        - in_chord : True if the note is inside a 'chord' (its duration is then taken from the chord).
+        '''
+
+        if 'pname' not in attrib:
+            self._warning('note', id_, 'attribute "pname" not found : the note will be ignored')
+            return
+
+        if attrib['pname'] not in tuple('abcdefg'):
+            self._error('note', id_, f'"pname" should be in (a, b, c, d, e, f, g), but "{attrib["pname"]}" found')
+
+        octave = self._check_int('note', id_, attrib, 'oct', True)
+        if octave != None and not (0 <= octave <= 9):
+            self._error('note', id_, f'"oct" should be between 0 and 9, but {octave} found')
+
+        if not in_chord:
+            self._check_dur('note', id_, attrib)
+
+        self._check_int('note', id_, attrib, 'dots', False)
+
+        for k in ('accid', 'accid.ges'):
+            if k in attrib and attrib[k] not in ('s', 'f', 'n'):
+                self._error('note', id_, f'"{k}" should be in (s, f, n), but "{attrib[k]}" found')
+
+    def _check_dur(self, tag: str, id_: str|None, attrib: dict[str, str]):
+        '''Checks that the 'dur' attribute exists and is a positive int.'''
+
+        dur = self._check_int(tag, id_, attrib, 'dur', True)
+        if dur != None and dur <= 0:
+            self._error(tag, id_, f'"dur" should be positive, but {dur} found')
+
+    def _check_int(self, tag: str, id_: str|None, attrib: dict[str, str], key: str, required: bool, strict: bool = False) -> int|None:
+        '''
+        Checks that the attribute `key` can be converted to an int, and returns its value (None if there is a problem).
+
+        - tag      : the tag of the element ;
+        - id_      : the id of the element ;
+        - attrib   : the attributes of the element ;
+        - key      : the attribute to check ;
+        - required : if True, a missing or wrong attribute is an error. Otherwise it is a warning (the converter uses a default value) ;
+        - strict   : if True, a wrong value is an error even if the attribute is optional (the converter reads it when it is there, without default).
+        '''
+
+        report = self._error if required or strict else self._warning
+
+        if key not in attrib:
+            if required:
+                report(tag, id_, f'attribute "{key}" not found')
+            return None
+
+        try:
+            return int(attrib[key])
+
+        except ValueError:
+            report(tag, id_, f'attribute "{key}" should be an int, but "{attrib[key]}" found')
+            return None
+
+    def _check_id(self, tag: str, id_: str|None):
+        '''Checks that the element has an id.'''
+
+        if id_ == None:
+            self._error(tag, None, 'attribute "xml:id" not found')
+
+    def _check_in_measure(self, tag: str, id_: str|None, in_measure: bool):
+        '''Checks that the element is inside a measure.'''
+
+        if not in_measure:
+            self._error(tag, id_, f'"{tag}" found outside of a measure')
+
+    def _error(self, tag: str, id_: str|None, msg: str):
+        '''Records an error.'''
+
+        if len(self.errors) < max_issues:
+            self.errors.append({'tag': tag, 'id': id_, 'msg': msg})
+
+    def _warning(self, tag: str, id_: str|None, msg: str):
+        '''Records a warning.'''
+
+        if len(self.warnings) < max_issues:
+            self.warnings.append({'tag': tag, 'id': id_, 'msg': msg})
+
+    def _make_report(self, duration: float) -> dict:
+        '''
+        Returns the report of the check.
+
+        - duration : the time taken by the check, in seconds.
+        '''
+
+        size = self.size
+        if size == None and type(self.fn) == str:
+            try:
+                size = getsize(self.fn)
+            except OSError:
+                pass
+
+        return {
+            'file': self.name,
+            'ok': len(self.errors) == 0,
+            'bytes': size,
+            'voices': self.nb_voices,
+            'measures': self.nb_measures,
+            'notes': self.nb_notes,
+            'time': round(duration, 6),
+            'errors': self.errors,
+            'warnings': self.warnings
+        }
+
+##-Batch
+def check_file(fn: str) -> list[dict]:
+    '''
+    Checks the file `fn` and returns its report (see `MeiChecker.check`), or the report of each MEI file of `fn` if it is an archive
+    (read the same way as by the converter, see `archives.iter_archive`, and named `fn + '/' + member`).
+    Defined at the top level so that it can be used by a process pool.
+
+    - fn : the MEI filename (compressed or not), or the archive filename.
+    '''
+
+    if not is_archive(fn):
+        return [MeiChecker(fn).check()]
+
+    reports = []
+    try:
+        for member, stream, size in iter_archive(fn):
+            reports.append(MeiChecker(stream, fn + '/' + member, size).check())
+
+    except Exception as err: # Unreadable archive
+        checker = MeiChecker(fn)
+        checker._error('file', None, f'could not read the archive : {err}')
+        reports.append(checker._make_report(0))
+
+    return reports
+
+def check_files(files: list[str], report_fn: str, jobs: int|None = None) -> tuple[int, int]:
+    '''
+    Checks all the `files` in parallel, and writes the reports in `report_fn` (one JSON object per line and per MEI file, in the order of `files`).
+
+    - files     : the MEI filenames (compressed or not), or archive filenames ;
+    - report_fn : the filename of the report ;
+    - jobs      : the number of processes to use (None to use the number of CPUs).
+
+    Output: the number of MEI files without error, and the number of MEI files with errors.
+    '''
+
+    nb_ok, nb_err = 0, 0
+    chunksize = max(1, len(files) // (64 * (jobs or 8))) # Big enough chunks to avoid the inter-process overhead on small files
+
+    with open(report_fn, 'w') as f, ProcessPoolExecutor(jobs) as pool:
+        for reports in pool.map(check_file, files, chunksize=chunksize):
+            for report in reports:
+                f.write(json.dumps(report, ensure_ascii=False) + '\n')
+
+                if report['ok']:
+                    nb_ok += 1
+                else:
+                    nb_err += 1
+
+    return nb_ok, nb_err
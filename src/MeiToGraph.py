@@ -14,16 +14,25 @@
 ##-Imports
 #---General
 import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from math import lcm
+from typing import IO
+import io
+import re
 
 #---Project
-from src.utils import log, write_file
+from src.utils import log, flush_log, confirm_overwrite, parse_key_signature, mode_offsets
+from src.archives import open_mei
 
 from src.graph.Score import Score
 from src.graph.TopRhythmic import TopRhythmic
 from src.graph.Voice import Voice
 from src.graph.Measure import Measure
-from src.graph.Event import Event
+from src.graph.Event import Event, set_chords
 from src.graph.Fact import Fact
+from src.graph.GraphCache import is_graph_cache, save_graph, load_graph, encode_graph, decode_graph
+from src.sinks import Sink, MultiSink, CypherFileSink
 
 ##-Util
 def remove_namespace_from_string(s: str) -> str:
@@ -44,23 +53,133 @@ def remove_namespace_from_keys(d: dict[str, str]) -> dict[str, str]:
 
     return new_d
 
+##-Parallel parsing
+measure_start_re = re.compile(rb'<(?:[\w.-]+:)?measure[\s/>]')
+measure_end_re = re.compile(rb'</(?:[\w.-]+:)?measure\s*>')
+namespace_decl_re = re.compile(rb'\sxmlns(?::[\w.-]+)?\s*=\s*(?:"[^"]*"|\'[^\']*\')')
+root_start_re = re.compile(rb'<(?![?!])[^>]*>')
+
+default_ticks_per_whole = 3840 # Minimum grid of the ticks when the file does not give one (attribute `ppq`) : 2^8 * 3 * 5
+
+# Tags read by `MeiToGraph._parse_events`. If one of them is outside of a measure (after the first measure),
+# the measures can not be parsed independently, so the parallel parsing falls back to the sequential one.
+parsed_tags_re = re.compile(rb'<(?:[\w.-]+:)?(persName|staffGrp|staffDef|label|staff|chord|note|rest|syl|ending)[\s/>]')
+
+# Key signatures (element `keySig`, or attributes `key.sig` / `keysig`). A key change after the first measure is not split either,
+# as the key active at the beginning of a range of measures would not be known.
+key_change_re = re.compile(rb'<(?:[\w.-]+:)?keySig[\s/>]|\s(?:key\.sig|keysig)\s*=')
+
+def scan_measures(data: bytes) -> list[tuple[int, int]]|None:
+    '''
+    Finds the byte offsets of the `<measure>` elements in the MEI document `data`.
+
+    Output: the list of `(start, end)` offsets of each measure (`data[start:end]` is the whole element),
+    or None if the measures can not be parsed independently (nested measures, parsed tags between the measures, ...).
+
+    - data : the content of the MEI file.
+    '''
+
+    spans = []
+    pos = 0
+
+    while True:
+        m = measure_start_re.search(data, pos)
+        if m == None:
+            break
+
+        tag_end = data.find(b'>', m.start())
+        if tag_end == -1:
+            return None
+
+        if data[tag_end - 1:tag_end] == b'/': # Empty measure (`<measure ... />`)
+            end = tag_end + 1
+        else:
+            e = measure_end_re.search(data, tag_end)
+            if e == None:
+                return None
+
+            if measure_start_re.search(data, tag_end, e.start()) != None: # Nested measures
+                return None
+
+            end = e.end()
+
+        # Check that nothing parsed is between this measure and the previous one
+        if len(spans) > 0 and parsed_tags_re.search(data, spans[-1][1], m.start()) != None:
+            return None
+
+        spans.append((m.start(), end))
+        pos = end
+
+    if len(spans) == 0 or parsed_tags_re.search(data, spans[-1][1]) != None:
+        return None
+
+    if key_change_re.search(data, spans[0][0]) != None:
+        return None
+
+    return spans
+
+def _parse_measures_fragment(name: str, verbose: bool, voice_ids: list[str], keys: tuple, fragment: bytes) -> bytes:
+    '''
+    Parses a fragment of MEI document containing only measures, and returns its graph encoded by `GraphCache.encode_graph`
+    (unpickling the `Measure`s, `Event`s and `Fact`s would be much slower than parsing sequentially).
+    Used by the workers of `MeiToGraph._parse_parallel` (defined at the top level so that it can be pickled).
+
+    The `start` and `end` of the events are relative to the beginning of the fragment : they are recalculated when the measures are stitched together.
+
+    - name      : the name of the MEI file ;
+    - verbose   : if True, log errors and warnings ;
+    - voice_ids : the ids of the voices of the score (as defined in the 'staffGrp') ;
+    - keys      : the keys defined in the header (`MeiToGraph.key` and `MeiToGraph.staff_keys`) ;
+    - fragment  : the XML of the measures, inside a root element declaring the namespaces.
+    '''
+
+    converter = MeiToGraph(io.BytesIO(fragment), verbose, name)
+    converter.score_id = 'fragment'
+    converter.composer, converter.collection = '', '' # Not used, set to avoid warnings
+    converter._create_score_and_top_rhythmic()
+
+    for id_ in voice_ids:
+        converter._add_voice(id_)
+
+    converter.key, converter.staff_keys = keys
+
+    converter._parse_events(ET.iterparse(converter.fn, ['start', 'end']))
+    converter.score.set_ticks(1) # The times are encoded as ticks
+    flush_log() # The workers do not write their logs at exit
+
+    return encode_graph(converter.score, converter.top_rhythmic)
+
 ##-Main
 class MeiToGraph:
     '''Convert a MEI file to the internal graph representation, and use this representation to dump the cypher.'''
 
-    def __init__(self, fn, verbose=False):
+    def __init__(self, fn: str|IO[bytes], verbose=False, name: str|None = None, jobs: int = 1):
         '''
         Initiates the MeiToGraph class.
 
-        - fn      : the filename of the MEI file to convert ;
-        - verbose : if True, log errors and warnings.
+        - fn      : the filename of the MEI file to convert (it can be compressed, with the extension '.gz'), or a binary file object (stream, archive member, ...).
+                    It can also be a graph cache written by `to_cache` (see `GraphCache`), which is loaded instead of parsed ;
+        - verbose : if True, log errors and warnings ;
+        - name    : the name of the file, used for the `source` attributes and in the logs. Needed if `fn` is a file object, defaults to `fn` otherwise ;
+        - jobs    : the number of processes used to parse the measures (see `_parse_parallel`). 1 parses sequentially.
         '''
     
         #---Init from method arguments
         self.fn = fn
         self.verbose = verbose
+        self.jobs = jobs
+
+        if name == None:
+            if type(fn) != str:
+                raise ValueError('MeiToGraph: __init__: `name` is needed when `fn` is a file object')
+
+            name = fn
 
-        self.fn_without_path = fn.split('/')[-1]
+        self.name = name
+
+        self.fn_without_path = name.split('/')[-1]
+        if self.fn_without_path.lower().endswith('.gz'):
+            self.fn_without_path = self.fn_without_path[:-3] # The dump of 'a.mei.gz' is the same as the one of 'a.mei'
 
         #---Init for Score
         self.composer = None
@@ -73,17 +192,206 @@ class MeiToGraph:
         self.current_measure = None
         self.current_events = [] # self.current_events[k] is the current event for the voice k + 1
         self.facts = [] # Used for chords
+        self.key = None # The key of the score (fifths, mode) (see `_set_key`), None if unknown
+        self.staff_keys = {} # voice number -> key, for the keys defined only for one staff
+        self.tuplet_ratio = Fraction(1) # Ratio applied to the durations of the notes of the current tuplets
+        self.ppqs = [] # The values of the attributes `ppq` (pulses per quarter) of the staves, used for the grid of the ticks
+
+        #---Init for streaming (see `export`)
+        self.stream = None # The sink where the graph is written during the parsing, or None to build the whole graph
+        self._off_grid = False # True when an event not on the grid of the ticks has been written
+        self.grace_bypass = False
+        self._stream_started = False # True when something has already been written in `self.stream`
+        self._previous_measure = None # The last measure written
+        self._last_events = [] # Same as in `TopRhythmic.measures_to_sink`
+        self._last_real_events = []
 
     def parse_mei(self):
-        '''Parses the MEI (XML) to create the graph with the internal representation.'''
+        '''
+        Parses the MEI (XML) to create the graph with the internal representation.
+        If `self.fn` is a graph cache, it is loaded instead.
+        '''
+
+        if is_graph_cache(self.fn):
+            self.score, self.top_rhythmic = load_graph(self.fn)
+            return
+
+        if self.jobs > 1:
+            if type(self.fn) == str:
+                with open_mei(self.fn) as f:
+                    data = f.read()
+            else:
+                data = self.fn.read()
+
+            self._parse_parallel(data)
+
+        elif type(self.fn) == str:
+            with open_mei(self.fn) as f:
+                self._parse_events(ET.iterparse(f, ['start', 'end']))
+
+        else:
+            self._parse_events(ET.iterparse(self.fn, ['start', 'end']))
+
+        self._add_last_events()
+
+        if self.stream != None:
+            self._write_measure()
+            self.score.voices_to_sink(self.stream, self.top_rhythmic)
+        else:
+            self.score.set_ticks(self._get_ticks_base())
+
+    def _get_ticks_base(self) -> int:
+        '''
+        Returns the minimum grid of the ticks of the score (number of ticks in a whole, see `Score.set_ticks`) :
+        from the attributes `ppq` of the staves (4 * ppq ticks in a whole), or `default_ticks_per_whole` if there is none.
+        '''
+
+        if len(self.ppqs) == 0:
+            return default_ticks_per_whole
+
+        return lcm(*(4 * ppq for ppq in self.ppqs))
+
+    def _parse_parallel(self, data: bytes):
+        '''
+        Parses the MEI document `data` using `self.jobs` processes, each one parsing a range of measures.
+
+        The header (everything before the first measure : composer, 'staffGrp', 'staffDef', ...) is parsed here,
+        and the voices it defines are shared with the workers.
+        The measures returned by the workers are then stitched together in order : the measure numbers, the first events of the voices,
+        and the `start` / `end` of the events are computed here, the same way as in the sequential parsing, so the result is identical.
+
+        If the measures can not be parsed independently (see `scan_measures`), it falls back to the sequential parsing.
+
+        - data : the content of the MEI file.
+        '''
+
+        spans = scan_measures(data)
+
+        if spans == None or len(spans) < 2:
+            if self.verbose:
+                log('info', f'MeiToGraph: _parse_parallel: ({self.name}): measures can not be split, parsing sequentially')
+
+            self._parse_events(ET.iterparse(io.BytesIO(data), ['start', 'end']))
+            return
+
+        #---Header
+        parser = ET.XMLPullParser(['start', 'end'])
+        parser.feed(data[:spans[0][0]])
+        self._parse_events(parser.read_events())
+
+        #---Split the measures in ranges of (almost) the same size
+        root = root_start_re.search(data)
+        namespaces = b''.join(namespace_decl_re.findall(data, root.start(), root.end()))
+
+        nb_chunks = min(len(spans), 4 * self.jobs) # More chunks than workers, to balance the load
+        chunk_size = (spans[-1][1] - spans[0][0]) / nb_chunks
+
+        fragments = []
+        current = []
+        limit = spans[0][0] + chunk_size
+        for start, end in spans:
+            current.append(data[start:end])
+
+            if end >= limit:
+                fragments.append(b'<fragment' + namespaces + b'>' + b''.join(current) + b'</fragment>')
+                current = []
+                limit += chunk_size
+
+        if len(current) > 0:
+            fragments.append(b'<fragment' + namespaces + b'>' + b''.join(current) + b'</fragment>')
+
+        #---Parse and stitch
+        voice_ids = [v.id_ for v in self.score.voices]
+        keys = (self.key, self.staff_keys)
+        n = len(fragments)
+
+        with ProcessPoolExecutor(self.jobs) as pool:
+            for body in pool.map(_parse_measures_fragment, [self.name] * n, [self.verbose] * n, [voice_ids] * n, [keys] * n, fragments):
+                _, top_rhythmic = decode_graph(body, with_ticks=False)
+
+                # In a fragment, each voice starts at 0 : its times are shifted by the end of the voice in the previous fragments
+                offsets = [Fraction(0) if e == None else e.end_q for e in self.current_events]
+                shifted = {}
+
+                for m in top_rhythmic.measures:
+                    self._stitch_measure(m, offsets, shifted)
+
+    def _stitch_measure(self, m: Measure, offsets: list[Fraction], shifted: dict):
+        '''
+        Adds a measure parsed by a worker (see `_parse_parallel`) to `self.top_rhythmic`,
+        and recalculates its number and the `start` / `end` of its events (as `_calculate_start_end` would).
+
+        - m       : the `Measure` to add ;
+        - offsets : the time at which each voice starts in the fragment of the measure ;
+        - shifted : the times already shifted in this fragment, (voice index, time in the fragment) -> (time, time as a float).
+                    The end of an event being the start of the next one, each time is only shifted once.
+        '''
+
+        m.number = Measure.n
+        Measure.n += 1
+
+        self._set_current_measure(m)
+
+        for voice_index, events_of_voice in enumerate(m.events):
+            offset = offsets[voice_index]
+
+            for e in events_of_voice:
+                times = []
+                for t in (e.start_q, e.end_q):
+                    key = (voice_index, t)
+                    if key not in shifted:
+                        q = offset + t
+                        shifted[key] = (q, float(q))
+
+                    times.append(shifted[key])
+
+                # Same as `e.set_time`, without converting the fractions again
+                (e.start_q, e.start), (e.end_q, e.end) = times
+                e.pos = e.start
+
+                self.current_events[voice_index] = e
+                self._add_event_to_voice(voice_index, e)
+
+    def _calculate_start_end(self, voice_index: int, length: Fraction|None) -> tuple[Fraction, Fraction|None]:
+        '''
+        Calculates the exact `start` and `end` of a new event, following the current event of its voice.
+
+        - voice_index : the index of the voice (the voice number - 1) ;
+        - length      : the exact duration of the event, with its dots and tuplets (1 for a whole), None for the last event.
+        '''
+
+        old_event = self.current_events[voice_index]
+
+        if old_event == None:
+            start = Fraction(0)
+        else:
+            start = old_event.end_q
+
+        if length == None:
+            end = None # Last event
+        else:
+            end = start + length
+
+        return start, end
+
+    def _parse_events(self, events):
+        '''
+        Creates the graph from the XML events.
+
+        - events : the iterator of (event, element) given by `ET.iterparse` with the events 'start' and 'end'.
+        '''
 
         chord = False # Flag used to know if the currently read notes are in a chord or standalone.
         voice_def = False # Flag used for voice definition, when the id is not in the 'staffGrp', but in a sublabel.
+        staff_def_nb = None # The number of the staff defined by the current 'staffDef' (None outside of a 'staffDef')
+        tuplets = [] # The ratios of the current (nested) tuplets
+        current_ending = None # The number(s) of the current ending (volta), None outside of an 'ending'
         current_voice_nb = 0
         current_chord_duration = 0
         current_syllable = None # Used to store syllables. None when there is no syllable for the current note.
+        syllable_hints = (None, None) # The attributes `wordpos` and `con` of the current syllable
 
-        for event, elem in ET.iterparse(self.fn, ['start', 'end']):
+        for event, elem in events:
             tag = remove_namespace_from_string(elem.tag)
             attrib = remove_namespace_from_keys(elem.attrib)
 
@@ -93,7 +401,7 @@ class MeiToGraph:
                 self._handle_persName(attrib['role'], elem.text)
 
             #-Score id
-            elif event == 'start' and tag == 'staffGrp':
+            elif event == 'start' and tag == 'staffGrp' and self.current_measure == None: # A 'staffGrp' after the first measure only redefines the staves (e.g a key change)
                 if 'id' in attrib:
                     self.score_id = attrib['id']
                 else:
@@ -103,7 +411,16 @@ class MeiToGraph:
 
             #-Voices definition
             elif event == 'start' and tag == 'staffDef':
-                if 'id' in attrib:
+                if 'ppq' in attrib:
+                    self.ppqs.append(int(attrib['ppq']))
+
+                if 'n' in attrib:
+                    staff_def_nb = int(attrib['n'])
+                    self._set_key(attrib.get('key.sig', attrib.get('keysig')), attrib.get('key.mode'), staff_def_nb)
+
+                if self.current_measure != None:
+                    pass # A new definition of an existing staff, see 'staffGrp'
+                elif 'id' in attrib:
                     self._add_voice(attrib['id'])
                 else:
                     voice_def = True # The id is in a label, see below
@@ -111,27 +428,57 @@ class MeiToGraph:
             elif voice_def and event == 'start' and tag == 'label':
                 self._add_voice(elem.text)
 
-            elif voice_def and event == 'end' and tag == 'staffDef':
+            elif event == 'end' and tag == 'staffDef':
                 voice_def = False
+                staff_def_nb = None
+
+            #-Keys
+            elif event == 'start' and tag == 'scoreDef':
+                self._set_key(attrib.get('key.sig', attrib.get('keysig')), attrib.get('key.mode'))
+
+            elif event == 'start' and tag == 'keySig':
+                self._set_key(attrib.get('sig'), attrib.get('mode'), staff_def_nb)
 
             #---Notes
             #-Measures
             elif event == 'start' and tag == 'measure':
-                repeat_sign, left, right = None, None, None
-                if 'left' in attrib and attrib['left'] == 'rptstart':
+                left = attrib.get('left') if attrib.get('left') in ('rptstart', 'rptboth') else None
+                right = attrib.get('right') if attrib.get('right') in ('rptstart', 'rptend', 'rptboth', 'end') else None
+
+                repeat_sign = None
+                if left != None:
                     repeat_sign = 'start'
-                    left = 'rptstart'
-                elif 'right' in attrib and attrib['right'] == 'rptend':
+                elif right in ('rptend', 'rptboth'):
                     repeat_sign = 'end'
-                    right = 'rptend'
-                elif 'right' in attrib and attrib['right'] == 'end':
-                    right = 'end'
-                self._add_measure(attrib['id'], repeat_sign, left, right)
+
+                self._add_measure(attrib['id'], repeat_sign, left, right, current_ending)
+
+            elif event == 'end' and tag == 'measure':
+                elem.clear() # The XML of the measure is not needed anymore
+
+            #-Endings (voltas)
+            elif event == 'start' and tag == 'ending':
+                current_ending = attrib.get('n', attrib.get('label'))
+
+            elif event == 'end' and tag == 'ending':
+                current_ending = None
 
             #-Voice nb
             elif event == 'start' and tag == 'staff':
                 current_voice_nb = int(attrib['n']) # Actualise the current voice number
 
+            #-Tuplets
+            elif event == 'start' and tag == 'tuplet':
+                ratio = Fraction(1)
+                if 'num' in attrib and 'numbase' in attrib:
+                    ratio = Fraction(int(attrib['numbase']), int(attrib['num'])) # `num` notes in the time of `numbase`
+
+                tuplets.append(ratio)
+                self.tuplet_ratio *= ratio
+
+            elif event == 'end' and tag == 'tuplet':
+                self.tuplet_ratio /= tuplets.pop()
+
             #-Chords
             elif event == 'start' and tag == 'chord':
                 chord = True
@@ -147,7 +494,7 @@ class MeiToGraph:
             elif event == 'end' and tag == 'note': # Parsing on end to have syllables already seen
                 # Ensure that 'pname' is in `attrib`
                 if 'pname' not in attrib:
-                    log('error', f'MeiToGraph: parse_mei: adding note: attribute "pname" not found !\nCurrent file : "{self.fn}".\nCurrent note id : "{attrib["id"]}".\nAttributes : {attrib}.\nNote that this note will be IGNORED !\nIf the mei file was converted using verovio, maybe try to convert with mscore (MuseScore) instead')
+                    log('error', f'MeiToGraph: parse_mei: adding note: attribute "pname" not found !\nCurrent file : "{self.name}".\nCurrent note id : "{attrib["id"]}".\nAttributes : {attrib}.\nNote that this note will be IGNORED !\nIf the mei file was converted using verovio, maybe try to convert with mscore (MuseScore) instead')
                     continue
 
                 # Check accidentals
@@ -170,7 +517,7 @@ class MeiToGraph:
                     try:
                         dots = int(attrib['dots'])
                     except ValueError as err:
-                        log('err', f'MeiToGraph: parse_mei: adding note: dots: error when trying to convert dot value to int. Dots will be set to 0 for this note.\nCurrent file : "{self.fn}".\nCurrent note id : "{attrib["id"]}".')
+                        log('err', f'MeiToGraph: parse_mei: adding note: dots: error when trying to convert dot value to int. Dots will be set to 0 for this note.\nCurrent file : "{self.name}".\nCurrent note id : "{attrib["id"]}".')
 
                 # Get grace status
                 grace = None
@@ -188,11 +535,14 @@ class MeiToGraph:
                     accid,
                     accid_ges,
                     current_syllable,
-                    grace
+                    grace,
+                    self.staff_keys.get(current_voice_nb, self.key),
+                    syllable_hints
                 )
 
                 # Reset current syllable
                 current_syllable = None
+                syllable_hints = (None, None)
 
                 # If it is not a chord, add the Event
                 if not chord:
@@ -205,8 +555,9 @@ class MeiToGraph:
                     )
 
             #-Syllables
-            elif event == 'start' and tag == 'syl':
+            elif event == 'end' and tag == 'syl' and current_syllable == None: # On end, as the text may not be parsed yet on start. Only the first verse is kept
                 current_syllable = elem.text
+                syllable_hints = (attrib.get('wordpos'), attrib.get('con')) # To assemble the words (see `Lyrics`)
             
             #-Rest
             elif event == 'start' and tag == 'rest':
@@ -216,17 +567,15 @@ class MeiToGraph:
                     try:
                         dots = int(attrib['dots'])
                     except ValueError as err:
-                        log('err', f'MeiToGraph: parse_mei: adding rest: dots: error when trying to convert dot value to int. Dots will be set to 0 for this rest.\nCurrent file : "{self.fn}".\nCurrent rest id : "{attrib["id"]}".')
+                        log('err', f'MeiToGraph: parse_mei: adding rest: dots: error when trying to convert dot value to int. Dots will be set to 0 for this rest.\nCurrent file : "{self.name}".\nCurrent rest id : "{attrib["id"]}".')
 
                 # Add note fact and event
                 self._add_fact(attrib['id'] + '_fact', 'rest', None, None, int(attrib['dur']), dots, None, None, None, None)
                 self._add_event_from_facts(attrib['id'], 'rest', int(attrib['dur']), dots, current_voice_nb)
-            
-        self._add_last_events()
 
-    def to_file(self, out_fn: str, no_confirmation: bool = False) -> bool:
+    def to_file(self, out_fn: str, no_confirmation: bool = False, simultaneous: bool = False, grace_bypass: bool = False, stream: bool = False, time_index: bool = False, unfold_repeats: bool = False) -> bool:
         '''
-        Convert the internal graph to a cypher dump, and write it to a file.
+        Convert the internal graph to a cypher dump, and write it to a file (see `export`).
 
         If the `self.parse_mei` method has already been called (so `self.score` is not None), it does not call it again.
         Otherwise, it calls the method (so it is not needed to call `parse_mei` before calling this method).
@@ -235,15 +584,117 @@ class MeiToGraph:
             - True  if the file has been written
             - False otherwise.
 
-        - out_fn          : the filename where to write the output ;
-        - no_confirmation : if True, do not ask for confirmation to overwrite the file if it already exists.
+        - out_fn          : the filename where to write the output (compressed with gzip if it ends with '.gz') ;
+        - no_confirmation : if True, do not ask for confirmation to overwrite the file if it already exists ;
+        - simultaneous    : if True, also create the :SIMULTANEOUS links between events of different voices (see `Score.to_sink`) ;
+        - grace_bypass    : if True, also create the :NEXT links skipping grace notes (see `Measure.to_sink`) ;
+        - stream          : if True, write the dump while parsing ;
+        - time_index      : if True, also create the index of the events by time (see `Score.time_index_to_sink`) ;
+        - unfold_repeats  : if True, also create the chains of the events in the order they are played (see `TopRhythmic.performance_to_sink`).
         '''
-    
+
+        self._check_stream(stream, simultaneous, time_index, unfold_repeats) # Before creating the file
+
+        if not confirm_overwrite(out_fn, no_confirmation, self.verbose):
+            return False
+
+        self.export([CypherFileSink(out_fn)], simultaneous, grace_bypass, stream, time_index, unfold_repeats)
+        return True
+
+    def export(self, sinks: list[Sink], simultaneous: bool = False, grace_bypass: bool = False, stream: bool = False, time_index: bool = False, unfold_repeats: bool = False) -> dict[str, float]:
+        '''
+        Writes the graph to all the `sinks` (see `sinks.py`) with only one traversal of the graph, and closes them.
+
+        As for `to_file`, it parses the file if it is not already done.
+
+        In streaming mode (`stream` is True), the graph is not kept : each measure is written as soon as the next one starts,
+        and only the last event of each voice is kept (for the :NEXT links), so the memory used does not depend on the size of the score.
+        The output is the same as without streaming.
+        The streaming is not possible if the file is already parsed, or with `simultaneous`, `time_index` or `unfold_repeats` (that need all the events).
+
+        - sinks          : the sinks to write to ;
+        - simultaneous   : if True, also create the :SIMULTANEOUS links between events of different voices (see `Score.to_sink`) ;
+        - grace_bypass   : if True, also create the :NEXT links skipping grace notes (see `Measure.to_sink`) ;
+        - stream         : if True, write to the sinks while parsing ;
+        - time_index     : if True, also create the index of the events by time (see `Score.time_index_to_sink`) ;
+        - unfold_repeats : if True, also create the chains of the events in the order they are played (see `TopRhythmic.performance_to_sink`).
+
+        Output: the time spent in each sink (in seconds), by sink name (see `MultiSink.get_times`).
+        '''
+
+        stream = self._check_stream(stream, simultaneous, time_index, unfold_repeats)
+        sink = MultiSink(sinks)
+
+        try:
+            if stream:
+                self.grace_bypass = grace_bypass
+                self.stream = sink
+                self.parse_mei()
+
+            else:
+                if self.score == None:
+                    self.parse_mei()
+
+                self.score.to_sink(sink, self.top_rhythmic, simultaneous, grace_bypass, time_index, unfold_repeats)
+
+        except BaseException:
+            sink.abort() # The outputs are incomplete
+            raise
+
+        finally:
+            self.stream = None
+
+        sink.close()
+        return sink.get_times()
+
+    def _check_stream(self, stream: bool, simultaneous: bool, time_index: bool = False, unfold_repeats: bool = False) -> bool:
+        '''
+        Checks that the streaming mode (see `export`) is possible, and raises a ValueError if it is not.
+
+        - stream         : if True, the graph is asked to be streamed ;
+        - simultaneous   : if True, the :SIMULTANEOUS links are asked ;
+        - time_index     : if True, the index of the events by time is asked ;
+        - unfold_repeats : if True, the chains in the order of the performance are asked.
+
+        Output: True if the graph will be streamed (it is not when it is loaded from a cache).
+        '''
+
+        if stream and is_graph_cache(self.fn):
+            if self.verbose:
+                log('info', f'MeiToGraph: export: ({self.name}): the graph is loaded from a cache, so it is not streamed')
+
+            return False
+
+        if stream:
+            if self.score != None:
+                raise ValueError('MeiToGraph: export: streaming is not possible when the file is already parsed')
+
+            if simultaneous:
+                raise ValueError('MeiToGraph: export: streaming is not possible with the :SIMULTANEOUS links')
+
+            if time_index:
+                raise ValueError('MeiToGraph: export: streaming is not possible with the index of the events by time')
+
+            if unfold_repeats:
+                raise ValueError('MeiToGraph: export: streaming is not possible with the unfolded repeats')
+
+        return stream
+
+    def to_cache(self, out_fn: str):
+        '''
+        Writes the internal graph in the binary format of `GraphCache`, so that it can be loaded later instead of parsing the MEI file again.
+        As for `to_file`, it parses the file if it is not already done.
+
+        - out_fn : the filename of the cache (it should end with `GraphCache.cache_extension`).
+        '''
+
+        if self._stream_started:
+            raise ValueError('MeiToGraph: to_cache: the graph was not kept, as it has been streamed (see `to_file`)')
+
         if self.score == None:
             self.parse_mei()
 
-        dump = self.score.to_cypher(self.top_rhythmic)
-        return write_file(out_fn, dump, no_confirmation, self.verbose)
+        save_graph(out_fn, self.score, self.top_rhythmic)
 
     #TODO: def dump(self, uri: str, user: str, pwd: str)
 
@@ -282,12 +733,12 @@ class MeiToGraph:
             if self.composer != None:
                 self.collection = self.composer
                 if self.verbose:
-                    log('warn', f'MeiToGraph: _create_score: ({self.fn}): using `composer` instead of `collection` as the latter does not exists in the file')
+                    log('warn', f'MeiToGraph: _create_score: ({self.name}): using `composer` instead of `collection` as the latter does not exists in the file')
             else:
                 self.collection = ''
 
                 if self.verbose:
-                    log('warn', f'MeiToGraph: _create_score: ({self.fn}): `self.collection` is not defined')
+                    log('warn', f'MeiToGraph: _create_score: ({self.name}): `self.collection` is not defined')
 
         self.top_rhythmic = TopRhythmic(self.fn_without_path, self.composer, self.collection, measures=[])
         self.score = Score(self.fn_without_path, self.score_id, self.composer, self.collection, voices=[])
@@ -305,17 +756,90 @@ class MeiToGraph:
 
         self.current_events.append(None) # Add an empty event in the current events list for this new voice
 
-    def _add_measure(self, id_, repeat_sign=None, left=None, right=None):
+    def _add_measure(self, id_, repeat_sign=None, left=None, right=None, ending=None):
         '''
         Creates and adds a new `Measure` to `self.top_rhythmic`.
 
-        - id_ : the measure id.
+        - id_    : the measure id ;
+        - ending : the number(s) of the ending containing the measure (see `Measure`).
         '''
 
-        self.current_measure = Measure(self.fn_without_path, id_, events=[], repeat_sign=repeat_sign, left=left, right=right)
-        self.top_rhythmic.add_measure(self.current_measure)
+        self._set_current_measure(Measure(self.fn_without_path, id_, events=[], repeat_sign=repeat_sign, left=left, right=right, ending=ending))
 
-    def _add_fact(self, id_: str, type_: str, class_: str|None, octave: int|None, duration: int, dots: int, accid: str|None, accid_ges: str|None, syllable: str|None, grace: None|str):
+    def _set_current_measure(self, m: Measure):
+        '''
+        Sets `m` as the current measure, and adds it to `self.top_rhythmic`.
+        In streaming mode, the previous measure is written instead of being kept.
+
+        - m : the new `Measure`.
+        '''
+
+        if self.stream == None:
+            self.top_rhythmic.add_measure(m)
+
+        elif not self._stream_started: # First measure : the score is now defined (there can be several 'staffGrp', the last one is used)
+            self.score.ticksPerWhole = self._get_ticks_base() # The other events are not known yet, so the grid can not be extended (see `_write_measure`)
+            self.score.header_to_sink(self.stream, self.top_rhythmic)
+            self._stream_started = True
+
+        else:
+            self._write_measure()
+
+        self.current_measure = m
+
+    def _write_measure(self):
+        '''In streaming mode, writes the current measure (see `Measure.to_sink`) in `self.stream`, and forgets its events.'''
+
+        m = self.current_measure
+        if m == None:
+            return
+
+        for events_of_voice in m.events:
+            for e in events_of_voice:
+                if not e.set_ticks(self.score.ticksPerWhole) and not self._off_grid:
+                    self._off_grid = True
+                    log('warn', f'MeiToGraph: _write_measure: ({self.name}): some events are not on the grid of {self.score.ticksPerWhole} ticks per whole, their ticks are not written when streaming (e.g "{e.id_}")')
+
+            set_chords(events_of_voice)
+
+        m.to_sink(self.stream, self.top_rhythmic.cypher_id, self._previous_measure, self._last_events, self._last_real_events, self.grace_bypass)
+
+        m.events = [] # Only the id of the previous measure is needed from now
+        self._previous_measure = m
+
+    def _set_key(self, sig: str|None, mode: str|None, staff_nb: int|None = None):
+        '''
+        Changes the active key (used for the notes parsed from now).
+
+        - sig      : the key signature (e.g '0', '2s', '3f', see `parse_key_signature`). If None, only the mode is changed ;
+        - mode     : the mode ('major', 'minor', ...). If None or unknown, the mode is 'major' for a new key signature, and unchanged otherwise ;
+        - staff_nb : the number of the staff (voice) of the key, or None for all the staves (then the keys of the staves are forgotten).
+        '''
+
+        if sig != None:
+            fifths = parse_key_signature(sig)
+
+            if fifths == None:
+                key = None
+                if self.verbose:
+                    log('warn', f'MeiToGraph: _set_key: ({self.name}): key signature "{sig}" not understood, the key is unknown from now')
+            else:
+                key = (fifths, mode if mode in mode_offsets else 'major')
+
+        else:
+            old = self.key if staff_nb == None else self.staff_keys.get(staff_nb, self.key)
+            if old == None or mode not in mode_offsets:
+                return
+
+            key = (old[0], mode)
+
+        if staff_nb == None:
+            self.key = key
+            self.staff_keys = {}
+        else:
+            self.staff_keys[staff_nb] = key
+
+    def _add_fact(self, id_: str, type_: str, class_: str|None, octave: int|None, duration: int, dots: int, accid: str|None, accid_ges: str|None, syllable: str|None, grace: None|str, key: tuple[int, str]|None = None, syllable_hints: tuple[str|None, str|None] = (None, None)):
         '''
         Creates and adds a `Fact` to `self.facts`. Called when on tag `note` in a chord.
 
@@ -328,11 +852,15 @@ class MeiToGraph:
         - accid     : a potential accidental on the note ;
         - accid_ges : a potential accidental on the key ;
         - syllable  : the potential syllable attatched to a note ;
-        - grace     : If not None, indicate that the note is a grace note, and give its type.
+        - grace     : If not None, indicate that the note is a grace note, and give its type ;
+        - key            : the key active on the note, (fifths, mode) (see `_set_key`), None if unknown ;
+        - syllable_hints : the attributes `wordpos` and `con` of the syllable (see `Fact`).
         '''
     
         #-Create Fact
-        f = Fact(self.fn_without_path, id_, type_, class_, octave, duration, dots, accid, accid_ges, syllable, grace)
+        key_fifths, key_mode = (None, None) if key == None else key
+        wordpos, con = syllable_hints
+        f = Fact(self.fn_without_path, id_, type_, class_, octave, duration, dots, accid, accid_ges, syllable, grace, key_fifths=key_fifths, key_mode=key_mode, wordpos=wordpos, con=con)
         self.facts.append(f)
 
     def _add_event_from_facts(self, id_: str, type_: str, duration: int, dots: int|None, voice_nb: int):
@@ -347,19 +875,6 @@ class MeiToGraph:
         '''
         voice_index = voice_nb - 1
 
-        #-Set `start` and `end`
-        old_event = self.current_events[voice_index]
-
-        if old_event == None:
-            start = 0
-        else:
-            start = old_event.end
-
-        if duration == 0:
-            end = None # Last event
-        else:
-            end = start + (1 / duration)
-
         #-Get dots
         if dots == None:
             dots = 0
@@ -368,8 +883,18 @@ class MeiToGraph:
                 if f.dots > dots:
                     dots = f.dots
 
+        #-Set `start` and `end`
+        length = None
+        if duration != 0 and len(self.facts) > 0 and all(f.grace != None for f in self.facts):
+            length = Fraction(0) # A grace note takes no time : the note after it starts at the same time
+
+        elif duration != 0:
+            length = Fraction(1, duration) * (2 - Fraction(1, 2**dots)) * self.tuplet_ratio # Each dot adds half of the previous value
+
+        start, end = self._calculate_start_end(voice_index, length)
+
         #-Create Event
-        self.current_events[voice_index] = Event(self.fn_without_path, id_, type_, duration, dots, start, start, end, facts=self.facts, voice_nb=voice_nb)
+        self.current_events[voice_index] = Event(self.fn_without_path, id_, type_, duration, dots, float(start), start, end, facts=self.facts, voice_nb=voice_nb)
 
         #-Add event to current measure
         if self.current_measure == None:
@@ -384,8 +909,26 @@ class MeiToGraph:
         if voice_index > len(self.score.voices):
             raise ValueError(f'MeiToGraph: _add_event_from_facts: error with `voice_nb`: too large (number of voices : {len(self.score.voices)}, but `voice_nb` was set to {voice_nb})')
 
-        if not self.score.voices[voice_index].is_first_event_set():
-            self.score.voices[voice_index].set_event(self.current_events[voice_index])
+        self._add_event_to_voice(voice_index, self.current_events[voice_index])
+
+    def _add_event_to_voice(self, voice_index: int, e: Event):
+        '''
+        Adds the event `e` to its voice (as its first event if it is not set yet).
+        In streaming mode, the list of all the events of the voice is not kept.
+
+        - voice_index : the index of the voice (the voice number - 1) ;
+        - e           : the new `Event`.
+        '''
+
+        voice = self.score.voices[voice_index]
+
+        if not voice.is_first_event_set():
+            voice.set_event(e)
+
+        if self.stream == None:
+            voice.add_event(e)
+        else:
+            voice.lyrics.add_event(e) # The lyrics are kept, as they are written with the voice
 
     def _add_last_events(self):
         '''
@@ -14,17 +14,36 @@
 ##-Imports
 #---General
 import argparse
-from os.path import isfile, isdir, abspath, join
+import glob
+from os.path import isfile, isdir, abspath, join, getsize
+import json
 import os
+import shutil
+import tempfile
+from time import perf_counter
 
 #---Project
 from src.MeiToGraph import MeiToGraph
-from src.utils import log, basename, write_file
+from src.MeiChecker import check_files
+from src.archives import is_archive, iter_archive, make_member_fn
+from src.graph.GraphCache import cache_extension, is_graph_cache
+from src.graph.profiles import export_profiles, get_profile, get_link_types, check_profile
+from src.scheduler import Scheduler, Task
+from src.sinks import CypherFileSink, ShardedCypherSink, CsvSink, SummarySink, Neo4jSink, IdSink, SqliteSink, ProjectionSink, load_digests, merge_sqlite, create_sqlite_indexes, remove_sqlite, property_indexes, fulltext_indexes, make_fulltext_index_string, find_labels, partial_suffix
+from src.utils import log, basename, write_file, confirm_overwrite, configure_log, log_levels
 from src.neo4j_connection import connect_to_neo4j, run_query
+from src.memory_graph import MemoryDriver, check_graph
+from src.id_registry import IdRegistry
+from src.features import FeaturesSink, build_corpus_matrix
+from src.duplicates import MelodySink, DuplicateIndex, write_cluster_tags
+from src.metrics import CountSink, RunMetrics
+from src.journal import Journal, journal_name
+from src.memprofile import MemProfileSink
 
 
 ##-Init
 version = '0.1.0'
+formats = ('cypher', 'cypher.gz', 'shards', 'csv', 'summary', 'sqlite', 'features', 'neo4j') # The output formats (see `sinks.py`)
 
 
 ##-Types
@@ -41,6 +60,24 @@ def folder_arg(f: str):
     else:
         return f
 
+def formats_arg(s: str) -> list[str]:
+    '''
+    Parses a comma separated list of output formats, and raises an argument parser error if one of them is unknown.
+
+    - s : the list (e.g 'cypher,csv').
+    '''
+
+    l = [f.strip() for f in s.split(',') if f.strip() != '']
+
+    for f in l:
+        if f not in formats:
+            raise argparse.ArgumentTypeError(f'unknown format "{f}" (choose among {", ".join(formats)})')
+
+    if len(l) == 0:
+        raise argparse.ArgumentTypeError('no format given')
+
+    return l
+
 
 ##-Utils
 def make_dump_fn(input_file: str, output_folder: str|None):
@@ -52,6 +89,12 @@ def make_dump_fn(input_file: str, output_folder: str|None):
     - output_folder : the argparse `output_folder` option.
     '''
 
+    if input_file.lower().endswith('.gz'):
+        input_file = input_file[:-3] # 'a.mei.gz' gives the same dump name as 'a.mei'
+
+    elif is_graph_cache(input_file):
+        input_file = input_file[:-len(cache_extension)] # The cache of 'a.mei' gives the same dump name as 'a.mei'
+
     b = basename(input_file) + '_dump.cypher'
     
     if output_folder == None:
@@ -62,9 +105,226 @@ def make_dump_fn(input_file: str, output_folder: str|None):
         else:
             path = output_folder
 
+    if path == '':
+        return b
+
     return path + '/' + b
 
 
+def make_cache_fn(input_file: str, output_folder: str|None):
+    '''
+    Create the filename for the graph cache (see `GraphCache`) associated to the input file `input_file`.
+    It is next to the dump (see `make_dump_fn`).
+
+    - input_file    : the input mei filename ;
+    - output_folder : the argparse `output_folder` option.
+    '''
+
+    return make_dump_fn(input_file, output_folder)[:-len('_dump.cypher')] + cache_extension
+
+
+def make_output_fns(dump_fn: str) -> dict[str, str]:
+    '''
+    Returns the output filename of each file format (see `formats`), made from the dump filename `dump_fn` ('a_dump.cypher') :
+        - cypher    : 'a_dump.cypher' ;
+        - cypher.gz : 'a_dump.cypher.gz' ;
+        - shards    : the folder 'a_shards/' ;
+        - csv       : the folder 'a_csv/' ;
+        - summary   : 'a_summary.json' ;
+        - features  : 'a_features.npz'.
+
+    - dump_fn : the filename of the dump (see `make_dump_fn`).
+    '''
+
+    base = dump_fn[:-len('_dump.cypher')]
+
+    return {
+        'cypher': dump_fn,
+        'cypher.gz': dump_fn + '.gz',
+        'shards': base + '_shards',
+        'csv': base + '_csv',
+        'summary': base + '_summary.json',
+        'features': base + '_features.npz'
+    }
+
+def get_output_files(dump_fn: str, formats: list[str]|None = None) -> list[str]:
+    '''
+    Returns the outputs of a file that exist (see `make_output_fns`), with the files of the folders instead of the folders.
+
+    - dump_fn : the filename of the dump ;
+    - formats : the formats of the outputs to list (None for all of them).
+    '''
+
+    fns = []
+    for f, fn in make_output_fns(dump_fn).items():
+        if formats != None and f not in formats:
+            continue
+
+        if isfile(fn):
+            fns.append(fn)
+
+        elif isdir(fn):
+            for folder, _, files in os.walk(fn):
+                fns += sorted(join(folder, f) for f in files)
+
+    return fns
+
+def get_outputs_size(dump_fn: str) -> int:
+    '''
+    Returns the total size (in bytes) of the outputs of a file that exist (see `make_output_fns`), including the content of the folders.
+
+    - dump_fn : the filename of the dump.
+    '''
+
+    return sum(getsize(fn) for fn in get_output_files(dump_fn))
+
+def get_output_options(args: argparse.Namespace) -> dict:
+    '''
+    Returns the options that change the outputs of a file (recorded in the journal, see `Journal.get_done`).
+
+    - args : the parsed arguments.
+    '''
+
+    return {
+        'formats': args.formats,
+        'profile': args.profile,
+        'simultaneous': args.simultaneous,
+        'grace_bypass': args.grace_bypass,
+        'time_index': args.time_index,
+        'unfold_repeats': args.unfold_repeats,
+        'shard_size': args.shard_size
+    }
+
+def remove_partial_outputs(dump_fn: str):
+    '''
+    Removes the outputs of a file left incomplete (see `sinks.partial_suffix`), e.g when its conversion was stopped.
+
+    - dump_fn : the filename of the dump.
+    '''
+
+    fns = make_output_fns(dump_fn)
+
+    for fn in fns.values():
+        if isfile(fn + partial_suffix):
+            os.remove(fn + partial_suffix)
+
+    if isdir(fns['shards']) and not isfile(join(fns['shards'], 'manifest.cql')): # Shards without their manifest
+        shutil.rmtree(fns['shards'])
+
+
+def make_sinks(name: str, dump_fn: str, args: argparse.Namespace, driver=None, sqlite_fn: str|None = None) -> list:
+    '''
+    Creates the sinks for the formats in `args.formats`. The output filenames are made from `dump_fn` (see `make_output_fns`).
+    The outputs of the graph (not summary and features) only get the properties of the profile `args.profile` (see `profiles.py`).
+
+    - name      : the name of the file (written in the summary) ;
+    - dump_fn   : the filename of the dump ;
+    - args      : the parsed arguments ;
+    - driver    : the Neo4j driver, used for the format 'neo4j' ;
+    - sqlite_fn : the SQLite database, used for the format 'sqlite' (shared by all the files of the run).
+    '''
+
+    fns = make_output_fns(dump_fn)
+    properties = get_profile(args.profile)
+
+    def project(sink):
+        return sink if properties == None else ProjectionSink(sink, properties)
+
+    sinks = []
+    for f in args.formats:
+        if f in ('cypher', 'cypher.gz'):
+            sinks.append(project(CypherFileSink(fns[f])))
+        elif f == 'shards':
+            sinks.append(project(ShardedCypherSink(fns[f], args.shard_size)))
+        elif f == 'csv':
+            sinks.append(project(CsvSink(fns[f])))
+        elif f == 'summary':
+            sinks.append(SummarySink(fns[f], name))
+        elif f == 'sqlite':
+            sinks.append(project(SqliteSink(sqlite_fn)))
+        elif f == 'features':
+            sinks.append(FeaturesSink(fns[f]))
+        elif f == 'neo4j':
+            sinks.append(project(Neo4jSink(driver)))
+
+    return sinks
+
+
+def convert_file(source, name: str, dump_fn: str, cache_fn: str, args: argparse.Namespace, driver=None, keep_ids: bool = False, sqlite_fn: str|None = None, ids_fn: str|None = None) -> tuple[dict[str, float], IdSink|None, MelodySink|None, CountSink|None, dict|None]:
+    '''
+    Converts one MEI file to the outputs given by `args.formats` (with only one parse, see `MeiToGraph.export`), without any confirmation.
+    Defined at the top level so that it can be run by the `Scheduler`.
+
+    - source   : the MEI filename (or graph cache filename), or a binary file object (e.g an archive member) ;
+    - name     : the name of the file (used in the logs and as `source` in the graph) ;
+    - dump_fn  : the filename of the dump (the other output filenames are made from it) ;
+    - cache_fn : the filename of the graph cache, written if `args.cache` is True ;
+    - args     : the parsed arguments ;
+    - driver   : the Neo4j driver, used if 'neo4j' is in `args.formats`. If None, a connection is opened for this file ;
+    - keep_ids  : if True, the `IdSink` also keeps the ids (not only their digests) ;
+    - sqlite_fn : the SQLite database, used if 'sqlite' is in `args.formats` ;
+    - ids_fn    : if not None, the digests of the ids are written in this file instead of being kept in the `IdSink` (see `sinks.load_digests`).
+
+    Output: the time spent in each output (see `MeiToGraph.export`), the `IdSink` with the digests of the ids (None if `args.id_check` is False),
+            the `MelodySink` with the MinHash signature of the score (None if `args.duplicates` is None),
+            the `CountSink` with the numbers of nodes and notes (None if `args.metrics` is None),
+            and the memory profile (see `MemProfileSink.get_report`, None if `args.memprofile` is None).
+    '''
+
+    own_driver = driver == None and 'neo4j' in args.formats
+    if own_driver:
+        driver = connect_to_neo4j(args.uri, args.user, args.password)
+
+    profiler = None
+    if args.memprofile != None:
+        profiler = MemProfileSink() # Started before everything else
+
+    try:
+        sinks = make_sinks(name, dump_fn, args, driver, sqlite_fn)
+
+        id_sink = None
+        if args.id_check:
+            id_sink = IdSink(keep_ids, ids_fn)
+            sinks.append(id_sink)
+
+        melody_sink = None
+        if args.duplicates != None:
+            melody_sink = MelodySink()
+            sinks.append(melody_sink)
+
+        count_sink = None
+        if args.metrics != None:
+            count_sink = CountSink()
+            sinks.append(count_sink)
+
+        converter = MeiToGraph(source, args.verbose, name, args.measure_jobs)
+
+        if profiler != None:
+            sinks.insert(0, profiler) # Closed first, at the end of the phase 'export'
+
+            if not args.stream or is_graph_cache(source):
+                converter.parse_mei()
+                profiler.snapshot('parse')
+                profiler.count_graph(converter.score, converter.top_rhythmic)
+
+        times = converter.export(sinks, args.simultaneous, args.grace_bypass, args.stream, args.time_index, args.unfold_repeats)
+
+        if profiler != None:
+            profiler.snapshot('write')
+
+        if args.cache and not is_graph_cache(source):
+            converter.to_cache(cache_fn)
+
+    finally:
+        if own_driver:
+            driver.close()
+
+        if profiler != None:
+            profiler.stop()
+
+    return times, id_sink, melody_sink, count_sink, None if profiler == None else profiler.get_report()
+
+
 ##-Ui parser
 class ParserUi:
     '''Defines an argument parser'''
@@ -117,6 +377,165 @@ class ParserUi:
             '-q', '--cql',
             help='If enabled, also create the .cql file (that is useful to load all the generated .cypher in the database)'
         )
+        self.parser.add_argument(
+            '-s', '--simultaneous',
+            action='store_true',
+            help='also create :SIMULTANEOUS links between the notes of different voices that sound at the same time'
+        )
+        self.parser.add_argument(
+            '-g', '--grace-bypass',
+            action='store_true',
+            help='also create :NEXT links that skip grace notes, so that searches can ignore them'
+        )
+        self.parser.add_argument(
+            '--time-index',
+            action='store_true',
+            help='also create a :TimeBucket node for each whole of the score, linked (:SOUNDS) to the events sounding during it, to find the events at a given time without scanning the voices'
+        )
+        self.parser.add_argument(
+            '--unfold-repeats',
+            action='store_true',
+            help='also link the events of each voice in the order they are played (:PERF_NEXT, with the position `order` in the chain), with the repeats and their endings unfolded'
+        )
+        self.parser.add_argument(
+            '--check',
+            metavar='REPORT',
+            help='only check that the files can be converted (in parallel, without converting them), and write the report in REPORT (one JSON object per file and per line, with one per MEI file of the archives)'
+        )
+        self.parser.add_argument(
+            '--memprofile',
+            metavar='REPORT',
+            help='trace the memory allocated while converting each file, and write in REPORT (one JSON object per file and per line) the memory after each phase (parse, export, write), the source lines that allocated the most, and the objects of the graph by class. Slows down the conversion. With -J, the measures parsed by the other processes are not traced'
+        )
+        self.parser.add_argument(
+            '-j', '--jobs',
+            type=int,
+            help='number of processes to use. With --check, the default is the number of CPUs. When converting, the files are converted one after the other by default, and in parallel (largest first) when -j, --memory-budget or --timeout is given (with the number of CPUs if -j is not given), see also --retries'
+        )
+        self.parser.add_argument(
+            '--memory-budget',
+            type=int,
+            metavar='MB',
+            help='when converting in parallel, maximum memory (in MB) estimated for the files in progress (default: no limit). A file bigger than the budget is converted alone'
+        )
+        self.parser.add_argument(
+            '--timeout',
+            type=float,
+            metavar='SECONDS',
+            help='when converting in parallel, maximum duration of the conversion of one file (default: no limit)'
+        )
+        self.parser.add_argument(
+            '--retries',
+            type=int,
+            default=1,
+            help='when converting in parallel, number of times a failed (or timed out) file is tried again (default: 1)'
+        )
+        self.parser.add_argument(
+            '--dead-letter',
+            metavar='FILE',
+            help='when converting in parallel, write the files that could not be converted in FILE (one JSON object per line)'
+        )
+        self.parser.add_argument(
+            '-J', '--measure-jobs',
+            type=int,
+            default=1,
+            help='number of processes used to parse each file, by ranges of measures (only for very large scores, with free cores : the main process still rebuilds all the events, so it is slower on one core). Default is 1 (sequential)'
+        )
+        self.parser.add_argument(
+            '--stream',
+            action='store_true',
+            help='write each dump while parsing its file, without keeping the whole graph in memory (not compatible with -s, --time-index and --unfold-repeats)'
+        )
+        self.parser.add_argument(
+            '-f', '--formats',
+            type=formats_arg,
+            default=['cypher'],
+            help='comma separated list of the outputs written from each parsed file : cypher (the dump), cypher.gz (gzip-compressed dump), shards (the dump split in small statements, loaded in order by the "manifest.cql" of its "_shards" folder), csv (CSV files for neo4j-admin import, in a "_csv" folder), summary (JSON statistics), sqlite (one database for all the files, see --sqlite-db), features (NumPy arrays of the notes and features of the score, gathered for all the files in "corpus_features.npz"), neo4j (direct load into the database given by --uri, --user and --password). Default is cypher'
+        )
+        self.parser.add_argument(
+            '--profile',
+            choices=tuple(export_profiles),
+            default='full',
+            help='the properties written on the nodes (see `profiles.py`) : full (all of them), search (only the ones used by the searches, with the name of the file only on the Score), or minimal (the ids, the indexed properties and the ones needed by the links). Used by the formats cypher, cypher.gz, shards, csv, sqlite and neo4j. Default is full'
+        )
+        self.parser.add_argument(
+            '--sqlite-db',
+            metavar='FILE',
+            default='graph.sqlite',
+            help='the SQLite database where all the files are written, with the format "sqlite" (default: graph.sqlite, in the output folder if one is given)'
+        )
+        self.parser.add_argument(
+            '--shard-size',
+            type=int,
+            default=1000,
+            help='maximum number of CREATE clauses in each shard, with the format "shards" (default: 1000)'
+        )
+        self.parser.add_argument(
+            '-c', '--cache',
+            action='store_true',
+            help=f'also save the parsed graph of each file in a compact binary file next to its dump (ending with "{cache_extension}"). Those files can then be given instead of the MEI files, to convert them again faster'
+        )
+        self.parser.add_argument(
+            '--no-id-check',
+            dest='id_check',
+            action='store_false',
+            help='do not check that the node ids (cypher_id) are unique among all the converted files. When the check finds duplicates, the .cql file (-q) is not written'
+        )
+        self.parser.add_argument(
+            '--duplicates',
+            metavar='REPORT',
+            help='find the near-duplicate scores among the converted files (same melodic intervals, even transposed, see `duplicates.py`), and write the clusters in REPORT (JSON)'
+        )
+        self.parser.add_argument(
+            '--duplicate-threshold',
+            type=float,
+            default=.8,
+            help='minimum similarity (estimated Jaccard index of the n-grams of intervals) of two near-duplicate scores, with --duplicates (default: 0.8)'
+        )
+        self.parser.add_argument(
+            '--tag-duplicates',
+            action='store_true',
+            help='with --duplicates, also set the property `duplicate_cluster` of the Score nodes of the clusters, with the file "duplicates.cypher" (in the output folder), loaded at the end of the .cql file (-q), or directly with the format neo4j'
+        )
+        self.parser.add_argument(
+            '--log-format',
+            choices=('text', 'json'),
+            default='text',
+            help='format of the logs : text, or json (one JSON object per line, with the fields of the message, e.g the file and the duration). Default is text'
+        )
+        self.parser.add_argument(
+            '--log-level',
+            choices=tuple(k for k in log_levels if k != 'err'),
+            default='info',
+            help='minimum level of the logs written (default: info)'
+        )
+        self.parser.add_argument(
+            '--log-file',
+            metavar='FILE',
+            help='append the logs to FILE instead of writing them in the console. The logs are written by groups of lines'
+        )
+        self.parser.add_argument(
+            '--journal',
+            metavar='FILE',
+            help=f'record each converted file in the journal FILE, with the checksums of its outputs, so that the run can be resumed (--resume). No journal is written without this option or --resume'
+        )
+        self.parser.add_argument(
+            '--resume',
+            action='store_true',
+            help=f'resume an interrupted run started with --journal : skip the files recorded in the journal whose input and outputs did not change, and add their outputs to the .cql file (-q). The journal is "{journal_name}" in the output folder (or in the current folder) if --journal is not given'
+        )
+        self.parser.add_argument(
+            '--metrics',
+            metavar='FILE',
+            help='write the counters of the run (files, notes, nodes, bytes, errors, durations) in FILE, in the text format of Prometheus (e.g for the textfile collector of the node exporter), every --metrics-interval seconds and at the end'
+        )
+        self.parser.add_argument(
+            '--metrics-interval',
+            type=float,
+            default=10,
+            metavar='SECONDS',
+            help='minimum time between two writes of the metrics file (default: 10)'
+        )
         self.parser.add_argument(
             '--load',
             type=str,
@@ -126,7 +545,7 @@ class ParserUi:
             '--uri',
             type=str,
             default='bolt://localhost:7687',
-            help='the URI of the Neo4j database (default: bolt://localhost:7687)'
+            help='the URI of the Neo4j database (default: bolt://localhost:7687). Use memory:// to load into an in-memory stand-in, that checks the loaded graph'
         )
         self.parser.add_argument(
             '--user',
@@ -144,7 +563,7 @@ class ParserUi:
         self.parser.add_argument(
             'files',
             nargs='*',
-            help='the MEI files to convert. For each file, it adds "_dump.cypher" to the basename of the file.'
+            help='the MEI files to convert (.mei or .mei.gz), or zip / tar archives containing them. For each file, it adds "_dump.cypher" to the basename of the file (for an archive member, to its path in the archive, with "__" instead of "/").'
         )
 
     def parse(self):
@@ -153,6 +572,8 @@ class ParserUi:
         #---Get arguments
         args = self.parser.parse_args()
 
+        configure_log(args.log_level, args.log_format == 'json', args.log_file)
+
         if args.load:
             if not isfile(args.load):
                 log('error', f'Load file "{args.load}" not found.')
@@ -175,34 +596,169 @@ class ParserUi:
                     break
 
             log('info', f'Finished loading {args.load}.')
+            self._report_memory_graph(driver)
+
+        elif args.check:
+            files = []
+            for f in args.files:
+                if not isfile(f):
+                    log('warn', f'"{f}" is not a file !')
+                else:
+                    files.append(f)
+
+            nb_ok, nb_err = check_files(files, args.check, args.jobs)
+
+            log('info', f'Checked {nb_ok + nb_err} files : {nb_ok} ok, {nb_err} with errors. Report written in "{args.check}".')
 
         else:
+            if args.stream and args.cache:
+                log('error', 'The options --stream and --cache can not be used together, as the graph is not kept when streaming.')
+                return
+
+            if args.stream and args.time_index:
+                log('error', 'The options --stream and --time-index can not be used together, as the index needs all the events of the score.')
+                return
+
+            if args.stream and args.unfold_repeats:
+                log('error', 'The options --stream and --unfold-repeats can not be used together, as the measures are played again after being written.')
+                return
+
+            problems = check_profile(args.profile, get_link_types(args.simultaneous, args.time_index, args.unfold_repeats))
+            if len(problems) > 0:
+                for p in problems:
+                    log('error', p)
+
+                log('error', f'The profile "{args.profile}" can not be used with these options.')
+                return
+
+            files = args.files
             dump_files = []
+            self.features_fns = [] # The features of the files converted, gathered at the end (format 'features')
+            self.duplicate_index = None if args.duplicates == None else DuplicateIndex(args.duplicate_threshold)
+            self.id_registry = IdRegistry() if args.id_check else None
+            self.metrics = None if args.metrics == None else RunMetrics(args.metrics, args.metrics_interval)
+            self.memprofiles = [] # The memory profiles of the files converted (--memprofile)
+
+            self.sqlite_fn = None
+            if 'sqlite' in args.formats:
+                self.sqlite_fn = args.sqlite_db if args.output_folder == None else join(args.output_folder, args.sqlite_db)
+
+                if not args.resume: # When resuming, the database already contains the files that are skipped
+                    if not confirm_overwrite(self.sqlite_fn, args.no_confirmation, args.verbose):
+                        return
+
+                    remove_sqlite(self.sqlite_fn) # The run starts with an empty database
+
+            self.journal = None # Only with --journal or --resume
+            if args.journal != None or args.resume:
+                journal_fn = args.journal
+                if journal_fn == None:
+                    journal_fn = journal_name if args.output_folder == None else join(args.output_folder, journal_name)
+
+                self.journal = Journal(journal_fn, args.resume)
+
+            # Parallel conversion of the files (the archives are read in this process, below)
+            if args.jobs != None or args.timeout != None or args.memory_budget != None:
+                files = [f for f in args.files if not isfile(f) or is_archive(f)]
+                scheduled = [f for f in args.files if isfile(f) and not is_archive(f)]
+
+                done_loadable = {} # The files skipped as they are in the journal (with --resume) -> their outputs to load
+                for f in scheduled:
+                    loadable = self._get_done(f, f, make_dump_fn(f, args.output_folder), args)
+                    if loadable != None:
+                        done_loadable[f] = loadable
+
+                converted = self._convert_scheduled([f for f in scheduled if f not in done_loadable], args)
+
+                for f in scheduled: # In the order of the arguments
+                    dump_fn = make_dump_fn(f, args.output_folder)
+
+                    if f in done_loadable:
+                        dump_files += done_loadable[f]
+
+                    elif dump_fn in converted:
+                        dump_files += self._get_loadable_files(dump_fn, args)
+
+            driver = None
+            if 'neo4j' in args.formats and len(files) > 0:
+                driver = connect_to_neo4j(args.uri, args.user, args.password)
+
+            for k, f in enumerate(files):
+                progress = f'{round((k + 1) / len(files) * 100)}% done !'
 
-            for k, f in enumerate(args.files):
                 if not isfile(f):
                     log('warn', f'"{f}" is not a file !')
 
+                elif is_archive(f):
+                    # The members are read directly from the archive, and their dumps are written next to it (or in the output folder)
+                    for member, stream, size in iter_archive(f):
+                        member_fn = make_member_fn(f, member)
+
+                        dump_fn = make_dump_fn(member_fn, args.output_folder)
+                        cache_fn = make_cache_fn(member_fn, args.output_folder)
+
+                        loadable = self._get_done(f + '/' + member, f, dump_fn, args)
+                        if loadable != None:
+                            dump_files += loadable
+
+                        elif self._convert(stream, f + '/' + member, dump_fn, cache_fn, args, progress, driver, f, size):
+                            dump_files += self._get_loadable_files(dump_fn, args)
+
                 else:
                     dump_fn = make_dump_fn(f, args.output_folder)
+                    cache_fn = make_cache_fn(f, args.output_folder)
+
+                    loadable = self._get_done(f, f, dump_fn, args)
+                    if loadable != None:
+                        dump_files += loadable
+
+                    elif self._convert(f, f, dump_fn, cache_fn, args, progress, driver, f):
+                        dump_files += self._get_loadable_files(dump_fn, args)
+
+            if self.journal != None:
+                self.journal.close()
+
+            if self.metrics != None:
+                self.metrics.update(True)
+                log('info', f'Metrics written in "{args.metrics}".')
+
+            if args.memprofile != None:
+                self._report_memprofile(args)
 
-                    if args.verbose:
-                        log('info', f'Converting file "{f}" to "{dump_fn}" ...')
+            if self.duplicate_index != None:
+                tags_fn = self._report_duplicates(args)
 
-                    converter = MeiToGraph(f, args.verbose)
+                if tags_fn != None:
+                    dump_files.append(tags_fn)
 
-                    res = None
-                    try:
-                        res = converter.to_file(dump_fn, args.no_confirmation)
-                    except:
-                        print(f"Something went wrong for {f}")
+                    if 'neo4j' in args.formats:
+                        if driver == None:
+                            driver = connect_to_neo4j(args.uri, args.user, args.password)
 
-                    if res:
-                        log('info', f'File "{f}" has been converted to cypher in file "{dump_fn}" ! {round((k + 1) / len(args.files) * 100)}% done !')
-                        dump_files.append(dump_fn)
+                        with open(tags_fn) as f:
+                            statements = f.read().split(';\n')[:-1]
 
-                    else:
-                        log('info', f'Conversion for the file "{f}" has been canceled ! {round((k + 1) / len(args.files) * 100)}% done !')
+                        try:
+                            for statement in statements:
+                                run_query(driver, statement)
+                        except Exception as e:
+                            log('error', f'Error while tagging the duplicates in the database : {e}')
+
+            if driver != None:
+                self._report_memory_graph(driver)
+                driver.close()
+
+            if self.sqlite_fn != None and isfile(self.sqlite_fn):
+                create_sqlite_indexes(self.sqlite_fn)
+                log('info', f'SQLite database "{self.sqlite_fn}" written !')
+
+            if len(self.features_fns) > 0:
+                self._make_corpus_features(args)
+
+            if not self._report_ids(args):
+                if args.cql != None:
+                    log('error', f'Generation of {args.cql} canceled as some node ids are not unique !')
+                return
             
             if args.cql != None:
                 if len(dump_files) == 0:
@@ -211,11 +767,443 @@ class ParserUi:
 
                 self._make_cql_file(dump_files, args.cql, args.no_confirmation, args.verbose)
 
+    def _convert(self, source, name: str, dump_fn: str, cache_fn: str, args: argparse.Namespace, progress: str, driver=None, input_fn: str|None = None, input_bytes: int|None = None) -> bool:
+        '''
+        Converts one MEI file to the outputs given by `args.formats` (see `convert_file`), after asking for confirmation to overwrite them.
+        The file is then recorded in the journal.
+
+        - source   : the MEI filename (or graph cache filename), or a binary file object (e.g an archive member) ;
+        - name     : the name of the file (used in the logs and as `source` in the graph) ;
+        - dump_fn  : the filename of the dump (the other output filenames are made from it) ;
+        - cache_fn : the filename of the graph cache, written if `args.cache` is True ;
+        - args     : the parsed arguments ;
+        - progress : the progression, shown in the logs ;
+        - driver   : the Neo4j driver, used if 'neo4j' is in `args.formats` ;
+        - input_fn : the file read (the MEI file, or the archive containing it), recorded in the journal ;
+        - input_bytes : the size of the input, for the metrics (None for the size of the file `source`, e.g an archive member gives its own).
+
+        Return :
+            - True  if the outputs have been written ;
+            - False otherwise.
+        '''
+
+        if args.verbose:
+            log('info', f'Converting file "{name}" to "{dump_fn}" ...', file=name)
+
+        res = None
+        id_sink, melody_sink, count_sink = None, None, None
+        t0 = perf_counter()
+        try:
+            res = self._confirm_outputs(dump_fn, args)
+
+            if res:
+                ids_fn = self.journal.get_ids_fn(name) if args.id_check and self.journal != None else None # Kept for --resume
+                times, id_sink, melody_sink, count_sink, profile = convert_file(source, name, dump_fn, cache_fn, args, driver, True, self.sqlite_fn, ids_fn)
+                self._register_ids(name, id_sink)
+                self._add_memprofile(name, profile)
+
+                if self.duplicate_index != None:
+                    self.duplicate_index.add(name, melody_sink)
+
+                if 'features' in args.formats:
+                    self.features_fns.append((name, make_output_fns(dump_fn)['features']))
+
+                if args.verbose:
+                    log('info', f'Time spent in each output for "{name}" : ' + ', '.join(f'{k}: {t:.3f}s' for k, t in times.items()), file=name, times=times)
+        except:
+            log('error', f'Something went wrong for {name}', file=name)
+            remove_partial_outputs(dump_fn)
+            res = None
+
+        duration = perf_counter() - t0
+
+        if res:
+            log('info', f'File "{name}" has been converted to cypher in file "{dump_fn}" ! {progress}', file=name, output=dump_fn, duration=duration)
+            self._record(name, input_fn, dump_fn, cache_fn, args, duration, id_sink, melody_sink)
+
+        else:
+            log('info', f'Conversion for the file "{name}" has been canceled ! {progress}', file=name, duration=duration)
+
+        if self.metrics != None:
+            if input_bytes == None:
+                input_bytes = getsize(source) if type(source) == str else 0
+            self.metrics.add_file(bool(res), duration, input_bytes, get_outputs_size(dump_fn) if res else 0, count_sink)
+
+        return bool(res)
+
+    def _convert_scheduled(self, files: list[str], args: argparse.Namespace) -> list[str]:
+        '''
+        Converts the MEI files `files` in parallel, with the `Scheduler` (largest files first, memory budget, timeouts and retries).
+        The confirmations to overwrite the outputs are all asked before starting.
+
+        - files : the MEI (or graph cache) filenames ;
+        - args  : the parsed arguments.
+
+        Output: the dump filenames of the files converted, in the order of `files`.
+        '''
+
+        with tempfile.TemporaryDirectory(prefix='musypher_') as tmp: # The digests of the ids of each file without journal, not sent back through the pipes
+            return self._run_scheduled(files, args, tmp)
+
+    def _run_scheduled(self, files: list[str], args: argparse.Namespace, tmp: str) -> list[str]:
+        '''
+        Runs the conversions of `_convert_scheduled`.
+
+        - files : the MEI (or graph cache) filenames ;
+        - args  : the parsed arguments ;
+        - tmp   : a temporary folder, where the digests of the ids of each file are written when there is no journal.
+
+        Output: the dump filenames of the files converted, in the order of `files`.
+        '''
+
+        if self.sqlite_fn != None:
+            # The databases of the files of an interrupted run, that were not merged (so not recorded in the journal) : they are converted again
+            for fn in glob.glob(glob.escape(self.sqlite_fn) + '.part*'):
+                if fn[len(self.sqlite_fn + '.part'):].isdigit():
+                    remove_sqlite(fn)
+
+        tasks = []
+        for f in files:
+            dump_fn = make_dump_fn(f, args.output_folder)
+            cache_fn = make_cache_fn(f, args.output_folder)
+
+            if not self._confirm_outputs(dump_fn, args):
+                log('info', f'Conversion for the file "{f}" has been canceled !')
+                continue
+
+            sqlite_fn = None
+            if self.sqlite_fn != None:
+                sqlite_fn = f'{self.sqlite_fn}.part{len(tasks)}' # Each process writes its own database, merged when it is done (see `_on_task_result`)
+
+            ids_fn = None # The digests are not sent back through the pipe
+            if args.id_check:
+                ids_fn = join(tmp, f'ids{len(tasks)}') if self.journal == None else self.journal.get_ids_fn(f)
+
+            tasks.append(Task(f, getsize(f), (f, f, dump_fn, cache_fn, args, None, False, sqlite_fn, ids_fn)))
+
+        memory_budget = None if args.memory_budget == None else args.memory_budget * 1024**2
+        scheduler = Scheduler(convert_file, args.jobs, memory_budget, args.timeout, args.retries, args.verbose, lambda task: self._on_task_result(task, args))
+        done, dead = scheduler.run(tasks)
+
+        for task in done:
+            log('info', f'File "{task.name}" has been converted to cypher in file "{task.args[2]}" ({task.time:.3f}s)', file=task.name, output=task.args[2], duration=task.time)
+            self._register_ids(task.name, task.result[1])
+            self._add_memprofile(task.name, task.result[4])
+
+            if self.duplicate_index != None:
+                self.duplicate_index.add(task.name, task.result[2])
+
+            if 'features' in args.formats:
+                self.features_fns.append((task.name, make_output_fns(task.args[2])['features']))
+
+        if self.sqlite_fn != None:
+            for t in dead:
+                remove_sqlite(t.args[7])
+
+        for t in dead:
+            remove_partial_outputs(t.args[2]) # The process may have been stopped while writing
+
+        if len(dead) > 0:
+            log('warn', f'{len(dead)} files could not be converted : ' + ', '.join(f'"{t.name}"' for t in dead))
+
+            if args.dead_letter != None:
+                with open(args.dead_letter, 'w') as f:
+                    for t in dead:
+                        f.write(json.dumps({'file': t.name, 'bytes': t.size, 'tries': t.tries, 'error': t.error}, ensure_ascii=False) + '\n')
+
+                log('info', f'Dead-letter list written in "{args.dead_letter}" (the files can be converted again by giving them to the command)')
+
+        done_names = set(t.name for t in done)
+        return [t.args[2] for t in tasks if t.name in done_names]
+
+    def _on_task_result(self, task: Task, args: argparse.Namespace):
+        '''
+        Called by the `Scheduler` for each file converted (done or dead) : merges its SQLite database into the one of the run (format 'sqlite'),
+        records it in the journal (once all its outputs are written, so after the merge), and adds it to the metrics of the run.
+
+        - task : the task ;
+        - args : the parsed arguments.
+        '''
+
+        ok = task.error == None
+
+        if ok and self.sqlite_fn != None:
+            merge_sqlite(self.sqlite_fn, [task.args[7]])
+
+        if ok:
+            self._record(task.name, task.name, task.args[2], task.args[3], args, task.time, task.result[1], task.result[2])
+
+        if self.metrics != None:
+            self.metrics.add_file(ok, task.time, task.size, get_outputs_size(task.args[2]) if ok else 0, task.result[3] if ok else None)
+
+    def _get_done(self, name: str, input_fn: str, dump_fn: str, args: argparse.Namespace) -> list[str]|None:
+        '''
+        When resuming (`--resume`), checks if the file `name` was already converted (see `Journal.get_done`).
+
+        - name     : the name of the file ;
+        - input_fn : the file read (the MEI file, or the archive containing it) ;
+        - dump_fn  : the filename of the dump ;
+        - args     : the parsed arguments.
+
+        Output: the outputs of the file to load in the .cql file (see `_get_loadable_files`) if it is done, None otherwise.
+        '''
+
+        if not args.resume or self.journal == None:
+            return None
+
+        entry = self.journal.get_done(name, input_fn, get_output_options(args))
+        if entry == None:
+            return None
+
+        # The checks of the run need the ids and the signature of the file : it is converted again if they were not recorded
+        if (self.id_registry != None and entry.get('ids') == None) or (self.duplicate_index != None and 'signature' not in entry):
+            return None
+
+        log('info', f'File "{name}" has already been converted (see the journal "{self.journal.fn}"), skipped.', file=name)
+
+        if self.id_registry != None:
+            self.id_registry.add_all(load_digests(entry['ids']), self.id_registry.add_file(name))
+
+        if self.duplicate_index != None:
+            melody_sink = MelodySink()
+            melody_sink.score_id, melody_sink.signature = entry['score_id'], entry['signature']
+            self.duplicate_index.add(name, melody_sink)
+
+        if 'features' in args.formats:
+            self.features_fns.append((name, make_output_fns(dump_fn)['features']))
+
+        return entry['loadable']
+
+    def _record(self, name: str, input_fn: str|None, dump_fn: str, cache_fn: str, args: argparse.Namespace, duration: float, id_sink: IdSink|None = None, melody_sink: MelodySink|None = None):
+        '''
+        Records a converted file in the journal (if there is one), with its outputs (and its graph cache, with `--cache`),
+        and what the id check and the search of duplicates need to replay it when it is skipped (see `_get_done`).
+
+        - name     : the name of the file ;
+        - input_fn : the file read (the MEI file, or the archive containing it), None if unknown ;
+        - dump_fn  : the filename of the dump ;
+        - cache_fn : the filename of the graph cache ;
+        - args     : the parsed arguments ;
+        - duration    : the time spent on the file ;
+        - id_sink     : the `IdSink` of the file, with the file of its digests (None without id check) ;
+        - melody_sink : the `MelodySink` of the file (None without `--duplicates`).
+        '''
+
+        if self.journal == None:
+            return
+
+        outputs = get_output_files(dump_fn, args.formats)
+        if args.cache and isfile(cache_fn):
+            outputs.append(cache_fn)
+
+        extra = {}
+        if id_sink != None and id_sink.fn != None:
+            outputs.append(id_sink.fn) # Checked with the outputs
+            extra['ids'] = id_sink.fn
+
+        if melody_sink != None:
+            extra['score_id'] = melody_sink.score_id
+            extra['signature'] = melody_sink.signature
+
+        self.journal.record(name, input_fn, get_output_options(args), outputs, self._get_loadable_files(dump_fn, args), duration, extra)
+
+    def _add_memprofile(self, name: str, profile: dict|None):
+        '''
+        Keeps the memory profile of a converted file for the report (nothing is done without `--memprofile`).
+
+        - name    : the name of the file ;
+        - profile : the profile returned by `convert_file`.
+        '''
+
+        if profile == None:
+            return
+
+        self.memprofiles.append({'file': name, **profile})
+
+        if profile['bytes_per_note'] != None:
+            log(
+                'info', f'Memory for "{name}" : {profile["bytes_per_note"]:.0f} bytes per note kept, peak of {profile["peak_per_note"]:.0f} bytes per note ({profile["notes"]} notes)',
+                file=name, bytes_per_note=profile['bytes_per_note'], peak_per_note=profile['peak_per_note']
+            )
+
+    def _report_memprofile(self, args: argparse.Namespace):
+        '''
+        Writes the memory profiles of the files (`--memprofile`), one JSON object per line, and logs the total memory per note.
+
+        - args : the parsed arguments.
+        '''
+
+        with open(args.memprofile, 'w') as f:
+            for p in self.memprofiles:
+                f.write(json.dumps(p, ensure_ascii=False) + '\n')
+
+        profiles = [p for p in self.memprofiles if p['bytes_per_note'] != None and p['notes'] > 0]
+        if len(profiles) > 0:
+            notes = sum(p['notes'] for p in profiles)
+            graph = sum(p['bytes_per_note'] * p['notes'] for p in profiles)
+            worst = max(profiles, key=lambda p: p['peak_per_note'])
+
+            log('info', f'Memory for {len(profiles)} files : {graph / notes:.0f} bytes per note kept on average. Highest peak : {worst["peak_per_note"]:.0f} bytes per note, for "{worst["file"]}"')
+
+        log('info', f'Memory profiles written in "{args.memprofile}".')
+
+    def _register_ids(self, name: str, id_sink: IdSink|None):
+        '''
+        Adds the ids of a converted file to `self.id_registry` (nothing is done if the check is disabled).
+
+        - name    : the name of the file ;
+        - id_sink : the `IdSink` returned by `convert_file`.
+        '''
+
+        if id_sink == None or self.id_registry == None:
+            return
+
+        digests = id_sink.digests if id_sink.fn == None else load_digests(id_sink.fn)
+        self.id_registry.add_all(digests, self.id_registry.add_file(name), id_sink.ids)
+
+    def _report_ids(self, args: argparse.Namespace) -> bool:
+        '''
+        Logs the node ids found several times in the run (see `IdRegistry`).
+
+        - args : the parsed arguments.
+
+        Output: False if some ids are not unique, True otherwise (or if the check is disabled).
+        '''
+
+        if self.id_registry == None or self.id_registry.nb_collisions == 0:
+            return True
+
+        log('error', f'{self.id_registry.nb_collisions} node ids (cypher_id) are not unique, the nodes would be merged in the database :')
+
+        for p in self.id_registry.get_report():
+            f1, f2 = p['files']
+            where = f'in "{f1}"' if f1 == f2 else f'between "{f1}" and "{f2}"'
+            examples = '' if len(p['examples']) == 0 else ' (e.g ' + ', '.join(p['examples']) + ')'
+            log('error', f'    {p["count"]} ids {where}{examples}')
+
+        if 'neo4j' in args.formats:
+            log('warn', 'The files have already been loaded into the database (format neo4j) : the check can not prevent it')
+
+        return False
+
+    def _confirm_outputs(self, dump_fn: str, args: argparse.Namespace) -> bool:
+        '''
+        Asks for confirmation to overwrite each output file of the formats in `args.formats` (see `make_output_fns`) that already exists.
+
+        - dump_fn : the filename of the dump ;
+        - args    : the parsed arguments.
+
+        Output: False if an overwrite was canceled, True otherwise.
+        '''
+
+        fns = make_output_fns(dump_fn)
+
+        for f in args.formats:
+            if f == 'shards':
+                if not confirm_overwrite(join(fns[f], 'manifest.cql'), args.no_confirmation, args.verbose):
+                    return False
+
+            elif f in fns and not confirm_overwrite(fns[f], args.no_confirmation, args.verbose):
+                return False
+
+        return True
+
+    def _report_duplicates(self, args: argparse.Namespace) -> str|None:
+        '''
+        Writes the clusters of near-duplicate scores found in the run (see `DuplicateIndex`) in the report `args.duplicates`,
+        and if `args.tag_duplicates` is True, the statements tagging their Score nodes (see `write_cluster_tags`).
+
+        - args : the parsed arguments.
+
+        Output: the filename of the tags if it was written, None otherwise.
+        '''
+
+        index = self.duplicate_index
+        clusters = index.get_clusters()
+
+        report = {
+            'threshold': index.threshold,
+            'nb_scores': len(index.signatures),
+            'nb_skipped': index.nb_skipped,
+            'clusters': clusters
+        }
+
+        if write_file(args.duplicates, json.dumps(report, indent=4, ensure_ascii=False), args.no_confirmation, args.verbose):
+            nb_files = sum(len(c['files']) for c in clusters)
+            log('info', f'{len(clusters)} clusters of near-duplicates ({nb_files} files) written in "{args.duplicates}"')
+
+        if not args.tag_duplicates or len(clusters) == 0:
+            return None
+
+        tags_fn = 'duplicates.cypher' if args.output_folder == None else join(args.output_folder, 'duplicates.cypher')
+        if not write_cluster_tags(clusters, tags_fn, args.no_confirmation, args.verbose):
+            return None
+
+        return tags_fn
+
+    def _make_corpus_features(self, args: argparse.Namespace):
+        '''
+        Gathers the features of the files converted (`self.features_fns`) in the matrix "corpus_features.npz" (see `features.build_corpus_matrix`),
+        written in the output folder (or in the current folder).
+
+        - args : the parsed arguments.
+        '''
+
+        out_fn = 'corpus_features.npz' if args.output_folder == None else join(args.output_folder, 'corpus_features.npz')
+
+        if not confirm_overwrite(out_fn, args.no_confirmation, args.verbose):
+            return
+
+        build_corpus_matrix([fn for _, fn in self.features_fns], out_fn, [name for name, _ in self.features_fns])
+        log('info', f'Features of {len(self.features_fns)} files written in "{out_fn}" !')
+
+    def _report_memory_graph(self, driver):
+        '''
+        If `driver` is an in-memory stand-in (URI 'memory://', see `memory_graph`), logs the content of its graph, and the problems found by `check_graph`.
+
+        - driver : the driver.
+        '''
+
+        if not isinstance(driver, MemoryDriver):
+            return
+
+        g = driver.graph
+        log('info', f'In-memory graph : {len(g.nodes)} nodes {g.count_nodes()}, {len(g.rels)} relationships {g.count_rels()}')
+
+        problems = check_graph(g)
+        for p in problems[:20]:
+            log('warn', p)
+
+        if len(problems) > 20:
+            log('warn', f'... and {len(problems) - 20} other problems')
+
+    def _get_loadable_files(self, dump_fn: str, args: argparse.Namespace) -> list[str]:
+        '''
+        Returns the outputs of a converted file that are loaded by the .cql file (see `_make_cql_file`) :
+        the dump for the format 'cypher', and the manifest of the shards for the format 'shards'.
+
+        - dump_fn : the filename of the dump ;
+        - args    : the parsed arguments.
+        '''
+
+        fns = make_output_fns(dump_fn)
+        l = []
+
+        if 'cypher' in args.formats:
+            l.append(fns['cypher'])
+
+        if 'shards' in args.formats:
+            l.append(join(fns['shards'], 'manifest.cql'))
+
+        return l
+
     def _make_cql_file(self, dump_files: list[str], output_file: str, no_confirmation: bool = False, verbose: bool = False):
         '''
-        Creates a .cql file with one `CALL apoc.cypher.runFile(...)` per dump file.
+        Creates a .cql file with the indexes of `sinks.property_indexes` and `sinks.fulltext_indexes` (the latter only if its nodes are in the dumps),
+        and one `CALL apoc.cypher.runFile(...)` per dump file.
+        For the manifests of shards (.cql files), their calls are copied instead.
 
-        - dump_files      : the list of the .cypher filenames;
+        - dump_files      : the list of the .cypher (or manifest .cql) filenames;
         - output_file     : the output .cql file;
         - no_confirmation : do not ask for confirmation before overwriting;
         - verbose         : log actions.
@@ -225,7 +1213,22 @@ class ParserUi:
             return
 
         with open(output_file, 'w') as f:
+            for label, key in property_indexes:
+                f.write(f'CREATE INDEX IF NOT EXISTS FOR (n:{label}) ON (n.{key});\n')
+
+            # The manifests of shards create their own full-text indexes (see `ShardedCypherSink`)
+            dumps = [fn for fn in dump_files if not fn.endswith('.cql')]
+            for name, labels, key in fulltext_indexes:
+                if len(find_labels(dumps, labels)) > 0:
+                    f.write(make_fulltext_index_string(name, labels, key) + ';\n')
+
             for dump_file in dump_files:
+                if dump_file.endswith('.cql'):
+                    with open(dump_file) as manifest:
+                        f.write(manifest.read())
+
+                    continue
+
                 abs_path = abspath(dump_file)
                 f.write(f"CALL apoc.cypher.runFile('{abs_path}', {{usePeriodicCommit: 1000, statistics: false}});\n")
 
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''Reads MEI files from zip and tar archives, and from gzip-compressed files, without extracting them on the disk.'''
+
+##-Imports
+from typing import IO, Iterator
+import gzip
+import tarfile
+import zipfile
+
+##-Init
+mei_extensions = ('.mei', '.mei.gz')
+tar_extensions = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+##-Utils
+def is_archive(fn: str) -> bool:
+    '''
+    Checks if `fn` is a zip or tar archive (from its extension).
+
+    - fn : the filename.
+    '''
+
+    return fn.lower().endswith(('.zip',) + tar_extensions)
+
+def is_mei(fn: str) -> bool:
+    '''
+    Checks if `fn` is a MEI file, compressed or not (from its extension).
+
+    - fn : the filename.
+    '''
+
+    return fn.lower().endswith(mei_extensions)
+
+def open_mei(fn: str) -> IO[bytes]:
+    '''
+    Opens the MEI file `fn` in binary mode, decompressing it on the fly if it ends with '.gz'.
+
+    - fn : the filename.
+    '''
+
+    if fn.lower().endswith('.gz'):
+        return gzip.open(fn, 'rb')
+
+    return open(fn, 'rb')
+
+##-Archives
+def iter_archive(fn: str) -> Iterator[tuple[str, IO[bytes], int]]:
+    '''
+    Iterates over the MEI files (see `mei_extensions`) contained in the archive `fn`.
+
+    Tar archives are read as a stream (members in the order of the archive), so each file object
+    has to be consumed before going to the next one.
+    Compressed members ('.mei.gz') are decompressed on the fly.
+
+    - fn : the archive filename (zip or tar, compressed or not).
+
+    Output: tuples `(name, f, size)`, with `name` the path of the member in the archive, `f` a binary file object,
+            and `size` the size of the member in the archive (compressed, for '.mei.gz' members), in bytes.
+    '''
+
+    if fn.lower().endswith('.zip'):
+        with zipfile.ZipFile(fn) as z:
+            for info in z.infolist():
+                if info.is_dir() or not is_mei(info.filename):
+                    continue
+
+                with z.open(info) as f:
+                    yield info.filename, _decompress_member(info.filename, f), info.file_size
+
+    else:
+        with tarfile.open(fn, 'r|*') as t:
+            for member in t:
+                if not member.isfile() or not is_mei(member.name):
+                    continue
+
+                f = t.extractfile(member)
+                yield member.name, _decompress_member(member.name, f), member.size
+
+def _decompress_member(name: str, f: IO[bytes]) -> IO[bytes]:
+    '''Wraps the archive member `f` in a gzip reader if `name` ends with '.gz'.'''
+
+    if name.lower().endswith('.gz'):
+        return gzip.GzipFile(fileobj=f, mode='rb')
+
+    return f
+
+def make_member_fn(fn: str, member: str) -> str:
+    '''
+    Returns the filename standing for the member `member` of the archive `fn`, used to name its outputs :
+    next to the archive, with the path of the member in the archive joined by '__' (e.g 'a/x.mei' gives 'a__x.mei'),
+    so that members with the same name in different folders get different outputs.
+
+    - fn     : the archive filename ;
+    - member : the path of the member in the archive.
+    '''
+
+    parts = [p for p in member.split('/') if p not in ('', '.', '..')] # Never outside of the folder
+    folder = '/'.join(fn.split('/')[:-1])
+
+    if folder == '':
+        return '__'.join(parts)
+
+    return folder + '/' + '__'.join(parts)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Detection of the near-duplicate scores (variants of the same tune) of a conversion run, with MinHash and LSH.
+
+Each score is described by the set of the n-grams of melodic intervals of its voices (so a transposed copy gives the same set),
+and the similarity of two scores is the Jaccard index of their sets.
+A MinHash signature (`nb_perm` minimums of random hash functions) is computed for each score when it is converted :
+the proportion of equal values in two signatures estimates their similarity.
+
+The signatures are cut in bands, and the scores with an identical band are candidates (LSH) : the pairs of scores are never
+all compared, so the cost is about linear in the number of scores. The candidates whose estimated similarity reaches the threshold
+are grouped in clusters (connected components).
+'''
+
+##-Imports
+import random
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from src.sinks import Sink
+from src.utils import write_file, get_alteration
+
+##-Init
+ngram_size = 4 # Number of intervals in a n-gram (so 5 notes)
+nb_perm = 128 # Number of hash functions of a signature
+nb_bands = 16 # Number of bands of the LSH (`nb_perm` / `nb_bands` values per band)
+max_bucket = 64 # Above this size, the members of a bucket are only compared to its first member
+
+prime = (1 << 32) - 5 # The hash functions are x -> (a*x + b) % prime
+
+##-MinHash
+def get_ngrams(pitches: list[int], n: int = ngram_size) -> set[int]:
+    '''
+    Returns the hashes (in [0, prime[) of the n-grams of intervals of a melody.
+
+    - pitches : the pitches of the notes, in semitones ;
+    - n       : the number of intervals of a n-gram.
+    '''
+
+    intervals = [pitches[k + 1] - pitches[k] for k in range(len(pitches) - 1)]
+
+    return {hash(tuple(intervals[k:k + n])) % prime for k in range(len(intervals) - n + 1)}
+
+def get_hash_functions(nb: int = nb_perm, seed: int = 1) -> tuple[list[int], list[int]]:
+    '''
+    Returns the coefficients `a` and `b` of `nb` hash functions x -> (a*x + b) % prime. The same seed gives the same functions.
+
+    - nb   : the number of functions ;
+    - seed : the seed of the random generator.
+    '''
+
+    r = random.Random(seed)
+    return [r.randrange(1, 1 << 31) for k in range(nb)], [r.randrange(0, prime) for k in range(nb)]
+
+def minhash(ngrams: set[int], hash_functions: tuple[list[int], list[int]]) -> list[int]:
+    '''
+    Returns the MinHash signature of a set of n-grams (with NumPy if it is installed).
+
+    - ngrams         : the hashes of the n-grams (see `get_ngrams`), not empty ;
+    - hash_functions : the coefficients of the hash functions (see `get_hash_functions`).
+    '''
+
+    a, b = hash_functions
+
+    if np != None: # a < 2^31 and x < 2^32, so a*x + b fits in 64 bits
+        x = np.fromiter(ngrams, dtype=np.uint64, count=len(ngrams))
+        h = (np.array(a, dtype=np.uint64)[:, None] * x[None, :] + np.array(b, dtype=np.uint64)[:, None]) % np.uint64(prime)
+        return h.min(axis=1).tolist()
+
+    return [min((ak * x + bk) % prime for x in ngrams) for ak, bk in zip(a, b)]
+
+def similarity(sig1: list[int], sig2: list[int]) -> float:
+    '''Returns the similarity estimated from two signatures (the proportion of equal values).'''
+
+    return sum(1 for x, y in zip(sig1, sig2) if x == y) / len(sig1)
+
+##-Sink
+class MelodySink(Sink):
+    '''
+    Collects the melody of each voice (the highest note of the first Fact of each Event, without the rests and the grace notes),
+    and computes at the end the MinHash signature of the score (see the module docstring).
+
+    After `close`, `score_id` is the cypher id of the Score node, and `signature` its signature (None if the score has no n-gram).
+    The notes are then dropped, so that the sink is small to send back from a process.
+    '''
+
+    name = 'duplicates'
+
+    def __init__(self):
+        '''Initiates the sink.'''
+
+        self.score_id = None
+        self.signature = None
+
+        self.voices = {} # voice_nb -> list of (start, pitch)
+        self.event = None # The data of the last Event received (its Facts come just after it)
+
+    def node(self, cypher_id: str, label: str, data: dict):
+        if label == 'Event':
+            self.event = data
+
+        elif label == 'Fact':
+            if self.event != None and data.get('type_') == 'note' and data.get('grace') == None and data.get('halfTonesFromA4') != None:
+                accid = data.get('accid') if data.get('accid') != None else data.get('accid_ges')
+                pitch = data['halfTonesFromA4'] + get_alteration(data['class_'], accid, data.get('key_fifths'))
+
+                self.voices.setdefault(self.event['voice_nb'], []).append((self.event['start'], pitch))
+
+            self.event = None # Only the first Fact of a chord
+
+        elif label == 'Score':
+            self.score_id = cypher_id
+
+    def link(self, id1: str, id2: str, type_: str, data: dict|None = None):
+        pass
+
+    def close(self):
+        ngrams = set()
+        for notes in self.voices.values():
+            notes.sort(key=lambda n: n[0]) # The Events come measure by measure
+            ngrams |= get_ngrams([p for _, p in notes])
+
+        if len(ngrams) > 0:
+            self.signature = minhash(ngrams, get_hash_functions())
+
+        self.voices = {}
+
+    def abort(self):
+        self.voices = {}
+
+##-LSH
+class DuplicateIndex:
+    '''Gathers the signatures of the scores of a run, and finds the clusters of near-duplicates (see the module docstring).'''
+
+    def __init__(self, threshold: float = .8, bands: int = nb_bands):
+        '''
+        Initiates an empty index.
+
+        - threshold : the minimum estimated similarity of two near-duplicates ;
+        - bands     : the number of bands of the signatures. More bands find more candidates (more pairs compared).
+        '''
+
+        if not 0 < threshold <= 1:
+            raise ValueError(f'DuplicateIndex: the threshold has to be in ]0, 1], but {threshold} was given')
+
+        if nb_perm % bands != 0:
+            raise ValueError(f'DuplicateIndex: the number of bands ({bands}) has to divide the size of the signatures ({nb_perm})')
+
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = nb_perm // bands
+
+        self.names = [] # The file of each score
+        self.score_ids = [] # The cypher id of each Score node
+        self.signatures = []
+        self.buckets = [{} for k in range(bands)] # One dict per band : band values -> list of scores
+        self.nb_skipped = 0 # Number of scores without signature (too short)
+
+    def add(self, name: str, sink: MelodySink):
+        '''
+        Adds a converted score.
+
+        - name : the name of the file ;
+        - sink : its `MelodySink`, closed.
+        '''
+
+        if sink.signature == None:
+            self.nb_skipped += 1
+            return
+
+        k = len(self.signatures)
+        self.names.append(name)
+        self.score_ids.append(sink.score_id)
+        self.signatures.append(sink.signature)
+
+        for band in range(self.bands):
+            key = tuple(sink.signature[band * self.rows:(band + 1) * self.rows])
+            self.buckets[band].setdefault(key, []).append(k)
+
+    def get_clusters(self) -> list[dict]:
+        '''
+        Returns the clusters of near-duplicates (at least 2 scores), largest first :
+        dicts with the keys 'cluster' (an id, from 1), 'files', 'scores' (the cypher ids of the Score nodes) and 'similarity'
+        (the lowest estimated similarity of the pairs that linked the cluster).
+        '''
+
+        parent = list(range(len(self.signatures)))
+
+        def find(k: int) -> int:
+            while parent[k] != k:
+                parent[k] = parent[parent[k]]
+                k = parent[k]
+            return k
+
+        compared = set()
+        links = {} # Root -> lowest similarity of the links
+        for buckets in self.buckets:
+            for members in buckets.values():
+                if len(members) < 2:
+                    continue
+
+                if len(members) <= max_bucket:
+                    pairs = ((members[i], members[j]) for j in range(1, len(members)) for i in range(j))
+                else:
+                    pairs = ((members[0], members[j]) for j in range(1, len(members)))
+
+                for i, j in pairs:
+                    if (i, j) in compared or find(i) == find(j):
+                        continue
+                    compared.add((i, j))
+
+                    s = similarity(self.signatures[i], self.signatures[j])
+                    if s >= self.threshold:
+                        ri, rj = find(i), find(j)
+                        parent[rj] = ri
+                        links[ri] = min(s, links.get(ri, 1), links.pop(rj, 1))
+
+        groups = {}
+        for k in range(len(self.signatures)):
+            groups.setdefault(find(k), []).append(k)
+
+        clusters = sorted((g for g in groups.values() if len(g) > 1), key=lambda g: (-len(g), g[0]))
+
+        return [
+            {
+                'cluster': c + 1,
+                'files': [self.names[k] for k in g],
+                'scores': [self.score_ids[k] for k in g],
+                'similarity': round(links[find(g[0])], 3)
+            }
+            for c, g in enumerate(clusters)
+        ]
+
+##-Tags
+def write_cluster_tags(clusters: list[dict], fn: str, no_confirmation: bool = False, verbose: bool = False) -> bool:
+    '''
+    Writes the Cypher statements setting the property `duplicate_cluster` of the Score nodes of the clusters.
+
+    - clusters        : the clusters (see `DuplicateIndex.get_clusters`) ;
+    - fn              : the output filename ;
+    - no_confirmation : do not ask for confirmation before overwriting ;
+    - verbose         : log actions.
+
+    Output: True if the file was written.
+    '''
+
+    statements = []
+    for c in clusters:
+        for score_id in c['scores']:
+            statements.append(f"MATCH (s:Score {{cypher_id: '{score_id}'}})\nSET s.duplicate_cluster = {c['cluster']};\n")
+
+    return write_file(fn, ''.join(statements), no_confirmation, verbose)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Columnar export of the notes with NumPy, and features computed from them, per voice and per score :
+    - pitch class histogram (12 bins from C, weighted by the duration) ;
+    - melodic interval histogram (25 bins, from -12 to +12 semitones, larger intervals are clipped), between consecutive notes of a voice ;
+    - duration histogram (8 bins, for log2 of the duration rounded, from -7 (1/128) to 0 (whole note)) ;
+    - ambitus (lowest and highest note, in semitones from A4, and their difference).
+
+The histograms are normalised (their sum is 1, or 0 if there is no note).
+The features of a score are stored in a `.npz` file, and `build_corpus_matrix` gathers the vectors of all the scores in one matrix.
+
+NumPy is an optional dependency : it is only needed for this output.
+'''
+
+##-Imports
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from src.sinks import Sink
+from src.utils import get_alteration
+
+##-Init
+nb_intervals = 25 # From -12 to +12 semitones
+min_log_duration = -7
+nb_durations = 1 - min_log_duration # From 2^-7 to 2^0
+
+columns = (
+    [f'pc_{k}' for k in ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')]
+    + [f'interval_{k}' for k in range(-12, 13)]
+    + [f'duration_2^{k}' for k in range(min_log_duration, 1)]
+    + ['ambitus_low', 'ambitus_high', 'ambitus_range']
+) # Names of the columns of a feature vector (see `feature_vector`)
+
+##-Utils
+def _check_numpy():
+    '''Raises a ValueError if NumPy is not installed.'''
+
+    if np == None:
+        raise ValueError('features: NumPy is needed for the features output (pip install numpy)')
+
+def _histogram(values, weights, nb_bins: int, offset: int):
+    '''
+    Returns the normalised histogram of the int `values` (shifted by `offset`, and clipped in [0, nb_bins[).
+
+    - values  : the values (NumPy array of int) ;
+    - weights : the weight of each value (None for 1) ;
+    - nb_bins : the number of bins ;
+    - offset  : added to the values to get the bin.
+    '''
+
+    h = np.bincount(np.clip(values + offset, 0, nb_bins - 1), weights=weights, minlength=nb_bins).astype(np.float64)
+
+    total = h.sum()
+    if total > 0:
+        h /= total
+
+    return h
+
+def feature_vector(pitches, durations, onsets_pitch) -> 'np.ndarray':
+    '''
+    Computes the feature vector (see `columns`) of a voice or of a score.
+
+    - pitches      : the pitch of each note (in semitones from A4, all the notes of the chords) ;
+    - durations    : the duration of each note (1 for a whole note), in the same order ;
+    - onsets_pitch : for each voice, the pitch of the first note of each event (for the melodic intervals, that are not taken between voices).
+    '''
+
+    pitches = np.asarray(pitches, dtype=np.int64)
+    durations = np.asarray(durations, dtype=np.float64)
+
+    pc = _histogram((pitches + 9) % 12, durations, 12, 0) # A4 is 9 semitones above C
+
+    intervals = np.concatenate([np.diff(np.asarray(p, dtype=np.int64)) for p in onsets_pitch] + [np.zeros(0, dtype=np.int64)])
+    iv = _histogram(intervals, None, nb_intervals, 12)
+
+    if len(durations) > 0:
+        log_durations = np.rint(np.log2(durations)).astype(np.int64)
+    else:
+        log_durations = np.zeros(0, dtype=np.int64)
+    du = _histogram(log_durations, None, nb_durations, -min_log_duration)
+
+    if len(pitches) > 0:
+        ambitus = np.array([pitches.min(), pitches.max(), pitches.max() - pitches.min()], dtype=np.float64)
+    else:
+        ambitus = np.zeros(3)
+
+    return np.concatenate([pc, iv, du, ambitus])
+
+##-Sink
+class FeaturesSink(Sink):
+    '''
+    Collects the notes of each voice in columns (arrays), and at the end computes the features (see the module docstring),
+    and writes them in a `.npz` file with the columns :
+        - `voices`                                 : the cypher ids of the voices ;
+        - `columns`                                : the names of the features ;
+        - `voice_features`                         : a matrix with the feature vector of each voice ;
+        - `score_features`                         : the feature vector of the score ;
+        - `note_voice`, `note_pitch`, `note_onset`, `note_duration` : one value per note (all the notes of the chords, without the rests),
+          with the voice number, the pitch in semitones from A4 (with the accidentals), the start and the duration (1 for a whole note).
+    '''
+
+    name = 'features'
+
+    def __init__(self, fn: str):
+        '''
+        Initiates the sink.
+
+        - fn : the filename of the `.npz` file.
+        '''
+
+        _check_numpy()
+
+        self.fn = fn
+
+        self.voices = [] # The cypher ids of the voices (received at the end of the score)
+
+        self.note_voice = array('i')
+        self.note_pitch = array('i')
+        self.note_onset = array('d')
+        self.note_duration = array('d')
+        self.note_first = array('b') # 1 if the note is the first of its event (used for the melodic intervals)
+
+        self.event = None # The data of the last Event received (its Facts come just after it)
+        self.first_fact = False
+
+    def node(self, cypher_id: str, label: str, data: dict):
+        if label == 'Event':
+            self.event = data
+            self.first_fact = True
+
+        elif label == 'Fact':
+            if data.get('type_') == 'note' and data.get('halfTonesFromA4') != None and self.event != None:
+                accid = data.get('accid') if data.get('accid') != None else data.get('accid_ges')
+
+                self.note_voice.append(self.event['voice_nb'])
+                self.note_pitch.append(data['halfTonesFromA4'] + get_alteration(data['class_'], accid, data.get('key_fifths')))
+                self.note_onset.append(self.event['start'])
+                self.note_duration.append(data['duration'])
+                self.note_first.append(1 if self.first_fact else 0)
+
+            self.first_fact = False
+
+        elif label == 'Voice':
+            self.voices.append(cypher_id)
+
+    def link(self, id1: str, id2: str, type_: str, data: dict|None = None):
+        pass
+
+    def close(self):
+        voice = np.frombuffer(self.note_voice, dtype=np.int32)
+        pitch = np.frombuffer(self.note_pitch, dtype=np.int32)
+        onset = np.frombuffer(self.note_onset, dtype=np.float64)
+        duration = np.frombuffer(self.note_duration, dtype=np.float64)
+        first = np.frombuffer(self.note_first, dtype=np.int8).astype(bool)
+
+        # The notes of each voice (the voice numbers start at 1)
+        masks = [voice == k + 1 for k in range(len(self.voices))]
+        melodies = [pitch[m & first] for m in masks]
+
+        voice_features = np.array([feature_vector(pitch[m], duration[m], [melodies[k]]) for k, m in enumerate(masks)]).reshape(len(masks), len(columns))
+        score_features = feature_vector(pitch, duration, melodies)
+
+        np.savez_compressed(
+            self.fn,
+            voices=np.array(self.voices),
+            columns=np.array(columns),
+            voice_features=voice_features,
+            score_features=score_features,
+            note_voice=voice,
+            note_pitch=pitch,
+            note_onset=onset,
+            note_duration=duration
+        )
+
+    def abort(self):
+        pass
+
+##-Corpus
+def build_corpus_matrix(fns: list[str], out_fn: str, names: list[str]|None = None):
+    '''
+    Gathers the feature vectors of the scores (`score_features` of the `.npz` files written by `FeaturesSink`) in one matrix,
+    written in the `.npz` file `out_fn`, with the columns `files`, `columns` and `matrix` (one row per score).
+
+    - fns    : the `.npz` files of the scores ;
+    - out_fn : the output filename ;
+    - names  : the name of each score (default: `fns`).
+    '''
+
+    _check_numpy()
+
+    matrix = np.zeros((len(fns), len(columns)))
+    for k, fn in enumerate(fns):
+        with np.load(fn) as data:
+            matrix[k] = data['score_features']
+
+    np.savez_compressed(out_fn, files=np.array(fns if names == None else names), columns=np.array(columns), matrix=matrix)
@@ -12,16 +12,19 @@
 '''Represent the Event nodes in the graph'''
 
 ##-Imports
+from fractions import Fraction
+from typing import Iterable
+
 from src.graph.Fact import Fact
-from src.graph.utils_graph import make_create_string, make_create_link_string
+from src.sinks import CypherSink
 
-from src.utils import calculate_note_interval, log
+from src.utils import calculate_note_interval, log, get_alteration, get_prime_form
 
 ##-Main
 class Event:
     '''Represent an `Event` node'''
 
-    def __init__(self, source: str, id_: str, type_: str, duration: int, dots: int, pos: float, start: float, end: float, facts: list[Fact] = [], voice_nb: int = 1, instrument: str|None = None):
+    def __init__(self, source: str, id_: str, type_: str, duration: int, dots: int, pos: float, start: float|Fraction, end: float|Fraction|None, facts: list[Fact] = [], voice_nb: int = 1, instrument: str|None = None):
         '''
         Initate Event.
 
@@ -31,8 +34,8 @@ class Event:
         - duration   : the duration of the note (1 for whole, 2 for half, 4 for fourth, ...) ;
         - dots       : the number of dots on the note ;
         - pos        : ? seems to correspond to `start` ; TODO
-        - start      : the start time of the event (1 correspond to a whole, 0.5 to a half note, ...) ;
-        - end        : same but for the end of the event ;
+        - start      : the start time of the event (1 correspond to a whole, 0.5 to a half note, ...). A `Fraction` gives the exact time (see `set_time`) ;
+        - end        : same but for the end of the event (None for the last event of a voice) ;
         - facts      : the list of facts (notes) ;
         - voice_nb   : the number of the voice in which the event takes place (starts from 1, not from 0) ;
         - instrument : the instrument.
@@ -44,8 +47,7 @@ class Event:
         self.dur = duration # self.dur is 1, 2, 4, ... and self.duration will 1, .5, .25, ... (latter calculated later in _calculate_other_values).
         self.dots = dots
         self.pos = pos
-        self.start = start
-        self.end = end
+        self.set_time(start, end)
         self.facts = facts
         self.instrument = instrument
         self.voice_nb = voice_nb
@@ -81,6 +83,45 @@ class Event:
         if type(self.dots) != int or self.dots < 0:
             raise ValueError(f'Fact: `dots` should be a positive int, but "{self.dots}" found !')
 
+    def set_time(self, start: float|Fraction, end: float|Fraction|None):
+        '''
+        Sets the start and the end of the event : `start_q` and `end_q` keep the exact values (`Fraction`s, not exported),
+        and `start` and `end` are their values as floats.
+
+        - start : the start time (1 for a whole) ;
+        - end   : the end time, None for the last event of a voice.
+        '''
+
+        self.start_q = Fraction(start)
+        self.end_q = None if end == None else Fraction(end)
+
+        self.start = float(self.start_q)
+        self.end = None if end == None else float(self.end_q)
+
+    def set_ticks(self, ticks_per_whole: int) -> bool:
+        '''
+        Sets `startTick` and `endTick`, the start and the end as integers on the grid of the score (`ticks_per_whole` ticks for a whole).
+
+        - ticks_per_whole : the number of ticks in a whole.
+
+        Output: False if the event is not on the grid (then the ticks are not set), True otherwise.
+        '''
+
+        ticks = [None if t == None else t * ticks_per_whole for t in (self.start_q, self.end_q)]
+        if any(t != None and t.denominator != 1 for t in ticks):
+            return False
+
+        self.startTick = ticks[0].numerator
+        if ticks[1] != None:
+            self.endTick = ticks[1].numerator
+
+        return True
+
+    def is_grace(self) -> bool:
+        '''Checks if this Event is made only of grace notes.'''
+
+        return len(self.facts) > 0 and all(f.grace != None for f in self.facts)
+
     def add_fact(self, f: Fact):
         '''
         Adds a fact to the fact list.
@@ -91,49 +132,115 @@ class Event:
         self.facts.append(f)
 
     def to_cypher(self, parent_cypher_id: str, previous_Event=None) -> str:
+        '''Returns the CREATE cypher clauses that creates the Event node, its Facts and links (see `to_sink`).'''
+
+        sink = CypherSink()
+        self.to_sink(sink, parent_cypher_id, previous_Event)
+        return sink.getvalue()
+
+    def to_sink(self, sink, parent_cypher_id: str, previous_Event=None):
         '''
-        Returns the CREATE cypher clauses, that creates the Event node, the child Fact nodes,
+        Writes to `sink` (see `sinks.Sink`) the Event node, the child Fact nodes,
         the links to those Fact nodes and the link from the previous Event (if it exists).
 
         Input:
+            - sink             : the sink ;
             - parent_cypher_id : the cypher id of the parent (a `Measure`) ;
             - previous_Event   : the previous Event. If this is the first Event, pass None instead (it is Voice that will link here, and it will be done in Voice).
 
         Order of creation :
             - Event ;
             - Link from parent (Measure) to this Event (:HAS) ;
-            - Facts (see `Facts.to_cypher` for more details) ;
+            - Facts (see `Facts.to_sink` for more details) ;
             - Link from previous Event (:NEXT).
         '''
 
         # Create the Event node
-        c = make_create_string(self.cypher_id, 'Event', self.__dict__)
+        sink.node(self.cypher_id, 'Event', self.__dict__)
 
         # Create the link from parent (Measure) to this node (Event)
-        c += '\n' + make_create_link_string(parent_cypher_id, self.cypher_id, 'HAS')
+        sink.link(parent_cypher_id, self.cypher_id, 'HAS')
 
         # Create the facts
         for f in self.facts:
-            c += '\n' + f.to_cypher(self.cypher_id)
+            f.to_sink(sink, self.cypher_id)
 
         # Create link to previous Event
         if previous_Event != None:
-            data = {'duration': previous_Event.duration}
+            self.next_link_to_sink(sink, previous_Event)
 
-            # Calculate interval
-            if len(previous_Event.facts) > 0 and len(self.facts) > 0:
-                f1 = previous_Event.facts[0]
-                f2 = self.facts[0]
+    def next_link_to_sink(self, sink, previous_Event, extra_data: dict|None = None, type_: str = 'NEXT'):
+        '''
+        Writes to `sink` the :NEXT link from `previous_Event` to this Event.
+        The link holds the duration of `previous_Event`, and if possible the interval and the duration ratio between the two events.
 
-                if f1.type_ == 'note' and f2.type_ == 'note':
-                    interval = calculate_note_interval(f1.class_, f1.octave, f2.class_, f2.octave) / 2
-                    data['interval'] = interval
+        - sink           : the sink ;
+        - previous_Event : the Event that comes before this one ;
+        - extra_data     : other data to add on the link ;
+        - type_          : the type of the link (e.g 'PERF_NEXT' for the performance order, see `TopRhythmic.performance_to_sink`).
+        '''
 
-                if f2.duration != 0:
-                    data['duration_ratio'] = f2.duration / f1.duration
-                elif self.verbose:
-                    log('warn', f'Event.to_cypher: f2.duration is zero for event {self.id}, cannot compute duration_ratio.')
+        data = {'duration': previous_Event.duration}
 
-            c += '\n' + make_create_link_string(previous_Event.cypher_id, self.cypher_id, 'NEXT', data)
-    
-        return c
+        # Calculate interval
+        if len(previous_Event.facts) > 0 and len(self.facts) > 0:
+            f1 = previous_Event.facts[0]
+            f2 = self.facts[0]
+
+            if f1.type_ == 'note' and f2.type_ == 'note':
+                interval = calculate_note_interval(f1.class_, f1.octave, f2.class_, f2.octave) / 2
+                data['interval'] = interval
+
+            if f2.duration != 0:
+                data['duration_ratio'] = f2.duration / f1.duration
+            elif self.verbose:
+                log('warn', f'Event.to_cypher: f2.duration is zero for event {self.id}, cannot compute duration_ratio.')
+
+        if extra_data != None:
+            data.update(extra_data)
+
+        sink.link(previous_Event.cypher_id, self.cypher_id, type_, data)
+
+##-Chords
+def set_chords(events: Iterable[Event]):
+    '''
+    Sets the descriptors of the notes of each event of `events` (the chord, or the single note), for the events that have notes :
+        - pcMask    : the pitch class set, as a 12-bit mask (bit k is set if the pitch class k is played, with 0 for C) ;
+        - primeForm : the prime form of this set (see `utils.get_prime_form`), the same for all the transpositions and inversions of a chord ;
+        - bassPitch : the lowest note, in semitones from A4 (with its accidental, unlike `Fact.halfTonesFromA4`) ;
+        - nbNotes   : the number of notes.
+
+    Called in one pass over the events when they are exported (see `Score.to_sink`, and `MeiToGraph._write_measure` when streaming),
+    so the parsing, the graph cache and the workers of the parallel parsing do not compute them.
+
+    - events : the events.
+    '''
+
+    alterations = {} # (class, accidental, key) -> alteration, the same for most of the notes of a score
+
+    for e in events:
+        mask = 0
+        bass = None
+        nb = 0
+
+        for f in e.facts:
+            if f.type_ != 'note' or f.class_ == None:
+                continue
+
+            key = (f.class_, f.accid if f.accid != None else f.accid_ges, f.key_fifths)
+            alteration = alterations.get(key)
+            if alteration == None:
+                alteration = alterations[key] = get_alteration(*key)
+
+            pitch = f.halfTonesFromA4 + alteration
+            mask |= 1 << ((pitch + 9) % 12) # A is the pitch class 9
+            nb += 1
+
+            if bass == None or pitch < bass:
+                bass = pitch
+
+        if nb > 0:
+            e.pcMask = mask
+            e.primeForm = get_prime_form(mask)
+            e.bassPitch = bass
+            e.nbNotes = nb
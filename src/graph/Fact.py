@@ -12,14 +12,14 @@
 '''Represent the Fact nodes in the graph (notes)'''
 
 ##-Import
-from src.graph.utils_graph import make_create_string, make_create_link_string
-from src.utils import calculate_note_interval, get_frequency
+from src.sinks import CypherSink
+from src.utils import calculate_note_interval, get_frequency, get_scale_degree, mode_offsets
 
 ##-Main
 class Fact:
     '''Represent a `Fact` node (note)'''
 
-    def __init__(self, source: str, id_: str, type_: str, class_: str|None, octave: int|None, duration: int, dots: int = 0, accid: str|None = None, accid_ges: str|None = None, syllable: str|None = None, grace: str|None = None, instrument: str|None = None):
+    def __init__(self, source: str, id_: str, type_: str, class_: str|None, octave: int|None, duration: int, dots: int = 0, accid: str|None = None, accid_ges: str|None = None, syllable: str|None = None, grace: str|None = None, instrument: str|None = None, key_fifths: int|None = None, key_mode: str|None = None, wordpos: str|None = None, con: str|None = None):
         '''
         Initate Fact.
 
@@ -34,7 +34,11 @@ class Fact:
         - accid_ges  : same as above, but represent an accidental on the staff, not on the note ;
         - syllable   : the potential syllable pronounced on this note (None if none) ;
         - grace      : if not None, indicate that the note is a grace note, and give its type (often 'acc') ;
-        - instrument : the instrument.
+        - instrument : the instrument ;
+        - key_fifths : the key signature active on the note (see `utils.parse_key_signature`), None if unknown ;
+        - key_mode   : the mode of the key ('major', 'minor', ..., see `utils.mode_offsets`) ;
+        - wordpos    : the position of the syllable in its word ('i' initial, 'm' medial, 't' terminal, 's' single), None if unknown ;
+        - con        : the connector after the syllable ('d' dash, 's' space, 'u' underscore, ...), None if unknown.
         '''
 
         self.source = source
@@ -49,6 +53,10 @@ class Fact:
         self.syllable = syllable
         self.grace = grace
         self.instrument = instrument
+        self.key_fifths = key_fifths
+        self.key_mode = key_mode
+        self.wordpos = wordpos
+        self.con = con
 
         self._check();
         self._calculate_other_values();
@@ -73,6 +81,10 @@ class Fact:
             self.frequency = get_frequency(self.class_, self.octave)
             self.halfTonesFromA4 = calculate_note_interval('a', 4, self.class_, self.octave) # But is this useful ?
 
+            if self.key_fifths != None:
+                accid = self.accid if self.accid != None else self.accid_ges
+                self.scaleDegree, self.diatonicNumber, self.keyPitchClass = get_scale_degree(self.class_, self.octave, accid, self.key_fifths, self.key_mode)
+
     def _check(self):
         '''
         Ensures that the given attributes make sense.
@@ -103,14 +115,21 @@ class Fact:
         if self.accid_ges not in (None, 's', 'f', 'n'):
             raise ValueError(f'Fact: `accid_ges` attribute has to be in (None, "s", "f"), but "{self.accid_ges}" was found !')
 
+        if self.key_fifths != None and self.key_mode not in mode_offsets:
+            raise ValueError(f'Fact: `key_mode` attribute has to be in ({", ".join(mode_offsets)}), but "{self.key_mode}" was found !')
+
     def to_cypher(self, parent_cypher_id: str) -> str:
-        '''Returns the CREATE cypher clause that creates the Fact node and the link from its Event parent.'''
+        '''Returns the CREATE cypher clause that creates the Fact node and the link from its Event parent (see `to_sink`).'''
+
+        sink = CypherSink()
+        self.to_sink(sink, parent_cypher_id)
+        return sink.getvalue()
+
+    def to_sink(self, sink, parent_cypher_id: str):
+        '''Writes the Fact node and the link from its Event parent to `sink` (see `sinks.Sink`).'''
     
         # Create Fact node
-        c = make_create_string(self.cypher_id, 'Fact', self.__dict__)
+        sink.node(self.cypher_id, 'Fact', self.__dict__)
 
         # Create link from parent (Event)
-        c += '\n' + make_create_link_string(parent_cypher_id, self.cypher_id, 'IS')
-
-        return c
-
+        sink.link(parent_cypher_id, self.cypher_id, 'IS')
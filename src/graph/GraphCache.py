@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Compact binary serialisation of the parsed graph (`Score`, `TopRhythmic` and their children).
+
+It is used as a cache : once a MEI file is parsed, its graph can be saved and loaded again much faster than parsing the MEI,
+to produce other outputs from the same corpus.
+The body alone (see `encode_graph` and `decode_graph`) is also what the workers of the parallel parsing send back (see `MeiToGraph._parse_parallel`).
+
+Format (all the numbers are little-endian) :
+    - header : `magic` (6 bytes), then the version (uint16) ;
+    - body, compressed with zlib : a sequence of arrays, each one written as its length (uint32) followed by its items.
+      The strings are interned in a table (first array of the body), and referenced by their index (-1 for None).
+      The events and facts are stored in columns (one array per attribute), voice after voice.
+      The times of the events are stored as their ticks (see `Score.set_ticks`, -1 for None), from which the exact fractions are rebuilt.
+      The values computed from the attributes (e.g `Fact.frequency`) are stored too (NaN or the minimum of the type when they are not set),
+      so that the events and facts are rebuilt without their constructors, by filling their `__dict__`.
+
+The version has to be incremented each time the format changes : files with another version can not be loaded.
+'''
+
+##-Imports
+from array import array
+from fractions import Fraction
+import struct
+import sys
+import zlib
+
+from src.graph.Score import Score
+from src.graph.TopRhythmic import TopRhythmic
+from src.graph.Voice import Voice
+from src.graph.Measure import Measure
+from src.graph.Event import Event
+from src.graph.Fact import Fact
+
+##-Init
+magic = b'SKGRPH'
+version = 6
+cache_extension = '_graph.skg'
+
+types = ('note', 'rest', 'END') # Type codes of the events and facts
+
+nan = float('nan')
+no_short = -32768 # Stored for the missing small ints (type code 'h')
+
+##-Utils
+def is_graph_cache(fn) -> bool:
+    '''
+    Checks if `fn` is the filename of a graph cache (from its extension).
+
+    - fn : the filename (or anything else, e.g a file object, which is not a cache filename).
+    '''
+
+    return type(fn) == str and fn.endswith(cache_extension)
+
+class _Writer:
+    '''Builds the body of the file : arrays of numbers and interned strings.'''
+
+    def __init__(self):
+        '''Initiates the writer.'''
+
+        self.strings = {} # string -> index
+        self.chunks = []
+
+    def intern(self, s: str|None) -> int:
+        '''Returns the index of the string `s` in the table (-1 for None).'''
+
+        if s == None:
+            return -1
+
+        if s not in self.strings:
+            self.strings[s] = len(self.strings)
+
+        return self.strings[s]
+
+    def write(self, typecode: str, values):
+        '''
+        Writes an array of numbers.
+
+        - typecode : the `array` type code ('i', 'b', 'd', ...) ;
+        - values   : the numbers.
+        '''
+
+        a = array(typecode, values)
+        if sys.byteorder == 'big':
+            a.byteswap()
+
+        self.chunks.append(struct.pack('<I', len(a)))
+        self.chunks.append(a.tobytes())
+
+    def to_bytes(self) -> bytes:
+        '''Returns the body : the string table followed by all the arrays written.'''
+
+        encoded = [s.encode('utf-8') for s in self.strings] # Dicts keep the insertion order, so the index of s is its position
+
+        table = _Writer()
+        table.write('I', (len(s) for s in encoded))
+        table.chunks.append(b''.join(encoded))
+
+        return b''.join(table.chunks + self.chunks)
+
+class _Reader:
+    '''Reads the body written by `_Writer`.'''
+
+    def __init__(self, body: bytes):
+        '''
+        Initiates the reader, and reads the string table.
+
+        - body : the uncompressed body.
+        '''
+
+        self.body = body
+        self.pos = 0
+
+        lengths = self.read('I')
+        self.strings = []
+        for l in lengths:
+            self.strings.append(body[self.pos:self.pos + l].decode('utf-8'))
+            self.pos += l
+
+    def read(self, typecode: str) -> array:
+        '''Reads the next array of numbers, with type `typecode`.'''
+
+        n, = struct.unpack_from('<I', self.body, self.pos)
+        self.pos += 4
+
+        a = array(typecode)
+        size = n * a.itemsize
+        a.frombytes(self.body[self.pos:self.pos + size])
+        self.pos += size
+
+        if sys.byteorder == 'big':
+            a.byteswap()
+
+        return a
+
+    def string(self, k: int) -> str|None:
+        '''Returns the string of index `k` (None for -1).'''
+
+        if k == -1:
+            return None
+
+        return self.strings[k]
+
+##-Save
+def encode_graph(score: Score, top_rhythmic: TopRhythmic) -> bytes:
+    '''
+    Returns the body of the format (uncompressed) for the graph.
+    The ticks of the events have to be set (see `Score.set_ticks`).
+
+    - score        : the `Score` ;
+    - top_rhythmic : the `TopRhythmic` of the score.
+    '''
+
+    w = _Writer()
+    s = w.intern
+
+    #---Score
+    w.write('i', (s(score.source), s(score.id_), s(score.composer), s(score.collection)))
+    w.write('i', (s(v.id_) for v in score.voices))
+    w.write('i', (score.ticksPerWhole,))
+
+    #---Measures
+    measures = top_rhythmic.measures
+
+    w.write('i', (s(m.id_) for m in measures))
+    w.write('i', (m.number for m in measures))
+    for attr in ('repeat_sign', 'left', 'right', 'ending'):
+        w.write('i', (s(m.__dict__.get(attr)) for m in measures))
+
+    # The measure of each event
+    event_measure = {}
+    for k, m in enumerate(measures):
+        for events_of_voice in m.events:
+            for e in events_of_voice:
+                event_measure[id(e)] = k
+
+    #---Events and facts, voice after voice
+    for v in score.voices:
+        events = v.events
+        facts = [f for e in events for f in e.facts]
+
+        w.write('i', (s(e.id_) for e in events))
+        w.write('b', (types.index(e.type_) for e in events))
+        w.write('i', (e.dur for e in events))
+        w.write('b', (e.dots for e in events))
+        w.write('q', (e.startTick for e in events))
+        w.write('q', (e.__dict__.get('endTick', -1) for e in events))
+        w.write('d', (e.__dict__.get('duration', nan) for e in events))
+        w.write('i', (event_measure[id(e)] for e in events))
+        w.write('i', (len(e.facts) for e in events))
+
+        w.write('i', (s(f.id_) for f in facts))
+        w.write('b', (types.index(f.type_) for f in facts))
+        w.write('i', (s(f.class_) for f in facts))
+        w.write('b', (-1 if f.octave == None else f.octave for f in facts))
+        w.write('i', (f.dur for f in facts))
+        w.write('b', (f.dots for f in facts))
+        for attr in ('accid', 'accid_ges', 'syllable', 'grace', 'wordpos', 'con'):
+            w.write('i', (s(getattr(f, attr)) for f in facts))
+        w.write('b', (-128 if f.key_fifths == None else f.key_fifths for f in facts))
+        w.write('i', (s(f.key_mode) for f in facts))
+
+        # Computed values (see `Fact._calculate_other_values`)
+        w.write('i', (s(f.__dict__.get('name')) for f in facts))
+        w.write('d', (f.__dict__.get('duration', nan) for f in facts))
+        w.write('d', (f.__dict__.get('frequency', nan) for f in facts))
+        for attr in ('halfTonesFromA4', 'scaleDegree', 'diatonicNumber', 'keyPitchClass'):
+            w.write('h', (f.__dict__.get(attr, no_short) for f in facts))
+
+    return w.to_bytes()
+
+def save_graph(fn: str, score: Score, top_rhythmic: TopRhythmic):
+    '''
+    Writes the graph in the file `fn`.
+
+    - fn           : the output filename ;
+    - score        : the `Score` ;
+    - top_rhythmic : the `TopRhythmic` of the score.
+    '''
+
+    with open(fn, 'wb') as f:
+        f.write(magic + struct.pack('<H', version))
+        f.write(zlib.compress(encode_graph(score, top_rhythmic), 1))
+
+##-Load
+def load_graph(fn: str) -> tuple[Score, TopRhythmic]:
+    '''
+    Reads the graph written by `save_graph` in the file `fn`, with the ticks of the events set (see `Score.set_ticks`).
+    Raise a ValueError if the file is not a graph cache, or if its version is not the current one.
+
+    - fn : the filename.
+    '''
+
+    with open(fn, 'rb') as f:
+        data = f.read()
+
+    if data[:len(magic)] != magic:
+        raise ValueError(f'GraphCache: load_graph: "{fn}" is not a graph cache')
+
+    file_version, = struct.unpack_from('<H', data, len(magic))
+    if file_version != version:
+        raise ValueError(f'GraphCache: load_graph: "{fn}" has version {file_version}, but version {version} is expected. Please regenerate it from the MEI file')
+
+    return decode_graph(zlib.decompress(data[len(magic) + 2:]))
+
+def decode_graph(body: bytes, with_ticks: bool = True) -> tuple[Score, TopRhythmic]:
+    '''
+    Rebuilds the graph from the body written by `encode_graph`.
+
+    - body       : the uncompressed body ;
+    - with_ticks : if False, the ticks of the events are not set (e.g when their times are changed after, see `MeiToGraph._stitch_measure`).
+    '''
+
+    r = _Reader(body)
+    s = r.string
+
+    #---Score
+    source, id_, composer, collection = (s(k) for k in r.read('i'))
+    voice_ids = r.read('i')
+    ticks_per_whole, = r.read('i')
+
+    top_rhythmic = TopRhythmic(source, composer, collection, measures=[])
+    score = Score(source, id_, composer, collection, voices=[])
+    score.ticksPerWhole = ticks_per_whole
+
+    old_voice_n = Voice.n
+    Voice.n = 1
+    for k in voice_ids:
+        score.add_voice(Voice(source, s(k)))
+    Voice.n = old_voice_n
+
+    #---Measures
+    measure_ids = r.read('i')
+    numbers = r.read('i')
+    repeat_signs, lefts, rights, endings = r.read('i'), r.read('i'), r.read('i'), r.read('i')
+
+    measures = []
+    old_measure_n = Measure.n
+    for k in range(len(measure_ids)):
+        m = Measure(source, s(measure_ids[k]), events=[], repeat_sign=s(repeat_signs[k]), left=s(lefts[k]), right=s(rights[k]), ending=s(endings[k]))
+        m.number = numbers[k] # The counter `Measure.n` is not used, the number is read from the file
+
+        measures.append(m)
+        top_rhythmic.add_measure(m)
+    Measure.n = old_measure_n
+
+    #---Events and facts
+    inputfile = source.replace('.', '_').replace('-', '_').replace('/', '_') # As in `Event._calculate_other_values`
+    times = {} # tick -> (exact time, time as a float), the end of an event being the start of the next one
+
+    def get_time(tick: int) -> tuple[Fraction, float]:
+        t = times.get(tick)
+        if t == None:
+            q = Fraction(tick, ticks_per_whole)
+            t = times[tick] = (q, float(q))
+
+        return t
+
+    for voice_index, v in enumerate(score.voices):
+        voice_nb = voice_index + 1
+
+        ids, ev_types, durs, dots, start_ticks, end_ticks, durations, measure_indexes, nb_facts = (r.read(t) for t in 'ibibqqdii')
+        f_ids, f_types, f_classes, f_octaves, f_durs, f_dots, f_accids, f_accids_ges, f_syllables, f_graces, f_wordpos, f_cons, f_key_fifths, f_key_modes = (r.read(t) for t in 'ibibibiiiiiibi')
+        f_names, f_durations, f_frequencies, f_half_tones, f_degrees, f_diatonic_numbers, f_key_pcs = (r.read(t) for t in 'iddhhhh')
+
+        j = 0 # Index of the current fact
+        for k in range(len(ids)):
+            facts = []
+            for _ in range(nb_facts[k]):
+                id_ = s(f_ids[j])
+                f = Fact.__new__(Fact)
+                f.__dict__ = d = {
+                    'source': source, 'id_': id_, 'type_': types[f_types[j]], 'class_': s(f_classes[j]),
+                    'octave': None if f_octaves[j] == -1 else f_octaves[j], 'dur': f_durs[j], 'dots': f_dots[j],
+                    'accid': s(f_accids[j]), 'accid_ges': s(f_accids_ges[j]), 'syllable': s(f_syllables[j]), 'grace': s(f_graces[j]),
+                    'instrument': None, 'key_fifths': None if f_key_fifths[j] == -128 else f_key_fifths[j], 'key_mode': s(f_key_modes[j]),
+                    'wordpos': s(f_wordpos[j]), 'con': s(f_cons[j]), 'inputfile': inputfile, 'cypher_id': id_ + '_' + inputfile
+                }
+
+                # The computed values, in the order of `Fact._calculate_other_values`
+                if f_names[j] != -1:
+                    d['name'] = s(f_names[j])
+                if f_durations[j] == f_durations[j]: # Not NaN
+                    d['duration'] = f_durations[j]
+                if f_half_tones[j] != no_short:
+                    d['frequency'] = f_frequencies[j]
+                    d['halfTonesFromA4'] = f_half_tones[j]
+                if f_degrees[j] != no_short:
+                    d['scaleDegree'] = f_degrees[j]
+                    d['diatonicNumber'] = f_diatonic_numbers[j]
+                    d['keyPitchClass'] = f_key_pcs[j]
+
+                facts.append(f)
+                j += 1
+
+            id_ = s(ids[k])
+            start, start_float = get_time(start_ticks[k])
+            end, end_float = (None, None) if end_ticks[k] == -1 else get_time(end_ticks[k])
+
+            e = Event.__new__(Event)
+            e.__dict__ = d = {
+                'source': source, 'id_': id_, 'type_': types[ev_types[k]], 'dur': durs[k], 'dots': dots[k], 'pos': start_float,
+                'start_q': start, 'end_q': end, 'start': start_float, 'end': end_float,
+                'facts': facts, 'instrument': None, 'voice_nb': voice_nb, 'inputfile': inputfile, 'cypher_id': id_ + '_' + inputfile
+            }
+
+            if durations[k] == durations[k]: # Not NaN
+                d['duration'] = durations[k]
+            if with_ticks:
+                d['startTick'] = start_ticks[k]
+                if end != None:
+                    d['endTick'] = end_ticks[k]
+
+            measures[measure_indexes[k]].add_event(e, voice_nb)
+
+            if not v.is_first_event_set():
+                v.set_event(e)
+            v.add_event(e)
+
+    return score, top_rhythmic
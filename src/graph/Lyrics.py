@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''Represent the lyrics of a voice in the graph (Line and Word nodes)'''
+
+##-Imports
+from src.graph.Event import Event
+from src.sinks import CypherSink
+
+##-Init
+line_end = '.,;:!?' # A word ending with one of these characters ends its line
+
+##-Main
+class Lyrics:
+    '''
+    Assembles the syllables of a voice (see `Fact.syllable`) in words and lines, event after event.
+
+    A syllable continues the current word if its `wordpos` is 'm' or 't', or if it has no `wordpos` and the previous syllable
+    announced a continuation (`con` 'd', or `wordpos` 'i' or 'm'). Otherwise it starts a new word.
+    A line ends after a word ending with a punctuation mark (see `line_end`), or at a rest.
+    '''
+
+    def __init__(self, source: str, voice_nb: int):
+        '''
+        Initate Lyrics.
+
+        - source   : the name of the source file ;
+        - voice_nb : the number of the voice.
+        '''
+
+        self.source = source
+        self.voice_nb = voice_nb
+        self.inputfile = self.source.replace('.', '_').replace('-', '_').replace('/', '_')
+
+        self.lines = [] # The finished lines : lists of words (text, first Event)
+        self.words = [] # The words of the current line
+        self.open = False # True if the last syllable announced that the word continues
+
+    def add_event(self, e: Event):
+        '''
+        Adds the syllable of the next event of the voice (the first one of its facts), if it has one.
+
+        - e : the `Event`.
+        '''
+
+        if e.type_ != 'note':
+            self.end_line()
+            return
+
+        f = next((f for f in e.facts if f.syllable != None), None)
+        if f == None:
+            return
+
+        text = f.syllable.replace('\u00ad', '').strip() # Without the soft hyphens
+        if text == '':
+            return
+
+        if len(self.words) > 0 and (f.wordpos in ('m', 't') or (f.wordpos == None and self.open)):
+            word, first_event = self.words[-1]
+            self.words[-1] = (word + text, first_event)
+        else:
+            self.words.append((text, e))
+
+        self.open = f.con == 'd' or f.wordpos in ('i', 'm')
+
+        if not self.open and text[-1] in line_end:
+            self.end_line()
+
+    def end_line(self):
+        '''Ends the current line, if it has words.'''
+
+        if len(self.words) > 0:
+            self.lines.append(self.words)
+
+        self.words = []
+        self.open = False
+
+    def to_cypher(self, voice_cypher_id: str) -> str:
+        '''Returns the CREATE cypher clauses that creates the Line and Word nodes and their links (see `to_sink`).'''
+
+        sink = CypherSink()
+        self.to_sink(sink, voice_cypher_id)
+        return sink.getvalue()
+
+    def to_sink(self, sink, voice_cypher_id: str):
+        '''
+        Writes to `sink` (see `sinks.Sink`) the lines and their words. The events have to be written before.
+
+        Input:
+            - sink            : the sink ;
+            - voice_cypher_id : the cypher id of the `Voice`.
+
+        Order of creation, for each line :
+            - Line, with its `text` (the words separated by spaces), its number `line` (from 1), `nbWords` and `start` ;
+            - Link from the voice to the line (:LYRICS) ;
+            - Link from the line to the event of its first syllable (:STARTS_AT) ;
+            - For each word : Word, with its `text`, its number `word` (from 1, in the voice), `line`, `offset`
+              (the position of the word in the text of the line) and `start`, the link from the line (:HAS_WORD),
+              and the link to the event of its first syllable (:STARTS_AT).
+        '''
+
+        self.end_line()
+
+        nb_words = 0
+        for k, words in enumerate(self.lines):
+            line_id = f'line_{self.voice_nb}_{k + 1}_{self.inputfile}'
+
+            line = {
+                'source': self.source,
+                'inputfile': self.inputfile,
+                'cypher_id': line_id,
+                'voice_nb': self.voice_nb,
+                'line': k + 1,
+                'text': ' '.join(text for text, _ in words),
+                'nbWords': len(words),
+                'start': words[0][1].start
+            }
+            sink.node(line_id, 'Line', line)
+            sink.link(voice_cypher_id, line_id, 'LYRICS')
+            sink.link(line_id, words[0][1].cypher_id, 'STARTS_AT')
+
+            offset = 0
+            for text, e in words:
+                nb_words += 1
+                word_id = f'word_{self.voice_nb}_{nb_words}_{self.inputfile}'
+
+                word = {
+                    'source': self.source,
+                    'inputfile': self.inputfile,
+                    'cypher_id': word_id,
+                    'voice_nb': self.voice_nb,
+                    'word': nb_words,
+                    'line': k + 1,
+                    'text': text,
+                    'offset': offset,
+                    'start': e.start
+                }
+                sink.node(word_id, 'Word', word)
+                sink.link(line_id, word_id, 'HAS_WORD')
+                sink.link(word_id, e.cypher_id, 'STARTS_AT')
+
+                offset += len(text) + 1
@@ -12,8 +12,10 @@
 '''Represent the Measure nodes in the graph'''
 
 ##-Imports
+import re
+
 from src.graph.Event import Event
-from src.graph.utils_graph import make_create_string, make_create_link_string
+from src.sinks import CypherSink
 
 ##-Main
 class Measure:
@@ -21,13 +23,17 @@ class Measure:
 
     n = 1 # Used as a counter
 
-    def __init__(self, source: str, id_: str, events: list[list[Event]] = [], repeat_sign: str | None = None, left: str | None = None, right: str | None = None):
+    def __init__(self, source: str, id_: str, events: list[list[Event]] = [], repeat_sign: str | None = None, left: str | None = None, right: str | None = None, ending: str | None = None):
         '''
         Initate Measure.
 
-        - source     : the name of the source file ;
-        - id_        : the mei id of the Measure node ;
-        - events     : the list of list of `Event`s : events[i][j] is the j-th event from the i-th voice in this measure.
+        - source      : the name of the source file ;
+        - id_         : the mei id of the Measure node ;
+        - events      : the list of list of `Event`s : events[i][j] is the j-th event from the i-th voice in this measure ;
+        - repeat_sign : 'start' if the measure starts a repeated section, 'end' if it ends one ;
+        - left        : the left bar line, if it is a repeat sign ('rptstart' or 'rptboth') ;
+        - right       : the right bar line, if it is a repeat sign ('rptstart', 'rptend' or 'rptboth') or the end ('end') ;
+        - ending      : the number(s) of the ending (volta) containing the measure (the `n` of the MEI `ending`, e.g '1', or '1, 2').
         '''
 
         self.source = source
@@ -39,7 +45,8 @@ class Measure:
             self.left = left
         if right:
             self.right = right
-
+        if ending:
+            self.ending = ending
 
         self._calculate_other_values();
 
@@ -52,6 +59,24 @@ class Measure:
         self.number = Measure.n
         Measure.n += 1;
 
+    def starts_repeat(self) -> bool:
+        '''Returns True if a repeated section starts at the beginning of this measure.'''
+
+        return self.__dict__.get('left') in ('rptstart', 'rptboth')
+
+    def ends_repeat(self) -> bool:
+        '''Returns True if a repeated section ends at the end of this measure.'''
+
+        return self.__dict__.get('right') in ('rptend', 'rptboth')
+
+    def get_ending_numbers(self) -> list[int]:
+        '''Returns the numbers of the ending containing this measure (the times it is played, e.g [1, 2]), or [] if it is not in an ending.'''
+
+        if 'ending' not in self.__dict__:
+            return []
+
+        return [int(n) for n in re.findall(r'\d+', str(self.ending))]
+
     def add_event(self, e: Event, voice_nb: int):
         '''
         Adds an event to the event list.
@@ -67,51 +92,74 @@ class Measure:
     
         self.events[voice_index].append(e) # Adding the event in its voice
 
-    def to_cypher(self, parent_cypher_id: str, previous_Measures=[]) -> str:
+    def to_cypher(self, parent_cypher_id: str, previous_Measure=None, last_events: list|None = None, last_real_events: list|None = None, grace_bypass: bool = False) -> str:
+        '''Returns the CREATE cypher clauses that creates the Measure node, its child nodes and links (see `to_sink`).'''
+
+        sink = CypherSink()
+        self.to_sink(sink, parent_cypher_id, previous_Measure, last_events, last_real_events, grace_bypass)
+        return sink.getvalue()
+
+    def to_sink(self, sink, parent_cypher_id: str, previous_Measure=None, last_events: list|None = None, last_real_events: list|None = None, grace_bypass: bool = False):
         '''
-        Returns the CREATE cypher clauses, that creates the Measure node, its child nodes and links (see `Event.to_cypher`),
+        Writes to `sink` (see `sinks.Sink`) the Measure node, its child nodes and links (see `Event.to_sink`),
         and the link from the previous Measure (if it exists).
 
         Input:
-            - parent_cypher_id  : the cypher id of the parent (a `TopRhythmic`) ;
-            - previous_Measures : the list of previous Measures, excluding the current one.
+            - sink             : the sink ;
+            - parent_cypher_id : the cypher id of the parent (a `TopRhythmic`) ;
+            - previous_Measure : the previous Measure (None if this is the first one) ;
+            - last_events      : `last_events[i]` is the last Event already exported for the voice i + 1. It is updated with the events of this measure ;
+            - last_real_events : same, but ignoring the Events made of grace notes. Only used (and updated) if `grace_bypass` is True ;
+            - grace_bypass     : if True, also create a :NEXT link that skips the grace notes (see below).
 
-        The list of previous measures is needed because it is possible that there is no notes in a measure for a voice, so to link the first event with the last one, we need to check all the way to the first measure (in the worst case)
+        The last events are kept from one measure to the next, because it is possible that there is no notes in a measure for a voice,
+        so the first event of a measure has to be linked with the last event of this voice, that can be several measures before.
+
+        When `grace_bypass` is True, each Event following one or more grace Events is also linked (:NEXT) with the last non-grace Event before them.
+        This link has the attribute `grace_bypass` set to 1, and its own interval and duration ratio.
+        This way, the grace notes are still in the graph, and searching with them and without them both work.
 
         Order of creation :
             - Measure ;
             - Link from parent (TopRhythmic) to this Measure (:RHYTHMIC) ;
-            - Events (see `Event.to_cypher` for more details) ;
+            - Events (see `Event.to_sink` for more details), and links skipping grace notes (:NEXT) ;
             - Link from previous Measure (:NEXTMeasure).
         '''
 
+        if last_events == None:
+            last_events = []
+
+        if last_real_events == None:
+            last_real_events = []
+
         # Create the Measure node
-        c = make_create_string(self.cypher_id, 'Measure', self.__dict__)
+        sink.node(self.cypher_id, 'Measure', self.__dict__)
 
         # Create the link from parent (TopRhythmic) to this node (Measure)
-        c += '\n' + make_create_link_string(parent_cypher_id, self.cypher_id, 'RHYTHMIC')
+        sink.link(parent_cypher_id, self.cypher_id, 'RHYTHMIC')
+
+        # Adding potentially missing voices
+        while len(last_events) < len(self.events):
+            last_events.append(None)
+            last_real_events.append(None)
 
         # Create the events
         for voice_index, events_of_voice in enumerate(self.events):
-            for k, e in enumerate(events_of_voice):
-                if k == 0: # This is the first event of the measure
-                    # Try to get the last event (which can not be in the last measure, but futher than that)
-                    i = -1 # Previous measure index
-                    while (-len(previous_Measures) <= i and len(previous_Measures[i].events) <= voice_index):
-                        i -= 1
+            for e in events_of_voice:
+                prev = last_events[voice_index]
+                e.to_sink(sink, self.cypher_id, prev)
 
-                    if i < -len(previous_Measures):
-                        prev = None
-                    else:
-                        prev = previous_Measures[i].events[voice_index][-1]
+                # Create the link skipping grace notes
+                if grace_bypass and not e.is_grace():
+                    prev_real = last_real_events[voice_index]
 
-                else: # There is a previous Event in this measure
-                    prev = self.events[voice_index][k - 1]
+                    if prev != None and prev_real != None and prev is not prev_real:
+                        e.next_link_to_sink(sink, prev_real, {'grace_bypass': 1})
 
-                c += '\n' + e.to_cypher(self.cypher_id, prev)
+                    last_real_events[voice_index] = e
+
+                last_events[voice_index] = e
 
         # Create link to previous Measure
-        if len(previous_Measures) > 0:
-            c += '\n' + make_create_link_string(previous_Measures[-1].cypher_id, self.cypher_id, 'NEXTMeasure')
-    
-        return c
+        if previous_Measure != None:
+            sink.link(previous_Measure.cypher_id, self.cypher_id, 'NEXTMeasure')
@@ -12,9 +12,13 @@
 '''Represents the Score node in the graph'''
 
 ##-Imports
+import heapq
+from math import lcm
+
 from src.graph.TopRhythmic import TopRhythmic
 from src.graph.Voice import Voice
-from src.graph.utils_graph import make_create_string
+from src.graph.Event import Event, set_chords
+from src.sinks import CypherSink
 
 ##-Main
 class Score:
@@ -36,6 +40,7 @@ class Score:
         self.composer = composer
         self.collection = collection
         self.voices = voices
+        self.ticksPerWhole = None # The number of ticks in a whole, for the times of the events as integers (see `set_ticks`)
 
         self._calculate_other_values();
 
@@ -54,27 +59,173 @@ class Score:
     
         self.voices.append(v)
 
-    def to_cypher(self, top_rhythmic: TopRhythmic) -> str:
+    def set_ticks(self, base: int) -> int:
+        '''
+        Chooses the grid of the score : the smallest multiple of `base` on which all the events start and end,
+        and sets `ticksPerWhole`, and the ticks of all the events (see `Event.set_ticks`).
+
+        - base : the minimum grid (number of ticks in a whole).
+
+        Output: the number of ticks in a whole.
+        '''
+
+        ticks_per_whole = base
+        for v in self.voices:
+            for e in v.events:
+                ticks_per_whole = lcm(ticks_per_whole, e.start_q.denominator, 1 if e.end_q == None else e.end_q.denominator)
+
+        self.ticksPerWhole = ticks_per_whole
+
+        for v in self.voices:
+            for e in v.events:
+                e.set_ticks(ticks_per_whole)
+
+        return ticks_per_whole
+
+    def find_simultaneous_events(self) -> list[tuple[Event, Event]]:
+        '''
+        Finds all the pairs of notes from different voices that sound at the same time.
+
+        It is a sweep-line over the per-voice event lists (`Voice.events`), merged by start time.
+        A heap ordered by end time removes the notes that have ended, so only the notes still sounding
+        (at most one per voice) are paired with each note : the cost is O(n log n + number of pairs)
+        instead of comparing every pair of voices.
+
+        Rests and END events are ignored.
+
+        Output: a list of tuples `(e1, e2)`, where `e1` started before (or at the same time as) `e2`.
+        '''
+
+        notes_per_voice = [
+            [(e.start, voice_index, e) for e in v.events if e.type_ == 'note' and e.end != None]
+            for voice_index, v in enumerate(self.voices)
+        ]
+
+        pairs = []
+        active = {} # active[voice_index] is the note currently sounding in this voice
+        ending = [] # heap of (end, voice_index, event) for the active notes
+
+        for start, voice_index, e in heapq.merge(*notes_per_voice, key=lambda t: (t[0], t[1])):
+            # Remove the notes that have ended
+            while len(ending) > 0 and ending[0][0] <= start:
+                end, i, old = heapq.heappop(ending)
+                if active.get(i) is old:
+                    del active[i]
+
+            # The notes left in `active` all end after `start` ; the previous note of the voice of `e` is replaced by `e`
+            active.pop(voice_index, None)
+            pairs.extend((other, e) for other in active.values())
+
+            active[voice_index] = e
+            heapq.heappush(ending, (e.end, voice_index, e))
+
+        return pairs
+
+    def to_cypher(self, top_rhythmic: TopRhythmic, simultaneous: bool = False, grace_bypass: bool = False, time_index: bool = False, unfold_repeats: bool = False) -> str:
+        '''Returns the CREATE cypher clauses that creates the Score node, and its child nodes and links (see `to_sink`).'''
+
+        sink = CypherSink()
+        self.to_sink(sink, top_rhythmic, simultaneous, grace_bypass, time_index, unfold_repeats)
+        return sink.getvalue()
+
+    def to_sink(self, sink, top_rhythmic: TopRhythmic, simultaneous: bool = False, grace_bypass: bool = False, time_index: bool = False, unfold_repeats: bool = False):
         '''
-        Returns the CREATE cypher clauses that creates the Score node, and its child nodes and links (see `TopRhythmic.to_cypher`).
+        Writes to `sink` (see `sinks.Sink`) the Score node, and its child nodes and links (see `TopRhythmic.to_sink`).
+        To write to several outputs with only one traversal, use a `sinks.MultiSink`.
 
         Input:
-            - top_rhythmic : the TopRhythmic child.
+            - sink           : the sink ;
+            - top_rhythmic   : the TopRhythmic child ;
+            - simultaneous   : if True, also create the links between notes of different voices that sound together (see `find_simultaneous_events`) ;
+            - grace_bypass   : if True, also create the :NEXT links skipping grace notes (see `Measure.to_sink`) ;
+            - time_index     : if True, also create the index of the events by time (see `time_index_to_sink`) ;
+            - unfold_repeats : if True, also create the chains of the events in the order they are played (see `TopRhythmic.performance_to_sink`).
 
         Order of creation :
             - Score ;
-            - TopRhythmic (see `TopRhythmic.to_cypher` for more details) ;
-            - Voices.
+            - TopRhythmic (see `TopRhythmic.to_sink` for more details) ;
+            - Voices ;
+            - Links between simultaneous notes (:SIMULTANEOUS), if `simultaneous` is True ;
+            - TimeBucket nodes and their links, if `time_index` is True ;
+            - Links between the events in the order they are played (:PERF_NEXT), if `unfold_repeats` is True.
+        '''
+
+        # The descriptors of the chords are only needed in the output
+        set_chords(e for m in top_rhythmic.measures for events_of_voice in m.events for e in events_of_voice)
+
+        # Create the Score node and the TopRhythmic (with the measures)
+        self.header_to_sink(sink, top_rhythmic)
+        top_rhythmic.measures_to_sink(sink, grace_bypass)
+
+        # Create voices
+        self.voices_to_sink(sink, top_rhythmic, simultaneous)
+
+        if time_index:
+            self.time_index_to_sink(sink)
+
+        if unfold_repeats:
+            top_rhythmic.performance_to_sink(sink)
+
+    def header_to_sink(self, sink, top_rhythmic: TopRhythmic):
+        '''
+        Writes to `sink` the Score node, and the TopRhythmic node without its measures (see `TopRhythmic.header_to_sink`).
+
+        - sink         : the sink ;
+        - top_rhythmic : the TopRhythmic child.
         '''
 
         # Create the Score node
-        c = make_create_string(self.cypher_id, 'Score', self.__dict__)
+        sink.node(self.cypher_id, 'Score', self.__dict__)
 
         # Create the TopRhythmic
-        c += '\n' + top_rhythmic.to_cypher(self.cypher_id)
+        top_rhythmic.header_to_sink(sink, self.cypher_id)
+
+    def voices_to_sink(self, sink, top_rhythmic: TopRhythmic, simultaneous: bool = False):
+        '''
+        Writes to `sink` the Voice nodes (see `Voice.to_sink`), and the links between simultaneous notes if `simultaneous` is True.
+        The Events have to be written before.
+
+        - sink         : the sink ;
+        - top_rhythmic : the TopRhythmic child ;
+        - simultaneous : if True, also create the links between notes of different voices that sound together (see `find_simultaneous_events`).
+        '''
 
         # Create voices
         for v in self.voices:
-            c += '\n' + v.to_cypher(self.cypher_id, top_rhythmic.cypher_id)
+            v.to_sink(sink, self.cypher_id, top_rhythmic.cypher_id)
+
+        # Create links between simultaneous notes
+        if simultaneous:
+            for e1, e2 in self.find_simultaneous_events():
+                data = {'overlap': min(e1.end, e2.end) - e2.start}
+                sink.link(e1.cypher_id, e2.cypher_id, 'SIMULTANEOUS', data)
+
+    def time_index_to_sink(self, sink):
+        '''
+        Writes to `sink` the index of the events by time : one `TimeBucket` node per whole note of the score (bucket k covers the times [k, k + 1[),
+        linked from the Score (:TIME_BUCKET), and linked to each event sounding during it (:SOUNDS).
+        The cypher id of a bucket is 'timebucket_<k>_<inputfile>', so the events sounding at a time are found from the index on `cypher_id`,
+        then filtered with their `startTick` and `endTick`.
+
+        The ticks of the events have to be set (see `set_ticks`). The events that are not on the grid, and the last events (END), are not indexed.
+
+        - sink : the sink.
+        '''
+
+        tpw = self.ticksPerWhole
+        buckets = set()
+
+        for v in self.voices:
+            for e in v.events:
+                if e.type_ == 'END' or not hasattr(e, 'startTick') or not hasattr(e, 'endTick'):
+                    continue
+
+                for k in range(e.startTick // tpw, max(e.startTick, e.endTick - 1) // tpw + 1):
+                    bucket_id = f'timebucket_{k}_{self.inputfile}'
+
+                    if k not in buckets:
+                        buckets.add(k)
+                        sink.node(bucket_id, 'TimeBucket', {'source': self.source, 'inputfile': self.inputfile, 'cypher_id': bucket_id, 'bucket': k, 'startTick': k * tpw, 'endTick': (k + 1) * tpw})
+                        sink.link(self.cypher_id, bucket_id, 'TIME_BUCKET')
 
-        return c
+                    sink.link(bucket_id, e.cypher_id, 'SOUNDS')
@@ -13,7 +13,7 @@
 
 ##-Imports
 from src.graph.Measure import Measure
-from src.graph.utils_graph import make_create_string, make_create_link_string
+from src.sinks import CypherSink
 
 ##-Main
 class TopRhythmic:
@@ -53,34 +53,148 @@ class TopRhythmic:
     
         self.measures.append(m)
 
-    def to_cypher(self, score_cypher_id: str) -> str:
+    def to_cypher(self, score_cypher_id: str, grace_bypass: bool = False) -> str:
+        '''Returns the CREATE cypher clauses that creates the TopRhythmic node, its child nodes and links (see `to_sink`).'''
+
+        sink = CypherSink()
+        self.to_sink(sink, score_cypher_id, grace_bypass)
+        return sink.getvalue()
+
+    def to_sink(self, sink, score_cypher_id: str, grace_bypass: bool = False):
         '''
-        Returns the CREATE cypher clauses, that creates the TopRhythmic node, its child nodes and links (see `Measure.to_cypher`).
+        Writes to `sink` (see `sinks.Sink`) the TopRhythmic node, its child nodes and links (see `Measure.to_sink`).
 
         Input:
-            - score_cypher_id : the cypher id of the Score parent (not the `Voice`s).
+            - sink            : the sink ;
+            - score_cypher_id : the cypher id of the Score parent (not the `Voice`s) ;
+            - grace_bypass    : if True, also create the :NEXT links skipping grace notes (see `Measure.to_sink`).
 
         Order of creation :
             - TopRhythmic ;
             - Link from Score parent (:RHYTHMIC) ;
-            - Measures (see `Measure.to_cypher` for more details) ;
+            - Measures (see `Measure.to_sink` for more details) ;
+        '''
+
+        self.header_to_sink(sink, score_cypher_id)
+        self.measures_to_sink(sink, grace_bypass)
+
+    def header_to_sink(self, sink, score_cypher_id: str):
+        '''
+        Writes to `sink` the TopRhythmic node and the link from the Score parent (:RHYTHMIC), without the measures.
+
+        - sink            : the sink ;
+        - score_cypher_id : the cypher id of the Score parent.
         '''
 
         # Create the TopRhythmic node
-        c = make_create_string(self.cypher_id, 'TopRhythmic', self.__dict__)
+        sink.node(self.cypher_id, 'TopRhythmic', self.__dict__)
 
         # Create the link from Score parent
-        c += '\n' + make_create_link_string(score_cypher_id, self.cypher_id, 'RHYTHMIC')
+        sink.link(score_cypher_id, self.cypher_id, 'RHYTHMIC')
+
+    def measures_to_sink(self, sink, grace_bypass: bool = False):
+        '''
+        Writes the measures to `sink` (see `Measure.to_sink`).
+
+        - sink         : the sink ;
+        - grace_bypass : if True, also create the :NEXT links skipping grace notes.
+        '''
+
+        last_events = [] # last_events[i] is the last exported Event of the voice i + 1 (updated by `Measure.to_sink`)
+        last_real_events = [] # Same, but ignoring grace notes
 
-        # Create the measures
         for k, m in enumerate(self.measures):
-            # if k == 0:
-            #     prev = None
-            # else:
-            #     prev = self.measures[k - 1]
+            if k == 0:
+                prev = None
+            else:
+                prev = self.measures[k - 1]
+
+            m.to_sink(sink, self.cypher_id, prev, last_events, last_real_events, grace_bypass)
+
+    def performance_order(self) -> list[Measure]:
+        '''
+        Returns the measures in the order they are played, with the repeats unfolded, in one pass over `self.measures`
+        (each measure is visited once per time it is played).
+
+        A repeated section starts at a measure with a left repeat sign ('rptstart' or 'rptboth'), after a right 'rptstart' or 'rptboth',
+        after the end of the previous repeated section, or at the beginning of the score.
+        It is played again when its end ('rptend' or 'rptboth') is reached for the first time.
+        The measures of an ending (volta) are only played in the passes given by its numbers (see `Measure.get_ending_numbers`),
+        and an ending ending with a repeat sign goes back to the start of the section for the next pass (e.g endings '1, 2' and '3').
+        '''
+
+        order = []
+        start = 0 # The index of the first measure of the current repeated section
+        pass_ = 1 # The number of the current pass in this section
+        jumped = set() # The indexes of the repeat signs (out of the endings) already taken
+
+        k = 0
+        while k < len(self.measures):
+            m = self.measures[k]
+            nxt = self.measures[k + 1] if k + 1 < len(self.measures) else None
+            endings = m.get_ending_numbers()
+
+            if m.starts_repeat():
+                start = k
+
+            if len(endings) == 0 or pass_ in endings:
+                order.append(m)
+
+                if m.ends_repeat() or (nxt != None and nxt.__dict__.get('left') == 'rptboth'):
+                    if len(endings) > 0 or k not in jumped:
+                        jumped.add(k)
+                        pass_ += 1
+                        k = start
+                        continue
+
+            # End of the repeated section (after its repeat sign, or after its last ending) : the next one starts after
+            if len(endings) > 0:
+                if nxt == None or len(nxt.get_ending_numbers()) == 0:
+                    pass_, start = 1, k + 1
+
+            elif m.ends_repeat() or m.__dict__.get('right') == 'rptstart' or (nxt != None and nxt.__dict__.get('left') == 'rptboth'):
+                pass_, start = 1, k + 1
+
+            k += 1
+
+        return order
+
+    def performance_to_sink(self, sink):
+        '''
+        Writes to `sink` the chain of the events of each voice in the order they are played (see `performance_order`),
+        with a :PERF_NEXT link between two consecutive events. The events have to be written before.
+
+        The links hold the same data as the :NEXT links (see `Event.next_link_to_sink`), and their position `order` in the chain (from 1),
+        as an event played several times has several :PERF_NEXT links.
+        The last event of a voice (END) is only at the end of its chain.
+
+        - sink : the sink.
+        '''
+
+        order = self.performance_order()
+        nb_voices = max((len(m.events) for m in self.measures), default=0)
+
+        for voice_index in range(nb_voices):
+            prev = None
+            last = [] # The END event
+            n = 0
+
+            for m in order:
+                if voice_index >= len(m.events):
+                    continue
+
+                for e in m.events[voice_index]:
+                    if e.type_ == 'END':
+                        last = [e]
+                        continue
 
-            previous_measures = self.measures[:k]
+                    if prev != None:
+                        n += 1
+                        e.next_link_to_sink(sink, prev, {'order': n}, 'PERF_NEXT')
 
-            c += '\n' + m.to_cypher(self.cypher_id, previous_measures)
+                    prev = e
 
-        return c
+            for e in last:
+                if prev != None:
+                    n += 1
+                    e.next_link_to_sink(sink, prev, {'order': n}, 'PERF_NEXT')
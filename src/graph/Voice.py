@@ -13,7 +13,8 @@
 
 ##-Imports
 from src.graph.Event import Event
-from src.graph.utils_graph import make_create_string, make_create_link_string
+from src.graph.Lyrics import Lyrics
+from src.sinks import CypherSink
 
 ##-Main
 class Voice:
@@ -33,6 +34,7 @@ class Voice:
         self.source = source
         self.id_ = id_.replace(' ', '_')
         self.first_event = first_event
+        self.events = [] # All the events of this voice, in order (used for links between voices)
 
         self._calculate_other_values();
 
@@ -45,6 +47,8 @@ class Voice:
         self.staff_number = Voice.n
         Voice.n += 1;
 
+        self.lyrics = Lyrics(self.source, self.staff_number) # The syllables of the events, assembled in words and lines
+
     def set_event(self, e: Event):
         '''
         Sets `e` as the first event for this voice.
@@ -54,17 +58,35 @@ class Voice:
     
         self.first_event = e
 
+    def add_event(self, e: Event):
+        '''
+        Adds `e` at the end of the event list of this voice, and its syllable to the lyrics.
+
+        - e : the `Event` to add.
+        '''
+
+        self.events.append(e)
+        self.lyrics.add_event(e)
+
     def is_first_event_set(self) -> bool:
         '''Checks if the first event is set.'''
     
         return self.first_event != None
 
     def to_cypher(self, parent_cypher_id: str, top_rhythmic_cypher_id: str) -> str:
+        '''Returns the CREATE cypher clauses that creates the Voice node and its links (see `to_sink`).'''
+
+        sink = CypherSink()
+        self.to_sink(sink, parent_cypher_id, top_rhythmic_cypher_id)
+        return sink.getvalue()
+
+    def to_sink(self, sink, parent_cypher_id: str, top_rhythmic_cypher_id: str):
         '''
-        Returns the CREATE cypher clauses, that creates the Voice node, its child nodes and links (see `Event.to_cypher`),
-        and the link from the previous Voice (if it exists).
+        Writes to `sink` (see `sinks.Sink`) the Voice node and its links.
+        The events have to be written before (see `Event.to_sink`).
 
         Input:
+            - sink                   : the sink ;
             - parent_cypher_id       : the cypher id of the parent (the `Score`) ;
             - top_rhythmic_cypher_id : the cypher id of the `TopRhythmic`.
 
@@ -72,23 +94,25 @@ class Voice:
             - Voice ;
             - Link from parent (Score) to this Voice (:VOICE) ;
             - Link from this Voice to TopRhythmic (:RHYTHMIC) ;
-            - Links from this Voice to the first event (:PLAYS and :timeSeries).
+            - Links from this Voice to the first event (:PLAYS and :timeSeries) ;
+            - Lyrics, if the voice has syllables (see `Lyrics.to_sink`).
         '''
 
+        if self.first_event == None:
+            raise ValueError('Voice: to_cypher: `self.first_event` was not initialized !')
+
         # Create the Voice node
-        c = make_create_string(self.cypher_id, 'Voice', self.__dict__)
+        sink.node(self.cypher_id, 'Voice', self.__dict__)
 
         # Create the link from parent (Score) to this node (Voice)
-        c += '\n' + make_create_link_string(parent_cypher_id, self.cypher_id, 'VOICE')
+        sink.link(parent_cypher_id, self.cypher_id, 'VOICE')
 
         # Create the link to TopRhythmic
-        c += '\n' + make_create_link_string(self.cypher_id, top_rhythmic_cypher_id, 'RHYTHMIC')
+        sink.link(self.cypher_id, top_rhythmic_cypher_id, 'RHYTHMIC')
 
         # Create the links to the first event
-        if self.first_event == None:
-            raise ValueError('Voice: to_cypher: `self.first_event` was not initialized !')
+        sink.link(self.cypher_id, self.first_event.cypher_id, 'PLAYS')
+        sink.link(self.cypher_id, self.first_event.cypher_id, 'timeSeries')
 
-        c += '\n' + make_create_link_string(self.cypher_id, self.first_event.cypher_id, 'PLAYS')
-        c += '\n' + make_create_link_string(self.cypher_id, self.first_event.cypher_id, 'timeSeries')
-    
-        return c
+        # Create the lyrics
+        self.lyrics.to_sink(sink, self.cypher_id)
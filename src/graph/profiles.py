@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Export profiles : the properties kept on the nodes of each label in the outputs (see the option `--profile` and `sinks.ProjectionSink`).
+
+By default (profile 'full'), a node has all the int, float and str attributes of its object (see `format_properties`).
+Each Fact, Event, Measure, ... then repeats the name of its file (`source` and `inputfile`), and values derived from others
+(`halfTonesFromA4`, `pos`, ...) that the searches do not use.
+The other profiles keep, for each label, only the properties listed (with their exported names : `type`, not `type_`),
+and the properties of the file are kept only on the Score :
+    - search  : the properties used by the searches (pitches, durations, times, chords, lyrics) ;
+    - minimal : the ids, the indexed properties, and what is needed to follow the links.
+
+A profile has to keep the properties needed by the database and by the links created (see `check_profile`) :
+the `cypher_id` of all the nodes (the links are made on it), the properties of the file on the Score,
+the indexed properties (see `sinks.property_indexes` and `sinks.fulltext_indexes`), and the properties giving the meaning
+of the links (`link_properties`, e.g the `start` of the events for the order of the :NEXT chains).
+'''
+
+##-Imports
+from src.sinks import property_indexes, fulltext_indexes
+
+##-Init
+# Profiles : name -> label -> properties kept (a label that is not listed keeps all its properties). None keeps everything.
+export_profiles = {
+    'full': None,
+    'search': {
+        'TopRhythmic': ('cypher_id', 'id', 'name'),
+        'Voice': ('cypher_id', 'id', 'staff_number'),
+        'Measure': ('cypher_id', 'id', 'number', 'repeat_sign', 'left', 'right', 'ending'),
+        'Event': (
+            'cypher_id', 'id', 'type', 'dur', 'dots', 'duration', 'start', 'end', 'startTick', 'endTick', 'voice_nb',
+            'pcMask', 'primeForm', 'bassPitch', 'nbNotes'
+        ),
+        'Fact': (
+            'cypher_id', 'id', 'type', 'class', 'octave', 'accid', 'accid_ges', 'dur', 'dots', 'duration', 'name', 'frequency',
+            'grace', 'syllable', 'key_fifths', 'key_mode', 'scaleDegree', 'diatonicNumber', 'keyPitchClass'
+        ),
+        'Line': ('cypher_id', 'voice_nb', 'line', 'text', 'nbWords', 'start'),
+        'Word': ('cypher_id', 'voice_nb', 'word', 'line', 'text', 'offset', 'start'),
+        'TimeBucket': ('cypher_id', 'bucket', 'startTick', 'endTick')
+    },
+    'minimal': {
+        'Score': ('cypher_id', 'id', 'source', 'inputfile'),
+        'TopRhythmic': ('cypher_id',),
+        'Voice': ('cypher_id', 'staff_number'),
+        'Measure': ('cypher_id', 'number'),
+        'Event': ('cypher_id', 'type', 'duration', 'start', 'voice_nb', 'pcMask', 'primeForm', 'bassPitch', 'startTick', 'endTick'),
+        'Fact': (
+            'cypher_id', 'type', 'class', 'octave', 'accid', 'accid_ges', 'dur', 'dots', 'name',
+            'scaleDegree', 'diatonicNumber', 'keyPitchClass'
+        ),
+        'Line': ('cypher_id', 'line', 'text', 'start'),
+        'Word': ('cypher_id', 'word', 'line', 'text', 'start'),
+        'TimeBucket': ('cypher_id', 'bucket', 'startTick', 'endTick')
+    }
+}
+
+# Properties of the file, kept only on the Score (the other nodes are found from it through the links)
+file_properties = ('source', 'inputfile')
+
+# Properties giving the meaning of the links : link type -> label -> properties
+link_properties = {
+    'timeSeries': {'Voice': ('staff_number',)}, # The voice of the chain
+    'NEXT': {'Event': ('type', 'start', 'voice_nb')}, # The chain of a voice, in order of `start`, ending with the 'END' event
+    'NEXTMeasure': {'Measure': ('number',)},
+    'STARTS_AT': {'Line': ('start',), 'Word': ('start',)},
+    'HAS_WORD': {'Word': ('word', 'line')},
+    'SIMULTANEOUS': {'Event': ('start', 'end')}, # The `overlap` of the link is computed from them
+    'SOUNDS': {'TimeBucket': ('bucket', 'startTick', 'endTick'), 'Event': ('startTick', 'endTick')},
+    'PERF_NEXT': {'Event': ('type',)}
+}
+
+# Links created with each option (the other types are always created)
+option_links = {
+    'simultaneous': ('SIMULTANEOUS',),
+    'time_index': ('SOUNDS',),
+    'unfold_repeats': ('PERF_NEXT',)
+}
+
+##-Profiles
+def get_profile(name: str) -> dict[str, frozenset[str]]|None:
+    '''
+    Returns the properties kept by the profile `name` : label -> set of the property names (None if all the properties are kept).
+    Raise a ValueError if the profile does not exist.
+
+    - name : the name of the profile (see `export_profiles`).
+    '''
+
+    if name not in export_profiles:
+        raise ValueError(f'get_profile: unknown profile "{name}" (possible values : {", ".join(export_profiles)})')
+
+    profile = export_profiles[name]
+    if profile == None:
+        return None
+
+    return {label: frozenset(keys) for label, keys in profile.items()}
+
+def get_link_types(simultaneous: bool = False, time_index: bool = False, unfold_repeats: bool = False) -> list[str]:
+    '''
+    Returns the types of the links created with the given options (see `MeiToGraph.export`) that need properties (see `link_properties`).
+
+    - simultaneous   : if True, the :SIMULTANEOUS links are created ;
+    - time_index     : if True, the :SOUNDS links are created ;
+    - unfold_repeats : if True, the :PERF_NEXT links are created.
+    '''
+
+    options = {'simultaneous': simultaneous, 'time_index': time_index, 'unfold_repeats': unfold_repeats}
+    optional = [t for option, types in option_links.items() for t in types]
+
+    link_types = [t for t in link_properties if t not in optional]
+    for option, types in option_links.items():
+        if options[option]:
+            link_types += types
+
+    return link_types
+
+def check_profile(name: str, link_types: list[str]) -> list[str]:
+    '''
+    Checks that the profile `name` keeps the properties needed by the database and by the links of `link_types`,
+    and that it keeps the properties of the file only on the Score (see the module docstring).
+
+    - name       : the name of the profile ;
+    - link_types : the types of the links created (see `get_link_types`).
+
+    Output: the problems found (an empty list if there is none).
+    '''
+
+    profile = get_profile(name)
+    if profile == None:
+        return []
+
+    def kept(label: str, key: str) -> bool:
+        return label not in profile or key in profile[label]
+
+    problems = []
+
+    for label, keys in profile.items():
+        if 'cypher_id' not in keys:
+            problems.append(f'profile "{name}" : the {label} nodes do not keep `cypher_id`, needed to create their links')
+
+        for key in file_properties:
+            if label != 'Score' and key in keys:
+                problems.append(f'profile "{name}" : the {label} nodes keep `{key}`, that should only be on the Score')
+
+    for key in file_properties:
+        if not kept('Score', key):
+            problems.append(f'profile "{name}" : the Score nodes do not keep `{key}`')
+
+    needed = [(label, key, 'an index') for label, key in property_indexes]
+    needed += [(label, key, 'an index') for index, labels, key in fulltext_indexes for label in labels]
+    needed += [(label, key, f'the :{t} links') for t in link_types for label, keys in link_properties.get(t, {}).items() for key in keys]
+
+    for label, key, use in needed:
+        if not kept(label, key):
+            problems.append(f'profile "{name}" : the {label} nodes do not keep `{key}`, needed by {use}')
+
+    return problems
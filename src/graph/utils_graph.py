@@ -39,14 +39,17 @@ def try_to_convert_to_int_or_float(s: str|None) -> int|float|str|None:
 
     return ret
 
-def format_data(data: dict) -> str:
+def format_properties(data: dict) -> dict[str, int|float|str]:
     '''
-    Formats the dict `data` in a string similar to json for the cypher dump
+    Returns the properties of the node or link described by `data`, as they are exported :
+        - attributes that are not int, float or str (None, lists, ...) are ignored ;
+        - values are converted to int or float when possible (except for ids) ;
+        - the last '_' is removed from the keys (id_ becomes id, class_ becomes class, ...).
 
-    - data : the dict to format.
+    - data : a dict with the data (usually the `__dict__` of a node object).
     '''
 
-    data_arr = []
+    props = {}
     for k in data:
         if type(data[k]) not in (int, float, str): # Ignore attributes that are None and used internally (lists, ...)
             continue
@@ -59,6 +62,19 @@ def format_data(data: dict) -> str:
         if k[-1] == '_': # changing id_ to id, class_ to class, type_ to type, ...
             k = k[:-1]
 
+        props[k] = d
+
+    return props
+
+def format_data(data: dict) -> str:
+    '''
+    Formats the dict `data` in a string similar to json for the cypher dump
+
+    - data : the dict to format.
+    '''
+
+    data_arr = []
+    for k, d in format_properties(data).items():
         if type(d) in (int, float):
             data_arr.append(f"{k}: {d}")
         # elif d == None:
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Detects the `cypher_id`s used twice in a conversion run.
+
+A `cypher_id` is `id_ + '_' + inputfile`, and `inputfile` replaces '.', '-' and '/' with '_', so different files
+(e.g 'a-b.mei' and 'a_b.mei') can give the same ids. In the database, the nodes would then be merged, or the load would fail.
+
+The ids are not kept : only a 64-bit digest of each id is stored, in an open addressing hash table made of two arrays
+(the digests, and the index of the file of each digest), so between 24 and 48 bytes per id.
+Two different ids have the same digest with a probability of about n² / 2^65 for n ids (less than 1e-5 for 10 millions ids),
+so a collision of digests is reported as a collision of ids.
+'''
+
+##-Imports
+from array import array
+import hashlib
+
+##-Init
+max_collisions = 10000 # Maximum number of collisions kept (the next ones are only counted)
+
+##-Utils
+def id_digest(cypher_id: str) -> int:
+    '''
+    Returns the 64-bit digest of `cypher_id` (never 0, as 0 marks the empty slots of the table).
+
+    - cypher_id : the id.
+    '''
+
+    d = int.from_bytes(hashlib.blake2b(cypher_id.encode('utf-8'), digest_size=8).digest(), 'little')
+    return d or 1
+
+##-Registry
+class IdRegistry:
+    '''Hash table of the digests of all the ids of a run (see the module docstring).'''
+
+    def __init__(self, capacity: int = 1 << 16):
+        '''
+        Initiates an empty registry.
+
+        - capacity : the initial number of slots (a power of 2). The table doubles when it is half full.
+        '''
+
+        self.keys = array('Q', bytes(8 * capacity)) # The digests (0 for an empty slot)
+        self.files = array('I', bytes(4 * capacity)) # self.files[k] is the index of the file of self.keys[k]
+        self.mask = capacity - 1
+        self.size = 0
+
+        self.file_names = []
+        self.nb_collisions = 0
+        self.collisions = [] # (file index of the first id, file index of the second id, the second id or None)
+
+    def add_file(self, name: str) -> int:
+        '''
+        Registers a file, and returns its index (to use with `add`).
+
+        - name : the name of the file.
+        '''
+
+        self.file_names.append(name)
+        return len(self.file_names) - 1
+
+    def add(self, digest: int, file_index: int, cypher_id: str|None = None) -> bool:
+        '''
+        Adds an id, and records a collision if its digest is already in the table.
+
+        - digest     : the digest of the id (see `id_digest`) ;
+        - file_index : the index of its file (see `add_file`) ;
+        - cypher_id  : the id, used in the report of a collision (None if unknown).
+
+        Output: False if it is a collision, True otherwise.
+        '''
+
+        keys = self.keys
+        k = digest & self.mask
+
+        while keys[k] != 0:
+            if keys[k] == digest:
+                self.nb_collisions += 1
+                if len(self.collisions) < max_collisions:
+                    self.collisions.append((self.files[k], file_index, cypher_id))
+
+                return False
+
+            k = (k + 1) & self.mask
+
+        keys[k] = digest
+        self.files[k] = file_index
+        self.size += 1
+
+        if 2 * self.size > len(keys):
+            self._grow()
+
+        return True
+
+    def add_all(self, digests, file_index: int, cypher_ids: list[str]|None = None):
+        '''
+        Adds all the ids of a file.
+
+        - digests    : the digests of the ids ;
+        - file_index : the index of the file ;
+        - cypher_ids : the ids, in the same order (None if unknown).
+        '''
+
+        for k, d in enumerate(digests):
+            self.add(d, file_index, None if cypher_ids == None else cypher_ids[k])
+
+    def _grow(self):
+        '''Doubles the size of the table.'''
+
+        old_keys, old_files = self.keys, self.files
+
+        capacity = 2 * len(old_keys)
+        self.keys = array('Q', bytes(8 * capacity))
+        self.files = array('I', bytes(4 * capacity))
+        self.mask = capacity - 1
+
+        keys, files, mask = self.keys, self.files, self.mask
+        for d, f in zip(old_keys, old_files):
+            if d == 0:
+                continue
+
+            k = d & mask
+            while keys[k] != 0:
+                k = (k + 1) & mask
+
+            keys[k] = d
+            files[k] = f
+
+    def get_report(self) -> list[dict]:
+        '''
+        Returns the collisions, grouped by pair of files : a list of dicts with the keys
+        'files' (the two file names, the same twice for an id repeated in one file), 'count' and 'examples' (some of the ids, if known).
+        '''
+
+        pairs = {}
+        for f1, f2, cypher_id in self.collisions:
+            p = pairs.setdefault((f1, f2), {'files': [self.file_names[f1], self.file_names[f2]], 'count': 0, 'examples': []})
+            p['count'] += 1
+
+            if cypher_id != None and len(p['examples']) < 5:
+                p['examples'].append(cypher_id)
+
+        return sorted(pairs.values(), key=lambda p: -p['count'])
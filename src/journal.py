@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Journal of a conversion run, to resume it after a crash (see the option `--resume`).
+
+Each file is recorded once all its outputs are written, as one JSON object per line : its name, the size and modification time of its input,
+the options changing the outputs (formats, links, profile, ...), the checksum (SHA-256) of each output file, and the files loaded by the .cql file.
+A line is written with a single `write` on a file opened in append mode, then synced, so a crash can only leave the last line incomplete :
+it is then ignored (and the file is converted again).
+
+A file is considered as done if its input did not change, if the options are the same, and if all its outputs still have their checksum.
+
+The entry also keeps what the checks of the whole run need, so that they still cover the files skipped when resuming :
+the digests of the ids of the file (written by `IdSink` in a folder next to the journal, see `get_ids_fn`) and its MinHash signature (see `duplicates`).
+'''
+
+##-Imports
+from datetime import datetime as dt
+from os.path import isfile, isdir, getsize, getmtime, join
+import hashlib
+import json
+import os
+
+##-Init
+journal_name = 'journal.jsonl' # Default name of the journal, in the output folder
+
+##-Utils
+def file_checksum(fn: str, chunk_size: int = 1 << 20) -> str:
+    '''
+    Returns the SHA-256 of the file `fn` (in hexadecimal).
+
+    - fn         : the filename ;
+    - chunk_size : the size of the blocks read.
+    '''
+
+    h = hashlib.sha256()
+    with open(fn, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if len(chunk) == 0:
+                break
+
+            h.update(chunk)
+
+    return h.hexdigest()
+
+##-Journal
+class Journal:
+    '''The journal of a run (see the module docstring).'''
+
+    def __init__(self, fn: str, resume: bool = False):
+        '''
+        Opens the journal.
+
+        - fn     : the filename of the journal ;
+        - resume : if True, the entries of the previous run are read and kept. Otherwise, the journal is started again.
+        '''
+
+        self.fn = fn
+        self.entries = {} # file name -> last entry
+        self.ids_folder = fn + '.ids' # The digests of the ids of the files (see `get_ids_fn`)
+
+        if resume and isfile(fn):
+            with open(fn, 'rb') as f:
+                data = f.read()
+
+            for line in data.split(b'\n'):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue # Empty line, or line cut by a crash
+
+                if type(entry) == dict and 'file' in entry:
+                    self.entries[entry['file']] = entry
+
+            self.fd = os.open(fn, os.O_WRONLY | os.O_APPEND)
+            if len(data) > 0 and not data.endswith(b'\n'):
+                os.write(self.fd, b'\n') # The next entry does not continue the cut line
+
+        else:
+            self.fd = os.open(fn, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_TRUNC, 0o644)
+
+            if isdir(self.ids_folder):
+                for ids_fn in os.listdir(self.ids_folder):
+                    os.remove(join(self.ids_folder, ids_fn))
+
+    def get_ids_fn(self, name: str) -> str:
+        '''
+        Returns the file where the digests of the ids of the file `name` are written (see `IdSink`), in the folder `self.ids_folder` (created if needed).
+
+        - name : the name of the file.
+        '''
+
+        os.makedirs(self.ids_folder, exist_ok=True)
+        return join(self.ids_folder, hashlib.sha256(name.encode('utf-8')).hexdigest()[:32] + '.ids')
+
+    def get_done(self, name: str, input_fn: str|None, options: dict) -> dict|None:
+        '''
+        Returns the entry of the file `name` if it was completed with the same input and options, and if its outputs are unchanged, otherwise None.
+
+        - name     : the name of the file (see `record`) ;
+        - input_fn : the file read (the MEI file, or the archive containing it), None if unknown ;
+        - options  : the options of the run changing the outputs (JSON values).
+        '''
+
+        entry = self.entries.get(name)
+        if entry == None or entry.get('options') != options:
+            return None
+
+        if input_fn != None and (entry['input_bytes'], entry['input_mtime']) != (getsize(input_fn), getmtime(input_fn)):
+            return None
+
+        for fn, checksum in entry['outputs'].items():
+            if not isfile(fn) or file_checksum(fn) != checksum:
+                return None
+
+        return entry
+
+    def record(self, name: str, input_fn: str|None, options: dict, outputs: list[str], loadable: list[str], duration: float, extra: dict|None = None):
+        '''
+        Records that the file `name` is completed.
+
+        - name     : the name of the file (as given to the command, or 'archive/member') ;
+        - input_fn : the file read (the MEI file, or the archive containing it), None if unknown ;
+        - options  : the options changing the outputs (JSON values) ;
+        - outputs  : the output files written (their checksums are computed) ;
+        - loadable : the outputs loaded by the .cql file (see `ParserUi._get_loadable_files`) ;
+        - duration : the time spent on the file (in seconds) ;
+        - extra    : other data to record (JSON values), e.g the file of the digests of the ids and the MinHash signature.
+        '''
+
+        entry = {
+            'file': name,
+            'input_bytes': None if input_fn == None else getsize(input_fn),
+            'input_mtime': None if input_fn == None else getmtime(input_fn),
+            'options': options,
+            'outputs': {fn: file_checksum(fn) for fn in outputs},
+            'loadable': loadable,
+            'duration': duration,
+            'time': dt.now().isoformat()
+        }
+
+        if extra != None:
+            entry.update(extra)
+
+        os.write(self.fd, (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8'))
+        os.fsync(self.fd)
+
+        self.entries[name] = entry
+
+    def close(self):
+        '''Closes the journal.'''
+
+        os.close(self.fd)
@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+In-process stand-in for a Neo4j database : an in-memory property graph, and an interpreter for the subset of Cypher written by this project.
+
+Supported statements (one clause per line, statements separated by ';' at the end of a line, or one statement per text) :
+    - `CREATE (var:Label {props})` and `CREATE ((var1)-[:TYPE {props}]->(var2))` (see `make_create_string`) ;
+    - `MATCH (var:Label {key: 'value'}), ...`, at the beginning of a statement (see `ShardedCypherSink`) ;
+    - `SET var.key = value`, on a node (see `duplicates.write_cluster_tags`) ;
+    - `CREATE INDEX IF NOT EXISTS FOR (n:Label) ON (n.key)` ;
+    - `CALL db.index.fulltext.createNodeIndex('name', ['Label1', 'Label2'], ['key'])`, with or without the check of `db.indexes()` before it (see `sinks.make_fulltext_index_string`) ;
+    - `CALL apoc.cypher.runFile('path', ...)` and `CALL apoc.cypher.runSchemaFile('path', ...)` ;
+    - the `UNWIND $rows ...` queries of `Neo4jSink`.
+
+The interpreter is stricter than Neo4j : a link to an unknown variable (Neo4j would silently create an empty node),
+a MATCH that finds nothing (Neo4j would silently skip the statement) or a value that Neo4j can not parse raise a ValueError.
+
+`MemoryDriver` has the interface of the Neo4j driver used by the project, so it can replace it (URI 'memory://', see `neo4j_connection`).
+`check_graph` checks the structure of a loaded graph (counts and :NEXT chains).
+'''
+
+##-Imports
+import re
+
+##-Init
+node_re = re.compile(r'CREATE \((\w+):(\w+) (\{.*\})\)')
+link_re = re.compile(r'CREATE \(\((\w+)\)-\[:(\w+)(?: (\{.*\}))?\]->\((\w+)\)\)')
+match_re = re.compile(r"\((\w+):(\w+) \{(\w+): '([^'\\]*)'\}\)")
+index_re = re.compile(r'CREATE INDEX IF NOT EXISTS FOR \(\w+:(\w+)\) ON \(\w+\.(\w+)\)')
+fulltext_re = re.compile(r"(?:CALL db\.indexes\(\) .* )?CALL db\.index\.fulltext\.createNodeIndex\('(\w+)', \[((?:'\w+'(?:, )?)+)\], \['(\w+)'\]\)")
+set_re = re.compile(r'SET (\w+)\.(\w+) = (.+)')
+call_re = re.compile(r"CALL apoc\.cypher\.(runFile|runSchemaFile)\('([^']*)'.*\)")
+
+unwind_node_re = re.compile(r'UNWIND \$rows AS row CREATE \(n:(\w+)\) SET n = row')
+unwind_link_re = re.compile(r'UNWIND \$rows AS row MATCH \(a:(\w+) \{cypher_id: row\.a\}\), \(b:(\w+) \{cypher_id: row\.b\}\) CREATE \(a\)-\[r:(\w+)\]->\(b\) SET r = row\.props')
+
+property_re = re.compile(r'''\s*(\w+)\s*:\s*('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|[^,}]+?)\s*(,|\})''')
+number_re = re.compile(r'-?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?')
+
+escapes = {'\\': '\\', "'": "'", '"': '"', 'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f'}
+
+##-Utils
+def parse_value(s: str) -> int|float|str|bool|None:
+    '''
+    Parses a Cypher literal (number, string, boolean or null), as Neo4j does. Raises a ValueError if it is not a valid literal.
+
+    - s : the literal.
+    '''
+
+    if len(s) >= 2 and s[0] == s[-1] and s[0] in '\'"':
+        return _unescape(s[1:-1])
+
+    if s in ('true', 'false'):
+        return s == 'true'
+
+    if s == 'null':
+        return None
+
+    if number_re.fullmatch(s) == None:
+        raise ValueError(f'memory_graph: parse_value: "{s}" is not a valid Cypher literal')
+
+    if '.' in s or 'e' in s or 'E' in s:
+        return float(s)
+
+    return int(s)
+
+def _unescape(s: str) -> str:
+    '''Replaces the Cypher escape sequences (e.g '\\n') in the string `s`.'''
+
+    if '\\' not in s:
+        return s
+
+    res = []
+    k = 0
+    while k < len(s):
+        if s[k] == '\\' and k + 1 < len(s):
+            if s[k + 1] == 'u':
+                res.append(chr(int(s[k + 2:k + 6], 16)))
+                k += 6
+                continue
+
+            if s[k + 1] not in escapes:
+                raise ValueError(f'memory_graph: invalid escape sequence "\\{s[k + 1]}" in string "{s}"')
+
+            res.append(escapes[s[k + 1]])
+            k += 2
+
+        else:
+            res.append(s[k])
+            k += 1
+
+    return ''.join(res)
+
+def parse_map(s: str) -> dict:
+    '''
+    Parses a Cypher map of literals (e.g "{id: 'a', dur: 4}", see `format_data`). Raises a ValueError if it is not valid.
+
+    - s : the map.
+    '''
+
+    props = {}
+    if s.strip() == '{}':
+        return props
+
+    pos = s.index('{') + 1
+    while True:
+        m = property_re.match(s, pos)
+        if m == None:
+            raise ValueError(f'memory_graph: parse_map: could not parse "{s[pos:pos + 50]}" in map "{s[:100]}"')
+
+        props[m.group(1)] = parse_value(m.group(2))
+        pos = m.end()
+
+        if m.group(3) == '}':
+            break
+
+    if s[pos:].strip() != '':
+        raise ValueError(f'memory_graph: parse_map: unexpected "{s[pos:]}" after map')
+
+    return props
+
+##-Graph
+class MemoryGraph:
+    '''
+    An in-memory property graph : nodes with one label, and directed relationships with a type.
+    The nodes and relationships are referenced by their index.
+    '''
+
+    def __init__(self):
+        '''Initiates an empty graph.'''
+
+        self.labels = [] # self.labels[k] is the label of the node k
+        self.nodes = [] # self.nodes[k] is the dict of properties of the node k
+        self.by_label = {} # label -> list of node indexes
+
+        self.rels = [] # self.rels[k] is the relationship k : (type, start node, end node, properties)
+        self.out_rels = [] # self.out_rels[k] is the list of the relationships starting from the node k
+        self.in_rels = [] # Same, for the relationships ending on the node k
+
+        self.indexes = {} # (label, key) -> {value: node index}
+        self.fulltext_indexes = {} # name -> (labels, key)
+
+    def add_node(self, label: str, props: dict) -> int:
+        '''
+        Creates a node, and returns its index.
+
+        - label : the label of the node ;
+        - props : the properties of the node.
+        '''
+
+        k = len(self.nodes)
+
+        self.labels.append(label)
+        self.nodes.append(props)
+        self.by_label.setdefault(label, []).append(k)
+        self.out_rels.append([])
+        self.in_rels.append([])
+
+        for (l, key), index in self.indexes.items():
+            if l == label and key in props:
+                index[props[key]] = k
+
+        return k
+
+    def add_rel(self, type_: str, start: int, end: int, props: dict) -> int:
+        '''
+        Creates a relationship, and returns its index.
+
+        - type_ : the type of the relationship ;
+        - start : the index of the start node ;
+        - end   : the index of the end node ;
+        - props : the properties of the relationship.
+        '''
+
+        k = len(self.rels)
+
+        self.rels.append((type_, start, end, props))
+        self.out_rels[start].append(k)
+        self.in_rels[end].append(k)
+
+        return k
+
+    def create_index(self, label: str, key: str):
+        '''
+        Creates an index on the property `key` of the nodes with label `label` (nothing is done if it already exists).
+
+        - label : the label ;
+        - key   : the property.
+        '''
+
+        if (label, key) in self.indexes:
+            return
+
+        index = {}
+        for k in self.by_label.get(label, []):
+            if key in self.nodes[k]:
+                index[self.nodes[k][key]] = k
+
+        self.indexes[(label, key)] = index
+
+    def create_fulltext_index(self, name: str, labels: tuple[str, ...], key: str):
+        '''
+        Creates a full-text index named `name` on the property `key` of the nodes with one of the `labels` (nothing is done if it already exists).
+
+        - name   : the name of the index ;
+        - labels : the labels ;
+        - key    : the property.
+        '''
+
+        if name not in self.fulltext_indexes:
+            self.fulltext_indexes[name] = (tuple(labels), key)
+
+    def search_fulltext(self, name: str, words: str) -> list[int]:
+        '''
+        Returns the nodes of the full-text index `name` whose property contains all the `words` (ignoring the case).
+        Unlike Neo4j, the nodes are scanned, and they are not sorted by relevance.
+
+        - name  : the name of the index (see `create_fulltext_index`) ;
+        - words : the searched words (the punctuation is ignored).
+        '''
+
+        labels, key = self.fulltext_indexes[name]
+        words = re.findall(r'\w+', words.lower())
+
+        return [
+            k
+            for label in labels for k in self.by_label.get(label, [])
+            if all(w in re.findall(r'\w+', str(self.nodes[k].get(key, '')).lower()) for w in words)
+        ]
+
+    def find_node(self, label: str, key: str, value) -> int|None:
+        '''
+        Returns the index of a node with label `label` and `key` = `value`, or None if there is none.
+        It uses an index if there is one (see `create_index`), otherwise it scans all the nodes with this label.
+        '''
+
+        if (label, key) in self.indexes:
+            return self.indexes[(label, key)].get(value)
+
+        for k in self.by_label.get(label, []):
+            if self.nodes[k].get(key) == value:
+                return k
+
+        return None
+
+    def out_neighbours(self, k: int, type_: str) -> list[tuple[int, dict]]:
+        '''Returns the end nodes and properties of the relationships of type `type_` starting from the node `k`.'''
+
+        return [(self.rels[r][2], self.rels[r][3]) for r in self.out_rels[k] if self.rels[r][0] == type_]
+
+    def count_nodes(self) -> dict[str, int]:
+        '''Returns the number of nodes per label.'''
+
+        return {label: len(l) for label, l in self.by_label.items()}
+
+    def count_rels(self) -> dict[str, int]:
+        '''Returns the number of relationships per type.'''
+
+        counts = {}
+        for type_, _, _, _ in self.rels:
+            counts[type_] = counts.get(type_, 0) + 1
+
+        return counts
+
+##-Interpreter
+class CypherInterpreter:
+    '''Runs the subset of Cypher described in the module docstring on a `MemoryGraph`.'''
+
+    def __init__(self, graph: MemoryGraph|None = None):
+        '''
+        Initiates the interpreter.
+
+        - graph : the graph to write to (a new one if None).
+        '''
+
+        self.graph = MemoryGraph() if graph == None else graph
+        self.nb_statements = 0 # Number of statements run
+        self.nb_clauses = 0 # Number of clauses run (lines)
+
+    def run(self, text: str, params: dict|None = None):
+        '''
+        Runs the statements of `text`.
+
+        - text   : the Cypher text ;
+        - params : the parameters of the query (`$rows` for the `UNWIND` queries).
+        '''
+
+        if params != None and 'rows' in params:
+            self._run_unwind(text.strip(), params['rows'])
+            return
+
+        variables = {} # Variables of the current statement -> node index
+
+        for line in text.split('\n'):
+            line = line.strip()
+            if line == '':
+                continue
+
+            end_of_statement = line.endswith(';')
+            if end_of_statement:
+                line = line[:-1].rstrip()
+
+            self._run_clause(line, variables)
+
+            if end_of_statement:
+                variables = {}
+                self.nb_statements += 1
+
+        if len(variables) > 0:
+            self.nb_statements += 1
+
+    def run_file(self, fn: str):
+        '''Runs the statements of the file `fn`.'''
+
+        with open(fn) as f:
+            self.run(f.read())
+
+    def _run_clause(self, line: str, variables: dict[str, int]):
+        '''
+        Runs one clause.
+
+        - line      : the clause ;
+        - variables : the variables of the current statement (variable -> node index), updated by the clause.
+        '''
+
+        self.nb_clauses += 1
+        g = self.graph
+
+        m = node_re.fullmatch(line)
+        if m != None:
+            var, label, props = m.groups()
+            if var in variables:
+                raise ValueError(f'CypherInterpreter: variable "{var}" already declared')
+
+            variables[var] = g.add_node(label, parse_map(props))
+            return
+
+        m = link_re.fullmatch(line)
+        if m != None:
+            var1, type_, props, var2 = m.groups()
+            for v in (var1, var2):
+                if v not in variables:
+                    raise ValueError(f'CypherInterpreter: variable "{v}" not defined in the statement (Neo4j would create an empty node) : {line}')
+
+            g.add_rel(type_, variables[var1], variables[var2], {} if props == None else parse_map(props))
+            return
+
+        if line.startswith('MATCH '):
+            for var, label, key, value in match_re.findall(line):
+                k = g.find_node(label, key, value)
+                if k == None:
+                    raise ValueError(f'CypherInterpreter: MATCH found no {label} node with {key} = "{value}"')
+
+                variables[var] = k
+            return
+
+        m = set_re.fullmatch(line)
+        if m != None:
+            var, key, value = m.groups()
+            if var not in variables:
+                raise ValueError(f'CypherInterpreter: variable "{var}" not defined in the statement : {line}')
+
+            g.nodes[variables[var]][key] = parse_value(value)
+            return
+
+        m = index_re.fullmatch(line)
+        if m != None:
+            g.create_index(*m.groups())
+            return
+
+        m = fulltext_re.fullmatch(line)
+        if m != None:
+            name, labels, key = m.groups()
+            g.create_fulltext_index(name, re.findall(r"'(\w+)'", labels), key)
+            return
+
+        m = call_re.fullmatch(line)
+        if m != None:
+            self.run_file(m.group(2))
+            return
+
+        raise ValueError(f'CypherInterpreter: unsupported clause : {line[:100]}')
+
+    def _run_unwind(self, query: str, rows: list[dict]):
+        '''
+        Runs an `UNWIND $rows` query of `Neo4jSink`.
+
+        - query : the query ;
+        - rows  : the value of the parameter `$rows`.
+        '''
+
+        g = self.graph
+        self.nb_statements += 1
+
+        m = unwind_node_re.fullmatch(query)
+        if m != None:
+            for row in rows:
+                g.add_node(m.group(1), dict(row))
+            self.nb_clauses += len(rows)
+            return
+
+        m = unwind_link_re.fullmatch(query)
+        if m != None:
+            label1, label2, type_ = m.groups()
+            for row in rows:
+                a, b = g.find_node(label1, 'cypher_id', row['a']), g.find_node(label2, 'cypher_id', row['b'])
+                if a == None or b == None:
+                    raise ValueError(f'CypherInterpreter: no node found for the link {row["a"]} -[:{type_}]-> {row["b"]}')
+
+                g.add_rel(type_, a, b, dict(row['props']))
+            self.nb_clauses += len(rows)
+            return
+
+        raise ValueError(f'CypherInterpreter: unsupported query : {query[:100]}')
+
+##-Driver
+class MemorySession:
+    '''Session of `MemoryDriver`, with the methods of a Neo4j session used by the project.'''
+
+    def __init__(self, interpreter: CypherInterpreter):
+        '''Initiates the session.'''
+
+        self.interpreter = interpreter
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def run(self, query: str, **params) -> list:
+        '''Runs the query (see `CypherInterpreter.run`). Nothing is returned by the supported queries.'''
+
+        self.interpreter.run(query, params)
+        return []
+
+class MemoryDriver:
+    '''Replaces the Neo4j driver : the queries are run on an in-memory graph (see `CypherInterpreter`).'''
+
+    def __init__(self):
+        '''Initiates the driver, with an empty graph.'''
+
+        self.interpreter = CypherInterpreter()
+        self.graph = self.interpreter.graph
+
+    def session(self) -> MemorySession:
+        return MemorySession(self.interpreter)
+
+    def close(self):
+        pass
+
+##-Checks
+def check_graph(graph: MemoryGraph) -> list[str]:
+    '''
+    Checks the structure of a loaded graph, and returns the problems found (an empty list if there is none) :
+        - each Voice has one first event (:timeSeries) ;
+        - following the :NEXT links (without the ones skipping grace notes) from it visits, in order of `start`, all the events
+          of the voice (same `voice_nb`, in the measures of the same TopRhythmic) once, and ends with the 'END' event ;
+        - if the chain in the order of the performance was written (:PERF_NEXT, see `TopRhythmic.performance_to_sink`),
+          following its links in the order of their `order` from the first event ends with the 'END' event ;
+        - each Event is in one Measure (:HAS).
+
+    - graph : the graph.
+    '''
+
+    problems = []
+
+    def get_parent(k: int, type_: str) -> int|None:
+        '''Returns the start node of the first link of type `type_` ending on the node `k` (None if there is none).'''
+
+        return next((graph.rels[r][1] for r in graph.in_rels[k] if graph.rels[r][0] == type_), None)
+
+    # The voice of each event, without relying on the properties of the file (not exported with some profiles, see `profiles.py`) :
+    # event -> (its TopRhythmic, voice_nb)
+    voice_keys = {}
+
+    # Events of each voice : (TopRhythmic, voice_nb) -> number of events
+    nb_events = {}
+    for k in graph.by_label.get('Event', []):
+        e = graph.nodes[k]
+
+        measure = get_parent(k, 'HAS')
+        if measure == None:
+            problems.append(f'Event {e.get("cypher_id")} is not in a Measure')
+
+        key = (None if measure == None else get_parent(measure, 'RHYTHMIC'), e.get('voice_nb'))
+        voice_keys[k] = key
+        nb_events[key] = nb_events.get(key, 0) + 1
+
+    for v in graph.by_label.get('Voice', []):
+        voice = graph.nodes[v]
+        name = voice.get('cypher_id')
+        top_rhythmic = graph.out_neighbours(v, 'RHYTHMIC')
+        key = (top_rhythmic[0][0] if len(top_rhythmic) > 0 else None, voice.get('staff_number'))
+
+        first = graph.out_neighbours(v, 'timeSeries')
+        if len(first) != 1:
+            problems.append(f'Voice {name} has {len(first)} first events (:timeSeries) instead of 1')
+            continue
+
+        # Follow the chain
+        seen = set()
+        k = first[0][0]
+        last_start = None
+        while True:
+            e = graph.nodes[k]
+            if k in seen:
+                problems.append(f'Voice {name} : the :NEXT chain has a cycle at {e.get("cypher_id")}')
+                break
+
+            seen.add(k)
+
+            if voice_keys.get(k) != key:
+                problems.append(f'Voice {name} : the :NEXT chain goes to {e.get("cypher_id")}, in another voice')
+
+            if last_start != None and e.get('start', 0) < last_start:
+                problems.append(f'Voice {name} : {e.get("cypher_id")} starts before the previous event of the :NEXT chain')
+            last_start = e.get('start', 0)
+
+            nexts = [n for n, props in graph.out_neighbours(k, 'NEXT') if 'grace_bypass' not in props]
+            if len(nexts) == 0:
+                break
+
+            if len(nexts) > 1:
+                problems.append(f'Voice {name} : {e.get("cypher_id")} has {len(nexts)} :NEXT links')
+            k = nexts[0]
+
+        if graph.nodes[k].get('type') != 'END':
+            problems.append(f'Voice {name} : the :NEXT chain ends with {graph.nodes[k].get("cypher_id")}, which is not an END event')
+
+        if len(seen) != nb_events.get(key, 0):
+            problems.append(f'Voice {name} : the :NEXT chain has {len(seen)} events, but the voice has {nb_events.get(key, 0)}')
+
+        # Follow the chain of the performance
+        k = first[0][0]
+        n = 0
+        while True:
+            nexts = [m for m, props in graph.out_neighbours(k, 'PERF_NEXT') if props.get('order') == n + 1]
+            if len(nexts) == 0:
+                break
+
+            if len(nexts) > 1:
+                problems.append(f'Voice {name} : {graph.nodes[k].get("cypher_id")} has {len(nexts)} :PERF_NEXT links with the order {n + 1}')
+            k = nexts[0]
+            n += 1
+
+        if n > 0 and graph.nodes[k].get('type') != 'END':
+            problems.append(f'Voice {name} : the :PERF_NEXT chain ends with {graph.nodes[k].get("cypher_id")}, which is not an END event')
+
+    return problems
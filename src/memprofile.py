@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Memory profile of the conversion of a file (see the option `--memprofile`).
+
+The allocations are traced with `tracemalloc`, and a snapshot is taken at the end of each phase :
+    - parse  : the graph is built (not with `--stream`, where the file is parsed while exporting) ;
+    - export : all the nodes and links have been sent to the outputs, that still hold their buffers ;
+    - write  : the outputs are written and closed.
+For each phase, the profile gives the memory allocated (and the peak during the phase), and the source lines that allocated the most
+(the new allocations since the previous phase).
+
+After the parse, the objects of the graph are also counted by class, with their size (the object, its attributes and its containers),
+and the strings of the attributes repeated in each node (`source`, `inputfile`, `cypher_id`, ...) are measured, with the size they would take
+if each value was stored once.
+'''
+
+##-Imports
+from fractions import Fraction
+import os
+import sys
+import tracemalloc
+
+from src.sinks import Sink
+
+##-Init
+top_lines = 10 # The number of source lines kept for each phase
+
+##-Graph
+def count_graph(score, top_rhythmic) -> tuple[dict[str, dict], dict[str, dict]]:
+    '''
+    Counts the objects of a parsed graph by class, and measures the strings of their attributes.
+
+    - score        : the `Score` ;
+    - top_rhythmic : the `TopRhythmic`.
+
+    Output: (classes, strings), where :
+        - classes : class name -> {'count', 'bytes'}, with the size of the objects, their `__dict__`, and the values and containers of their attributes
+                    (the objects of the graph referenced by an attribute are counted in their own class, and a value shared by several objects only once) ;
+        - strings : attribute name -> {'count', 'bytes', 'unique_bytes'}, for the attributes holding strings : the number of values,
+                    the size of the string objects (shared objects counted once), and the size of the distinct values (if they were all shared).
+    '''
+
+    classes = {}
+    strings = {}
+    seen = set() # The ids of the objects already counted (nodes and values)
+    distinct = {} # attribute name -> set of the values
+
+    stack = [score, top_rhythmic]
+    while len(stack) > 0:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+
+        seen.add(id(obj))
+
+        size = sys.getsizeof(obj) + sys.getsizeof(obj.__dict__)
+
+        for attr, v in obj.__dict__.items():
+            if isinstance(v, str):
+                s = strings.setdefault(attr, {'count': 0, 'bytes': 0, 'unique_bytes': 0})
+                s['count'] += 1
+
+                if id(v) not in seen:
+                    seen.add(id(v))
+                    size += sys.getsizeof(v)
+                    s['bytes'] += sys.getsizeof(v)
+
+                values = distinct.setdefault(attr, set())
+                if v not in values:
+                    values.add(v)
+                    s['unique_bytes'] += sys.getsizeof(v)
+
+            elif isinstance(v, (int, float, Fraction)):
+                if id(v) not in seen:
+                    seen.add(id(v))
+                    size += sys.getsizeof(v)
+
+            elif isinstance(v, (list, tuple)):
+                size += sys.getsizeof(v)
+
+                for x in v:
+                    if isinstance(x, list): # The events of a measure, by voice
+                        size += sys.getsizeof(x)
+                        stack += [y for y in x if hasattr(y, '__dict__')]
+
+                    elif hasattr(x, '__dict__'):
+                        stack.append(x)
+
+            elif hasattr(v, '__dict__'):
+                stack.append(v)
+
+        c = classes.setdefault(type(obj).__name__, {'count': 0, 'bytes': 0})
+        c['count'] += 1
+        c['bytes'] += size
+
+    return classes, strings
+
+##-Profiler
+class MemProfileSink(Sink):
+    '''
+    Traces the allocations during the conversion of a file, and takes the snapshots of its phases (see the module docstring).
+    It is a sink so that it is closed (end of the phase 'export') before the other outputs : it has to be the first sink of the export.
+    '''
+
+    name = 'memprofile'
+
+    def __init__(self, frames: int = 1):
+        '''
+        Starts tracing the allocations.
+
+        - frames : the number of frames kept for each allocation (1 gives the source line that allocated).
+        '''
+
+        self.phases = []
+        self.classes = None
+        self.strings = None
+        self.notes = 0
+
+        self.previous = None # The last snapshot
+        self.started = not tracemalloc.is_tracing() # False if the allocations were already traced (then the tracing is not stopped at the end)
+
+        if self.started:
+            tracemalloc.start(frames)
+
+        tracemalloc.reset_peak()
+        self.base = tracemalloc.get_traced_memory()[0]
+
+    def node(self, cypher_id: str, label: str, data: dict):
+        if label == 'Fact' and data.get('type_') == 'note':
+            self.notes += 1
+
+    def link(self, id1: str, id2: str, type_: str, data: dict|None = None):
+        pass
+
+    def close(self):
+        self.snapshot('export')
+
+    def abort(self):
+        self.stop()
+
+    def snapshot(self, phase: str):
+        '''
+        Ends the phase `phase` : records the memory allocated since the start and the peak during the phase,
+        and the source lines that allocated the most since the previous phase.
+
+        - phase : the name of the phase.
+        '''
+
+        current, peak = tracemalloc.get_traced_memory()
+
+        snap = tracemalloc.take_snapshot()
+
+        if self.previous == None:
+            stats = snap.statistics('lineno')
+        else:
+            stats = snap.compare_to(self.previous, 'lineno')
+
+        # Without the allocations of the profiler (filtered after grouping them by line, as `Snapshot.filter_traces` is slow)
+        stats = [s for s in stats if s.traceback[0].filename not in (tracemalloc.__file__, __file__, '<unknown>') and not s.traceback[0].filename.startswith('<frozen importlib')]
+
+        lines = []
+        for s in sorted(stats, key=lambda s: -(s.size_diff if self.previous != None else s.size))[:top_lines]:
+            frame = s.traceback[0]
+            fn = frame.filename
+            if fn.startswith(os.getcwd() + os.sep):
+                fn = os.path.relpath(fn)
+
+            lines.append({
+                'line': f'{fn}:{frame.lineno}',
+                'bytes': s.size_diff if self.previous != None else s.size,
+                'count': s.count_diff if self.previous != None else s.count
+            })
+
+        self.phases.append({'phase': phase, 'bytes': current - self.base, 'peak': peak - self.base, 'lines': lines})
+
+        self.previous = snap
+        tracemalloc.reset_peak()
+
+    def count_graph(self, score, top_rhythmic):
+        '''
+        Counts the objects of the parsed graph (see `count_graph`).
+
+        - score        : the `Score` ;
+        - top_rhythmic : the `TopRhythmic`.
+        '''
+
+        self.classes, self.strings = count_graph(score, top_rhythmic)
+
+    def stop(self):
+        '''Stops tracing the allocations (if the tracing was started by this profiler).'''
+
+        self.previous = None
+
+        if self.started and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def get_report(self) -> dict:
+        '''
+        Returns the profile : the phases, the classes and the strings (see `count_graph`), the number of notes,
+        `bytes_per_note` (the memory of the graph : at the end of the parse, or of the export with `--stream`)
+        and `peak_per_note` (the highest peak of the phases), divided by the number of notes.
+        '''
+
+        phases = {p['phase']: p for p in self.phases}
+        graph = phases.get('parse', phases.get('export'))
+        notes = max(self.notes, 1)
+
+        return {
+            'notes': self.notes,
+            'bytes_per_note': None if graph == None else graph['bytes'] / notes,
+            'peak_per_note': max((p['peak'] for p in self.phases), default=0) / notes,
+            'phases': self.phases,
+            'classes': self.classes,
+            'strings': self.strings
+        }
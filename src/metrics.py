@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Counters of a conversion run (files, notes, bytes, errors, durations), written periodically in the text format of Prometheus,
+so that the file can be read by the textfile collector of the node exporter (see https://prometheus.io/docs/instrumenting/exposition_formats/).
+'''
+
+##-Imports
+from time import monotonic, time
+import os
+
+from src.sinks import Sink
+from src.utils import get_log_counts
+
+##-Init
+prefix = 'musypher_' # Prefix of the names of the metrics
+
+##-Sink
+class CountSink(Sink):
+    '''Counts the nodes (by label), the notes and the links of a file.'''
+
+    name = 'counts'
+
+    def __init__(self):
+        '''Initiates the sink.'''
+
+        self.nodes = {} # label -> number of nodes
+        self.notes = 0
+        self.links = 0
+
+    def node(self, cypher_id: str, label: str, data: dict):
+        self.nodes[label] = self.nodes.get(label, 0) + 1
+
+        if label == 'Fact' and data.get('type_') == 'note':
+            self.notes += 1
+
+    def link(self, id1: str, id2: str, type_: str, data: dict|None = None):
+        self.links += 1
+
+##-Metrics
+class RunMetrics:
+    '''The counters of a run, and their export (see the module docstring).'''
+
+    def __init__(self, fn: str, interval: float = 10.):
+        '''
+        Initiates the counters.
+
+        - fn       : the file where the metrics are written (usually ending with '.prom') ;
+        - interval : the minimum time between two writes of the file by `update` (in seconds).
+        '''
+
+        self.fn = fn
+        self.interval = interval
+
+        self.files = {'converted': 0, 'failed': 0}
+        self.nodes = {} # label -> number of nodes
+        self.notes = 0
+        self.links = 0
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.duration_sum = 0.
+        self.duration_max = 0.
+
+        self.start_time = time()
+        self.last_write = None
+
+    def add_file(self, ok: bool, duration: float, input_bytes: int = 0, output_bytes: int = 0, counts: CountSink|None = None):
+        '''
+        Counts a processed file, and writes the metrics if the last write is older than `interval` (see `update`).
+
+        - ok           : True if the file was converted, False if it failed (or was canceled) ;
+        - duration     : the time spent on the file (in seconds) ;
+        - input_bytes  : the size of the MEI file ;
+        - output_bytes : the size of its outputs ;
+        - counts       : the `CountSink` of the file, None if unknown.
+        '''
+
+        self.files['converted' if ok else 'failed'] += 1
+        self.input_bytes += input_bytes
+        self.output_bytes += output_bytes
+        self.duration_sum += duration
+        self.duration_max = max(self.duration_max, duration)
+
+        if counts != None:
+            for label, n in counts.nodes.items():
+                self.nodes[label] = self.nodes.get(label, 0) + n
+
+            self.notes += counts.notes
+            self.links += counts.links
+
+        self.update()
+
+    def update(self, force: bool = False):
+        '''
+        Writes the metrics if the last write is older than `interval`.
+
+        - force : if True, write them anyway (e.g at the end of the run).
+        '''
+
+        if force or self.last_write == None or monotonic() - self.last_write >= self.interval:
+            self.write()
+
+    def write(self):
+        '''Writes the metrics in `fn`, atomically (the collector never reads a partial file).'''
+
+        tmp_fn = self.fn + '.tmp'
+        with open(tmp_fn, 'w') as f:
+            f.write(self.to_prometheus())
+
+        os.replace(tmp_fn, self.fn)
+        self.last_write = monotonic()
+
+    def to_prometheus(self) -> str:
+        '''Returns the metrics in the text format of Prometheus.'''
+
+        nb_files = sum(self.files.values())
+        elapsed = time() - self.start_time
+
+        metrics = [ # (name, type, help, samples), with the samples as (suffix of the name, labels, value)
+            ('files_total', 'counter', 'Files processed, by result.', [('', f'result="{k}"', v) for k, v in self.files.items()]),
+            ('notes_total', 'counter', 'Notes written.', [('', '', self.notes)]),
+            ('nodes_total', 'counter', 'Nodes written, by label.', [('', f'label="{k}"', v) for k, v in sorted(self.nodes.items())]),
+            ('links_total', 'counter', 'Links written.', [('', '', self.links)]),
+            ('input_bytes_total', 'counter', 'Size of the files processed.', [('', '', self.input_bytes)]),
+            ('output_bytes_total', 'counter', 'Size of the outputs written.', [('', '', self.output_bytes)]),
+            ('log_messages_total', 'counter', 'Messages logged by the main process, by level.', [('', f'level="{k}"', v) for k, v in sorted(get_log_counts().items())]),
+            ('file_duration_seconds', 'summary', 'Time spent per file.', [('_sum', '', self.duration_sum), ('_count', '', nb_files)]),
+            ('file_duration_seconds_max', 'gauge', 'Longest time spent on a file.', [('', '', self.duration_max)]),
+            ('files_per_second', 'gauge', 'Average throughput of the run.', [('', '', nb_files / elapsed if elapsed > 0 else 0)]),
+            ('run_start_time_seconds', 'gauge', 'Start of the run (Unix time).', [('', '', self.start_time)]),
+            ('last_update_time_seconds', 'gauge', 'Last write of this file (Unix time).', [('', '', time())])
+        ]
+
+        lines = []
+        for name, type_, help_, samples in metrics:
+            lines.append(f'# HELP {prefix}{name} {help_}')
+            lines.append(f'# TYPE {prefix}{name} {type_}')
+
+            for suffix, labels, v in samples:
+                lines.append(f'{prefix}{name}{suffix}' + ('' if labels == '' else '{' + labels + '}') + f' {v}')
+
+        return '\n'.join(lines) + '\n'
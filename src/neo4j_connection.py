@@ -1,7 +1,12 @@
-from neo4j import GraphDatabase
+from src.memory_graph import MemoryDriver
 
-# Function to connect to the Neo4j database
+# Function to connect to the Neo4j database (the URI 'memory://' gives an in-memory stand-in, see `memory_graph`)
 def connect_to_neo4j(uri, user, password):
+    if uri.startswith('memory://'):
+        return MemoryDriver()
+
+    from neo4j import GraphDatabase # Only needed for a real database
+
     driver = GraphDatabase.driver(uri, auth=(user, password))
     return driver
 
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Runs the conversion of a corpus in several processes, with files of very different sizes.
+
+The files are started from the largest to the smallest, so that the big ones do not end the run alone.
+The estimated memory of the files in progress is kept under a budget : when the next file does not fit,
+a smaller one is started instead (if there is one that fits).
+Each file runs in its own process, which is killed if it takes longer than the timeout.
+The process is the leader of its own process group, so the processes it starts (e.g the workers of `-J`) are killed with it.
+The result of a process is read as soon as it is sent (before the process ends), so a large result never blocks it on a full pipe.
+The failed files are retried, and then put in a dead-letter list instead of stopping the run.
+'''
+
+##-Imports
+from multiprocessing import Process, Pipe
+from multiprocessing.connection import wait
+from os import cpu_count
+from time import perf_counter
+import os
+import signal
+import traceback
+
+from src.utils import log, flush_log
+
+##-Init
+memory_factor = 20 # Estimation of the memory used to convert a MEI file, relatively to its size (measured on synthetic and real scores)
+
+##-Task
+class Task:
+    '''A file to process.'''
+
+    def __init__(self, name: str, size: int, args: tuple):
+        '''
+        Initiates the task.
+
+        - name : the name of the file (used in the logs and in the dead-letter list) ;
+        - size : the size of the file, in bytes ;
+        - args : the arguments given to the function of the scheduler.
+        '''
+
+        self.name = name
+        self.size = size
+        self.args = args
+
+        self.memory = size * memory_factor # Estimated memory used when processing the file
+
+        self.tries = 0
+        self.error = None # The error of the last try
+        self.result = None
+        self.time = 0.0 # The duration of the last try, in seconds
+
+def _run_task(func, args: tuple, conn):
+    '''
+    Runs `func(*args)` in a child process, and sends the result through `conn`.
+
+    - func : the function ;
+    - args : its arguments ;
+    - conn : the connection to the parent process.
+    '''
+
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp() # Its own process group, killed as a whole (see `Scheduler._kill`)
+
+    try:
+        conn.send(('ok', func(*args)))
+
+    except BaseException:
+        conn.send(('error', traceback.format_exc(limit=3).strip().split('\n')[-1]))
+
+    finally:
+        conn.close()
+        flush_log() # The child process does not write its logs at exit
+
+##-Scheduler
+class Scheduler:
+    '''Runs a function on each task, in separate processes (see the module docstring).'''
+
+    def __init__(self, func, jobs: int|None = None, memory_budget: int|None = None, timeout: float|None = None, retries: int = 1, verbose: bool = False, on_result=None):
+        '''
+        Initiates the scheduler.
+
+        - func          : the function run for each task (`func(*task.args)`). It has to be defined at the top level of a module ;
+        - jobs          : the maximum number of processes at the same time (None to use the number of CPUs) ;
+        - memory_budget : the maximum total estimated memory of the tasks in progress, in bytes (None for no limit).
+                          A task that needs more than the budget is run alone ;
+        - timeout       : the maximum duration of a task, in seconds (None for no limit) ;
+        - retries       : the number of times a failed task is tried again before being put in the dead-letter list ;
+        - verbose       : if True, log when a task starts ;
+        - on_result     : if not None, a function called with each task when it is done or dead (e.g to count the results during the run).
+        '''
+
+        self.func = func
+        self.jobs = jobs or cpu_count() or 1
+        self.memory_budget = memory_budget
+        self.timeout = timeout
+        self.retries = retries
+        self.verbose = verbose
+        self.on_result = on_result
+
+    def run(self, tasks: list[Task]) -> tuple[list[Task], list[Task]]:
+        '''
+        Runs all the tasks, and returns when they are all done or dead.
+
+        - tasks : the tasks.
+
+        Output: the list of the tasks done (in order of completion), and the dead-letter list (tasks that failed `retries + 1` times).
+        '''
+
+        pending = sorted(tasks, key=lambda t: -t.size)
+        running = {} # sentinel -> (task, process, connection, start time)
+        messages = {} # sentinel -> message received from the process (None if its connection was closed without message)
+        done, dead = [], []
+        nb_tasks = len(tasks)
+
+        try:
+            while len(pending) > 0 or len(running) > 0:
+                #---Start the tasks that fit
+                while len(running) < self.jobs:
+                    task = self._pop_next(pending, [t for t, _, _, _ in running.values()])
+                    if task == None:
+                        break
+
+                    task.tries += 1
+                    parent_conn, child_conn = Pipe(duplex=False)
+                    p = Process(target=_run_task, args=(self.func, task.args, child_conn))
+                    p.start()
+                    child_conn.close()
+
+                    running[p.sentinel] = (task, p, parent_conn, perf_counter())
+
+                    if self.verbose:
+                        log('info', f'Scheduler: started "{task.name}" ({task.size} bytes, try {task.tries}), {len(running)} running')
+
+                #---Wait for a task to end (or for the next timeout)
+                wait_time = None
+                if self.timeout != None:
+                    now = perf_counter()
+                    wait_time = max(0, min(t0 + self.timeout - now for _, _, _, t0 in running.values()))
+
+                conns = {conn: sentinel for sentinel, (_, _, conn, _) in running.items() if sentinel not in messages}
+                ready = wait(list(running.keys()) + list(conns.keys()), wait_time)
+
+                #---Read the results sent (the process can only end once its result is read)
+                for conn, sentinel in conns.items():
+                    if conn in ready:
+                        messages[sentinel] = self._read_message(conn)
+
+                #---Handle ended and timed out tasks
+                now = perf_counter()
+                for sentinel in list(running.keys()):
+                    task, p, conn, t0 = running[sentinel]
+
+                    if sentinel in ready:
+                        if sentinel not in messages and conn.poll():
+                            messages[sentinel] = self._read_message(conn)
+
+                        task.result, task.error = self._get_result(p, messages.get(sentinel))
+
+                    elif self.timeout != None and now - t0 >= self.timeout:
+                        self._kill(p)
+
+                        if messages.get(sentinel) != None: # The result was sent, the process was just ending
+                            task.result, task.error = self._get_result(p, messages[sentinel])
+                        else:
+                            task.result, task.error = None, f'timeout ({self.timeout}s)'
+
+                    else:
+                        continue
+
+                    conn.close()
+                    task.time = now - t0
+                    del running[sentinel]
+                    messages.pop(sentinel, None)
+
+                    if task.error == None:
+                        done.append(task)
+
+                    elif task.tries <= self.retries:
+                        log('warn', f'Scheduler: "{task.name}" failed ({task.error}), it will be tried again')
+                        pending.append(task) # At the end : the other files go first
+
+                    else:
+                        log('error', f'Scheduler: "{task.name}" failed ({task.error}), it is put in the dead-letter list')
+                        dead.append(task)
+
+                    if self.on_result != None and (task.error == None or task in dead):
+                        self.on_result(task)
+
+                    log('info', f'Scheduler: {len(done) + len(dead)}/{nb_tasks} files processed ({round((len(done) + len(dead)) / nb_tasks * 100)}% done)')
+
+        except BaseException: # e.g KeyboardInterrupt : the processes are in their own groups, so they do not get it
+            for _, p, _, _ in running.values():
+                self._kill(p)
+
+            raise
+
+        return done, dead
+
+    def _pop_next(self, pending: list[Task], running: list[Task]) -> Task|None:
+        '''
+        Removes and returns the largest pending task that fits in the memory budget, or None if there is none.
+
+        - pending : the pending tasks, sorted by decreasing size (except the retried ones, at the end) ;
+        - running : the tasks in progress.
+        '''
+
+        if len(running) == 0 and len(pending) > 0:
+            return pending.pop(0) # Always run something, even if it is bigger than the budget
+
+        if self.memory_budget == None:
+            return pending.pop(0) if len(pending) > 0 else None
+
+        free = self.memory_budget - sum(t.memory for t in running)
+        for k, t in enumerate(pending):
+            if t.memory <= free:
+                return pending.pop(k)
+
+        return None
+
+    def _kill(self, p: Process):
+        '''
+        Kills the process `p` and the processes it started (its process group, see `_run_task`), and waits for its end.
+
+        - p : the process.
+        '''
+
+        try:
+            os.killpg(p.pid, signal.SIGKILL)
+        except (AttributeError, ProcessLookupError, PermissionError): # No process groups (Windows), or already ended
+            p.kill()
+
+        p.join()
+
+    def _read_message(self, conn) -> tuple|None:
+        '''
+        Reads the message sent by a process (its whole result), or returns None if the connection was closed without message.
+
+        - conn : the connection from the process, ready to be read.
+        '''
+
+        try:
+            return conn.recv()
+        except EOFError:
+            return None
+
+    def _get_result(self, p: Process, msg: tuple|None) -> tuple:
+        '''
+        Waits for the end of the process `p`, and returns its result.
+
+        - p   : the process ;
+        - msg : the message received from the process (see `_run_task`), None if there is none.
+
+        Output: the result and the error (None if it succeeded).
+        '''
+
+        p.join()
+
+        if msg == None:
+            return None, f'process ended with exit code {p.exitcode}'
+
+        status, value = msg
+        if status == 'ok':
+            return value, None
+
+        return None, value
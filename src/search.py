@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Reference in-memory search engine over the parsed graph (`Score`, `Voice`, `Event`), to compare the shapes of the graph
+(links, precomputed properties, indexes) without loading it into Neo4j (see `bench/bench_search.py`).
+
+The melody of each voice is the sequence of its events with notes (the rests are skipped), with for each one the pitch of its first note
+(in semitones from A4, with its accidental, as `Event.bassPitch`) and its `duration`. The options of the export change this sequence
+as the links of the graph do :
+    - grace_bypass   : the grace notes are skipped (as the :NEXT links created by `-g`) ;
+    - unfold_repeats : the events are in the order they are played (as the :PERF_NEXT links, see `TopRhythmic.performance_order`).
+
+A query (see `Query`) is a sequence of intervals (in semitones, so a transposed melody matches too) and / or of durations,
+each with a tolerance. Without index, all the positions of all the melodies are compared to it.
+The indexes give the positions of each n-gram (`ngram_size` consecutive values) of the melodies :
+    - intervals : n-grams of intervals. A tolerance of t semitones looks up the (2t + 1)^n keys around the n-gram of the query ;
+    - rhythm    : n-grams of durations. With a tolerance, the keys are made of the durations of the melodies close to the ones of the query.
+The n-gram of the query with the fewest positions is used, and only these positions are compared.
+The number of values compared (`SearchEngine.compared`) measures the work of the searches, whatever the speed of Python.
+'''
+
+##-Imports
+from itertools import product
+
+from src.MeiToGraph import MeiToGraph
+from src.graph.Event import Event
+from src.utils import get_alteration
+
+##-Init
+ngram_size = 3 # Number of values (intervals or durations) in the keys of the indexes
+index_names = ('intervals', 'rhythm')
+
+##-Melodies
+def get_pitch(e: Event) -> int|None:
+    '''
+    Returns the pitch of the first note of the event `e`, in semitones from A4 (with its accidental), or None if it has no note.
+
+    - e : the `Event`.
+    '''
+
+    for f in e.facts:
+        if f.type_ == 'note' and f.class_ != None:
+            return f.halfTonesFromA4 + get_alteration(f.class_, f.accid if f.accid != None else f.accid_ges, f.key_fifths)
+
+    return None
+
+def get_voice_events(score, top_rhythmic, unfold_repeats: bool = False) -> list[list[Event]]:
+    '''
+    Returns the events of each voice of a parsed graph, in the order of the :NEXT links, or of the :PERF_NEXT links if `unfold_repeats` is True.
+
+    - score          : the `Score` ;
+    - top_rhythmic   : the `TopRhythmic` ;
+    - unfold_repeats : if True, the repeats are unfolded (see `TopRhythmic.performance_order`).
+    '''
+
+    if not unfold_repeats:
+        return [v.events for v in score.voices]
+
+    voices = [[] for v in score.voices]
+    for m in top_rhythmic.performance_order():
+        for voice_index, events in enumerate(m.events):
+            voices[voice_index] += events
+
+    return voices
+
+class Melody:
+    '''The melody of a voice : its notes, with their pitch and their duration (see the module docstring).'''
+
+    def __init__(self, source: str, voice_nb: int, events: list[Event], grace_bypass: bool = False):
+        '''
+        Initiates the melody.
+
+        - source       : the name of the file ;
+        - voice_nb     : the number of the voice ;
+        - events       : the events of the voice, in order ;
+        - grace_bypass : if True, the grace notes are skipped.
+        '''
+
+        self.source = source
+        self.voice_nb = voice_nb
+
+        self.events = [] # The events of the notes
+        self.pitches = []
+        self.durations = []
+
+        for e in events:
+            pitch = get_pitch(e)
+            if pitch == None or (grace_bypass and e.is_grace()):
+                continue
+
+            self.events.append(e)
+            self.pitches.append(pitch)
+            self.durations.append(e.duration)
+
+        # self.intervals[k] is the interval from the note k to the note k + 1
+        self.intervals = [self.pitches[k + 1] - self.pitches[k] for k in range(len(self.pitches) - 1)]
+
+##-Queries
+class Query:
+    '''A melodic search : a sequence of intervals and / or of durations, with their tolerances.'''
+
+    def __init__(self, intervals: list[int]|None = None, durations: list[float]|None = None, pitch_tolerance: int = 0, duration_tolerance: float = 0, name: str = ''):
+        '''
+        Initiates the query. Raise a ValueError if it is not valid.
+
+        - intervals          : the intervals between the consecutive notes, in semitones (None to match any pitch) ;
+        - durations          : the durations of the notes (1 for a whole, .25 for a quarter, ...), None to match any rhythm.
+                               With `intervals`, there is one more duration than intervals ;
+        - pitch_tolerance    : the maximum difference (in semitones) between an interval of the query and the one of a match ;
+        - duration_tolerance : the maximum difference between a duration of the query and the one of a match, relative to the first one
+                               (e.g .25 accepts from .75 to 1.25 times the duration) ;
+        - name               : a name for the reports (e.g the kind of query).
+        '''
+
+        self.intervals = None if intervals == None else list(intervals)
+        self.durations = None if durations == None else list(durations)
+        self.pitch_tolerance = pitch_tolerance
+        self.duration_tolerance = duration_tolerance
+        self.name = name
+
+        if self.intervals == None and self.durations == None:
+            raise ValueError('Query: at least one of `intervals` and `durations` has to be given')
+
+        if self.intervals != None and len(self.intervals) == 0:
+            raise ValueError('Query: `intervals` has to contain at least one interval')
+
+        if self.durations != None and len(self.durations) == 0:
+            raise ValueError('Query: `durations` has to contain at least one duration')
+
+        if self.intervals != None and self.durations != None and len(self.durations) != len(self.intervals) + 1:
+            raise ValueError(f'Query: there has to be one more duration than intervals, but {len(self.durations)} durations and {len(self.intervals)} intervals were given')
+
+        if pitch_tolerance < 0 or duration_tolerance < 0:
+            raise ValueError('Query: the tolerances can not be negative')
+
+        # The number of notes matched
+        self.length = len(self.durations) if self.durations != None else len(self.intervals) + 1
+
+##-Engine
+class SearchEngine:
+    '''Searches the melodies of the scores added (see the module docstring).'''
+
+    def __init__(self, indexes: tuple[str, ...] = (), grace_bypass: bool = False, unfold_repeats: bool = False):
+        '''
+        Initiates an empty engine.
+
+        - indexes        : the indexes to build (see `index_names`) ;
+        - grace_bypass   : if True, the grace notes are skipped ;
+        - unfold_repeats : if True, the melodies follow the order in which the measures are played.
+        '''
+
+        for name in indexes:
+            if name not in index_names:
+                raise ValueError(f'SearchEngine: unknown index "{name}" (possible values : {", ".join(index_names)})')
+
+        self.grace_bypass = grace_bypass
+        self.unfold_repeats = unfold_repeats
+
+        self.melodies = []
+
+        # n-gram -> list of (index of the melody, position of its first note)
+        self.interval_index = {} if 'intervals' in indexes else None
+        self.rhythm_index = {} if 'rhythm' in indexes else None
+        self.duration_values = set() # The durations of the melodies (used to look up the rhythm index with a tolerance)
+
+        self.compared = 0 # Number of values compared by the searches
+
+    def add_score(self, score, top_rhythmic):
+        '''
+        Adds the melodies of the voices of a parsed graph, and indexes them.
+
+        - score        : the `Score` ;
+        - top_rhythmic : the `TopRhythmic`.
+        '''
+
+        for voice, events in zip(score.voices, get_voice_events(score, top_rhythmic, self.unfold_repeats)):
+            m = Melody(score.source, voice.staff_number, events, self.grace_bypass)
+            mi = len(self.melodies)
+            self.melodies.append(m)
+            self.duration_values.update(m.durations)
+
+            if self.interval_index != None:
+                for k in range(len(m.intervals) - ngram_size + 1):
+                    self.interval_index.setdefault(tuple(m.intervals[k:k + ngram_size]), []).append((mi, k))
+
+            if self.rhythm_index != None:
+                for k in range(len(m.durations) - ngram_size + 1):
+                    self.rhythm_index.setdefault(tuple(m.durations[k:k + ngram_size]), []).append((mi, k))
+
+    def add_file(self, source, name: str|None = None):
+        '''
+        Parses a file (see `MeiToGraph`) and adds its melodies.
+
+        - source : the MEI filename (or graph cache filename), or a binary file object ;
+        - name   : the name of the file (used as `source`).
+        '''
+
+        converter = MeiToGraph(source, name=name)
+        converter.parse_mei()
+        self.add_score(converter.score, converter.top_rhythmic)
+
+    def get_stats(self) -> dict:
+        '''Returns the number of melodies, of notes, and of positions in each index.'''
+
+        return {
+            'melodies': len(self.melodies),
+            'notes': sum(len(m.pitches) for m in self.melodies),
+            'index_entries': {
+                name: sum(len(positions) for positions in index.values())
+                for name, index in (('intervals', self.interval_index), ('rhythm', self.rhythm_index)) if index != None
+            }
+        }
+
+    def _get_candidates(self, query: Query) -> list[tuple[int, int]]|None:
+        '''
+        Returns the positions (melody, first note) that may match `query`, from the indexes (see the module docstring),
+        or None if no index can be used.
+
+        - query : the query.
+        '''
+
+        best = None # (number of positions, list of buckets, offset of the n-gram in the query)
+
+        lookups = []
+        if self.interval_index != None and query.intervals != None:
+            t = query.pitch_tolerance
+            for j in range(len(query.intervals) - ngram_size + 1):
+                keys = product(*(range(q - t, q + t + 1) for q in query.intervals[j:j + ngram_size]))
+                lookups.append((self.interval_index, keys, j))
+
+        if self.rhythm_index != None and query.durations != None:
+            t = query.duration_tolerance
+            close = [[d for d in self.duration_values if abs(d - q) <= t * q] for q in query.durations]
+            for j in range(len(query.durations) - ngram_size + 1):
+                lookups.append((self.rhythm_index, product(*close[j:j + ngram_size]), j))
+
+        for index, keys, j in lookups:
+            buckets = [index[key] for key in keys if key in index]
+            nb = sum(len(b) for b in buckets)
+
+            if best == None or nb < best[0]:
+                best = (nb, buckets, j)
+
+        if best == None:
+            return None
+
+        _, buckets, j = best
+        return [(mi, k - j) for b in buckets for mi, k in b]
+
+    def _matches(self, m: Melody, k: int, query: Query) -> bool:
+        '''
+        Checks if the notes of the melody `m` from the position `k` match `query`.
+
+        - m     : the melody ;
+        - k     : the position of the first note ;
+        - query : the query.
+        '''
+
+        if k < 0 or k + query.length > len(m.pitches):
+            return False
+
+        if query.intervals != None:
+            t = query.pitch_tolerance
+            for j, q in enumerate(query.intervals):
+                self.compared += 1
+                if abs(m.intervals[k + j] - q) > t:
+                    return False
+
+        if query.durations != None:
+            t = query.duration_tolerance
+            for j, q in enumerate(query.durations):
+                self.compared += 1
+                if abs(m.durations[k + j] - q) > t * q:
+                    return False
+
+        return True
+
+    def search(self, query: Query, use_indexes: bool = True) -> list[tuple[str, int, int]]:
+        '''
+        Returns the matches of `query`, sorted : (source, voice number, position of the first note in the melody of the voice).
+        Use `get_events` to get the matched events.
+
+        - query       : the query ;
+        - use_indexes : if False, the indexes are not used (all the positions are compared).
+        '''
+
+        candidates = self._get_candidates(query) if use_indexes else None
+
+        if candidates == None:
+            candidates = ((mi, k) for mi, m in enumerate(self.melodies) for k in range(len(m.pitches) - query.length + 1))
+
+        matches = {(mi, k) for mi, k in candidates if self._matches(self.melodies[mi], k, query)}
+
+        return sorted((self.melodies[mi].source, self.melodies[mi].voice_nb, k) for mi, k in matches)
+
+    def get_events(self, match: tuple[str, int, int], query: Query) -> list[Event]:
+        '''
+        Returns the events matched by `query` at `match` (see `search`).
+
+        - match : a match returned by `search` ;
+        - query : the query.
+        '''
+
+        source, voice_nb, k = match
+        m = next(m for m in self.melodies if m.source == source and m.voice_nb == voice_nb)
+
+        return m.events[k:k + query.length]
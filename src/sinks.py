@@ -0,0 +1,841 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''
+Defines the sinks : the outputs the graph is exported to.
+
+The graph classes (`Score`, `Measure`, `Event`, ...) do not build strings, but call `sink.node(...)` and `sink.link(...)`
+for each node and link they create, in the order of the cypher dump.
+Each sink then writes them in its own format, with its own buffering.
+`MultiSink` sends the same traversal to several sinks, and measures the time spent in each one.
+'''
+
+##-Imports
+from array import array
+from time import perf_counter
+from typing import IO
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import shutil
+import sqlite3
+
+from src.graph.utils_graph import make_create_string, make_create_link_string, format_properties
+from src.id_registry import id_digest
+
+##-Init
+# Properties indexed in the database (besides `cypher_id`), for the queries on them (scale degrees of the notes, and chords of the events)
+property_indexes = (
+    ('Fact', 'scaleDegree'), ('Fact', 'diatonicNumber'), ('Fact', 'keyPitchClass'),
+    ('Event', 'pcMask'), ('Event', 'primeForm'), ('Event', 'bassPitch'),
+    ('Event', 'startTick'), ('Event', 'endTick'), ('TimeBucket', 'bucket')
+)
+
+# Full-text indexes (name, labels, property), for the text searches in the lyrics (see `Lyrics`)
+fulltext_indexes = (
+    ('lyrics', ('Line', 'Word'), 'text'),
+)
+
+partial_suffix = '.part' # Suffix of the files being written, renamed when they are complete (a crash never leaves a partial dump)
+
+def make_fulltext_index_string(name: str, labels: tuple[str, ...], key: str) -> str:
+    '''
+    Returns the Cypher statement (without ';') creating a full-text index (see `fulltext_indexes`).
+    It uses the procedure of Neo4j 4.x (`CREATE FULLTEXT INDEX` only exists from 4.3), and does nothing if the index already exists.
+
+    - name   : the name of the index ;
+    - labels : the labels of the indexed nodes ;
+    - key    : the indexed property.
+    '''
+
+    labels_list = ', '.join(f"'{label}'" for label in labels)
+
+    return (
+        f"CALL db.indexes() YIELD name WHERE name = '{name}' WITH count(name) AS found WHERE found = 0 "
+        f"CALL db.index.fulltext.createNodeIndex('{name}', [{labels_list}], ['{key}'])"
+    )
+
+def find_labels(dump_fns: list[str], labels: tuple[str, ...]) -> set[str]:
+    '''
+    Returns the labels, among `labels`, of the nodes created in the Cypher dumps `dump_fns` (see `make_create_string`).
+
+    - dump_fns : the dump filenames ;
+    - labels   : the labels searched.
+    '''
+
+    create_re = re.compile(r'CREATE \(\w+:(' + '|'.join(labels) + r') ')
+    found = set()
+
+    for fn in dump_fns:
+        with open(fn) as f:
+            for line in f:
+                m = create_re.match(line)
+                if m != None:
+                    found.add(m.group(1))
+
+                    if len(found) == len(labels):
+                        return found
+
+    return found
+
+##-Base
+class Sink:
+    '''Base class of the sinks.'''
+
+    name = 'sink'
+
+    def node(self, cypher_id: str, label: str, data: dict):
+        '''
+        Receives a node.
+
+        - cypher_id : the cypher id of the node ;
+        - label     : the label of the node ('Score', 'Event', ...) ;
+        - data      : the data of the node (usually the `__dict__` of the object, see `format_properties`). It must not be modified.
+        '''
+
+        raise NotImplementedError
+
+    def link(self, id1: str, id2: str, type_: str, data: dict|None = None):
+        '''
+        Receives a link from the node `id1` to the node `id2`. Both nodes have been received before.
+
+        - id1   : the cypher id of the first node ;
+        - id2   : the cypher id of the second node ;
+        - type_ : the type of the link ('IS', 'HAS', 'NEXT', ...) ;
+        - data  : the data of the link (None if there is none).
+        '''
+
+        raise NotImplementedError
+
+    def close(self):
+        '''Writes what is left in the buffers, and closes the output. Called once, after the last node / link.'''
+
+        pass
+
+    def abort(self):
+        '''
+        Called instead of `close` when the export fails, so that the output is known to be incomplete.
+        Nothing must be finalized : by default, what was received is dropped (the sinks writing files remove them).
+        '''
+
+        pass
+
+##-Cypher
+class CypherSink(Sink):
+    '''Writes the CREATE cypher clauses (see `make_create_string`), one per line, in a text stream.'''
+
+    name = 'cypher'
+
+    def __init__(self, f: IO[str]|None = None, buffer_size: int = 2000):
+        '''
+        Initiates the sink.
+
+        - f           : the text stream to write to. If None, the clauses are kept in memory (see `getvalue`) ;
+        - buffer_size : the number of clauses kept before writing them to `f`.
+        '''
+
+        self.f = io.StringIO() if f == None else f
+        self.buffer_size = buffer_size
+
+        self.buffer = []
+        self.started = False # True when something has already been written in `self.f`
+
+    def node(self, cypher_id: str, label: str, data: dict):
+        self.buffer.append(make_create_string(cypher_id, label, data))
+
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def link(self, id1: str, id2: str, type_: str, data: dict|None = None):
+        self.buffer.append(make_create_link_string(id1, id2, type_, data))
+
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        '''Writes the buffer to `self.f` (the clauses are separated by new lines, without one at the end).'''
+
+        if len(self.buffer) == 0:
+            return
+
+        if self.started:
+            self.f.write('\n')
+
+        self.f.write('\n'.join(self.buffer))
+        self.buffer = []
+        self.started = True
+
+    def close(self):
+        self.flush()
+
+    def getvalue(self) -> str:
+        '''Returns all the clauses, when the sink writes in memory.'''
+
+        self.flush()
+        return self.f.getvalue()
+
+class CypherFileSink(CypherSink):
+    '''
+    Writes the cypher dump in a file. The file is compressed with gzip if its name ends with '.gz'.
+    It is written as `fn + partial_suffix`, and renamed to `fn` when closed, so that `fn` is always complete.
+    '''
+
+    def __init__(self, fn: str, buffer_size: int = 2000):
+        '''
+        Initiates the sink, and opens the file.
+
+        - fn          : the filename of the dump ;
+        - buffer_size : the number of clauses kept before writing them to the file.
+        '''
+
+        self.fn = fn
+        self.tmp_fn = fn + partial_suffix
+
+        if fn.endswith('.gz'):
+            self.name = 'cypher.gz'
+            f = gzip.open(self.tmp_fn, 'wt', compresslevel=6)
+        else:
+            f = open(self.tmp_fn, 'w')
+
+        super().__init__(f, buffer_size)
+
+    def close(self):
+        super().close()
+        self.f.close()
+        os.replace(self.tmp_fn, self.fn)
+
+    def abort(self):
+        self.f.close()
+        os.remove(self.tmp_fn)
+
+class ShardedCypherSink(Sink):
+    '''
+    Writes the cypher dump split in shards : small statements that can each be run in its own transaction.
+
+    In a normal dump, all the CREATE clauses share their variables, so the whole score is one statement (and one transaction).
+    Here, each shard has at most `shard_size` CREATE clauses, and starts with a MATCH on the nodes created by earlier shards
+    that it links to. Those nodes are found with their `cypher_id`, so an index on it is needed for each label.
+
+    Files written in `folder` :
+        - `indexes.cypher` : the CREATE INDEX statements (run with `apoc.cypher.runSchemaFile`) ;
+        - `shard_00000.cypher`, `shard_00001.cypher`, ... : the shards (one statement each) ;
+        - `manifest.cql` : the calls that load the indexes, then the shards in order (a shard only depends on the ones before it).
+
+    The manifest is written last (as `manifest.cql` + `partial_suffix`, renamed when complete), so a folder without it is incomplete.
+    When the export fails, the folder is removed.
+    '''
+
+    name = 'shards'
+
+    def __init__(self, folder: str, shard_size: int = 1000):
+        '''
+        Initiates the sink.
+
+        - folder     : the folder where the shards are written (created if needed) ;
+        - shard_size : the maximum number of CREATE clauses in a shard.
+        '''
+
+        self.folder = folder
+        self.shard_size = shard_size
+
+        self.labels = {} # cypher_id -> label, for all the nodes received
+        self.shards = [] # The filenames of the shards written
+
+        self.clauses = [] # The CREATE clauses of the current shard
+        self.defined = set() # The cypher ids of the nodes created in the current shard
+        self.matched = {} # The cypher ids of the nodes of earlier shards used in the current shard -> label
+
+        self.manifest_fn = os.path.join(folder, 'manifest.cql')
+
+        os.makedirs(folder, exist_ok=True)
+        if os.path.isfile(self.manifest_fn):
+            os.remove(self.manifest_fn) # The shards of a previous run are overwritten : its manifest is not valid any more
+
+    def node(self, cypher_id: str, label: str, data: dict):
+        self.labels[cypher_id] = label
+        self.defined.add(cypher_id)
+        self.clauses.append(make_create_string(cypher_id, label, data))
+
+        if len(self.clauses) >= self.shard_size:
+            self.flush()
+
+    def link(self, id1: str, id2: str, type_: str, data: dict|None = None):
+        for id_ in (id1, id2):
+            if id_ not in self.defined:
+                self.matched[id_] = self.labels[id_]
+
+        self.clauses.append(make_create_link_string(id1, id2, type_, data))
+
+        if len(self.clauses) >= self.shard_size:
+            self.flush()
+
+    def flush(self):
+        '''Writes the current shard, and starts a new one.'''
+
+        if len(self.clauses) == 0:
+            return
+
+        fn = os.path.join(self.folder, f'shard_{len(self.shards):05}.cypher')
+
+        with open(fn, 'w') as f:
+            if len(self.matched) > 0:
+                f.write('MATCH ' + ', '.join(f"({id_}:{label} {{cypher_id: '{id_}'}})" for id_, label in self.matched.items()) + '\n')
+
+            f.write('\n'.join(self.clauses) + ';\n')
+
+        self.shards.append(fn)
+        self.clauses = []
+        self.defined = set()
+        self.matched = {}
+
+    def close(self):
+        self.flush()
+
+        indexes_fn = os.path.join(self.folder, 'indexes.cypher')
+        with open(indexes_fn, 'w') as f:
+            labels = set(self.labels.values())
+            for label in sorted(labels):
+                f.write(f'CREATE INDEX IF NOT EXISTS FOR (n:{label}) ON (n.cypher_id);\n')
+
+            for label, key in property_indexes:
+                if label in labels:
+                    f.write(f'CREATE INDEX IF NOT EXISTS FOR (n:{label}) ON (n.{key});\n')
+
+            for name, index_labels, key in fulltext_indexes:
+                if not labels.isdisjoint(index_labels):
+                    f.write(make_fulltext_index_string(name, index_labels, key) + ';\n')
+
+        with open(self.manifest_fn + partial_suffix, 'w') as f:
+            f.write(f"CALL apoc.cypher.runSchemaFile('{os.path.abspath(indexes_fn)}', {{statistics: false}});\n")
+
+            for fn in self.shards:
+                f.write(f"CALL apoc.cypher.runFile('{os.path.abspath(fn)}', {{statistics: false}});\n")
+
+        os.replace(self.manifest_fn + partial_suffix, self.manifest_fn)
+
+    def abort(self):
+        shutil.rmtree(self.folder, ignore_errors=True) # The shards written are incomplete
+
+##-CSV
+class CsvSink(Sink):
+    '''
+    Writes the graph as CSV files for the bulk import tool of Neo4j (`neo4j-admin import`) :
+        - one file per node label : `nodes_<label>.csv`, with the columns `cypher_id:ID`, the properties and `:LABEL` ;
+        - one file per link type : `links_<type>.csv`, with the columns `:START_ID`, `:END_ID`, `:TYPE` and the properties.
+
+    The properties change from one node to another (e.g a rest has no frequency), so the rows are kept in memory,
+    and the files are written when the sink is closed, with all the columns.
+    '''
+
+    name = 'csv'
+
+    def __init__(self, folder: str):
+        '''
+        Initiates the sink.
+
+        - folder : the folder where the CSV files are written (created if needed).
+        '''
+
+        self.folder = folder
+
+        self.nodes = {} # label -> list of (cypher_id, properties)
+        self.links = {} # type -> list of (id1, id2, properties)
+
+    def node(self, cypher_id: str, label: str, data: dict):
+        self.nodes.setdefault(label, []).append((cypher_id, format_properties(data)))
+
+    def link(self, id1: str, id2: str, type_: str, data: dict|None = None):
+        self.links.setdefault(type_, []).append((id1, id2, {} if data == None else format_properties(data)))
+
+    def close(self):
+        os.makedirs(self.folder, exist_ok=True)
+
+        for label, rows in self.nodes.items():
+            columns = self._get_columns(rows, 1)
+            header = ['cypher_id:ID'] + [c + t for c, t in columns] + [':LABEL']
+            self._write(f'nodes_{label}.csv', header, ([id_] + [p.get(c) for c, t in columns] + [label] for id_, p in rows))
+
+        for type_, rows in self.links.items():
+            columns = self._get_columns(rows, 2)
+            header = [':START_ID', ':END_ID', ':TYPE'] + [c + t for c, t in columns]
+            self._write(f'links_{type_}.csv', header, ([id1, id2, type_] + [p.get(c) for c, t in columns] for id1, id2, p in rows))
+
+    def abort(self):
+        pass # Incomplete CSV files would be imported without error
+
+    def _get_columns(self, rows: list[tuple], props_index: int) -> list[tuple[str, str]]:
+        '''
+        Returns the columns needed for all the `rows`, with their type (':int', ':float', or '' for strings).
+        The `cypher_id` property is not a column, as it is already the id.
+
+        - rows        : the rows ;
+        - props_index : the index of the properties in each row.
+        '''
+
+        columns = {}
+        for row in rows:
+            for k, v in row[props_index].items():
+                if k == 'cypher_id':
+                    continue
+
+                t = {int: ':int', float: ':float'}.get(type(v), '')
+                if k not in columns or columns[k] == ':int' and t == ':float':
+                    columns[k] = t
+                elif columns[k] != t and not (columns[k] == ':float' and t == ':int'):
+                    columns[k] = '' # Mixed types : stored as a string
+
+        return list(columns.items())
+
+    def _write(self, fn: str, header: list[str], rows):
+        '''Writes a CSV file in `self.folder`.'''
+
+        with open(os.path.join(self.folder, fn), 'w', newline='') as f:
+            w = csv.writer(f)
+            w.writerow(header)
+            w.writerows(rows)
+
+##-Summary
+class SummarySink(Sink):
+    '''Writes a JSON summary of the graph : the number of nodes per label, of links per type, and some statistics on the notes.'''
+
+    name = 'summary'
+
+    def __init__(self, fn: str|None, source: str):
+        '''
+        Initiates the sink.
+
+        - fn     : the filename of the JSON summary (None to only keep it in `self.summary`) ;
+        - source : the name of the source file, written in the summary.
+        '''
+
+        self.fn = fn
+        self.source = source
+
+        self.nodes = {}
+        self.links = {}
+        self.duration = 0 # The end of the last event
+        self.pitches = {} # name (e.g 'C5') -> number of notes
+
+        self.summary = None # Set when the sink is closed
+
+    def node(self, cypher_id: str, label: str, data: dict):
+        self.nodes[label] = self.nodes.get(label, 0) + 1
+
+        if label == 'Event' and data.get('end') != None:
+            self.duration = max(self.duration, data['end'])
+
+        elif label == 'Fact' and data.get('name') != None:
+            self.pitches[data['name']] = self.pitches.get(data['name'], 0) + 1
+
+    def link(self, id1: str, id2: str, type_: str, data: dict|None = None):
+        self.links[type_] = self.links.get(type_, 0) + 1
+
+    def close(self):
+        self.summary = {
+            'source': self.source,
+            'nodes': self.nodes,
+            'links': self.links,
+            'duration': self.duration,
+            'pitches': dict(sorted(self.pitches.items(), key=lambda t: -t[1]))
+        }
+
+        if self.fn != None:
+            with open(self.fn + partial_suffix, 'w') as f:
+                json.dump(self.summary, f, ensure_ascii=False, indent=4)
+
+            os.replace(self.fn + partial_suffix, self.fn)
+
+##-SQLite
+class SqliteSink(Sink):
+    '''
+    Writes the graph in a SQLite database, to use it without Neo4j :
+        - one table per node label (`Score`, `Measure`, `Event`, `Fact`, `Voice`, ...), with a column per property ;
+        - one table per link type (`link_NEXT`, `link_HAS`, `link_IS`, ...), with the columns `src` and `dst` (the cypher ids) and a column per property.
+          The prefix is needed as the names of the tables are case insensitive (the label `Voice` and the type `VOICE`).
+
+    Several files can be written in the same database : the tables and columns are added when needed.
+    The rows are inserted in batches (`executemany`), in one transaction for the whole file (rolled back if the export fails).
+    The indexes are not created by the sink, but once at the end of the run (see `create_sqlite_indexes`), as it is faster.
+    '''
+
+    name = 'sqlite'
+
+    def __init__(self, fn: str, batch_size: int = 10000):
+        '''
+        Initiates the sink, and opens the database (created if needed).
+
+        - fn         : the filename of the database ;
+        - batch_size : the number of rows kept before inserting them.
+        '''
+
+        self.fn = fn
+        self.batch_size = batch_size
+
+        self.db = sqlite3.connect(fn, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode = WAL')
+        self.db.execute('PRAGMA synchronous = NORMAL')
+        self.db.execute('BEGIN')
+
+        self.columns = _get_sqlite_columns(self.db) # table -> list of columns
+
+        self.rows = {} # table -> list of rows (dicts)
+        self.nb_rows = 0
+
+    def node(self, cypher_id: str, label: str, data: dict):
+        self._add_row(label, format_properties(data))
+
+    def link(self, id1: str, id2: str, type_: str, data: dict|None = None):
+        row = {'src': id1, 'dst': id2}
+        if data != None:
+            row.update(format_properties(data))
+
+        self._add_row('link_' + type_, row)
+
+    def _add_row(self, table: str, row: dict):
+        '''Keeps the row, and inserts the rows kept if there are enough.'''
+
+        self.rows.setdefault(table, []).append(row)
+        self.nb_rows += 1
+
+        if self.nb_rows >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        '''Inserts the rows kept (in the current transaction).'''
+
+        for table, rows in self.rows.items():
+            columns = list(dict.fromkeys(k for row in rows for k in row)) # All the columns, in order of appearance
+            _add_sqlite_columns(self.db, self.columns, table, columns)
+
+            cols = ', '.join('"' + c + '"' for c in columns)
+            query = f'INSERT INTO "{table}" ({cols}) VALUES ({", ".join("?" for c in columns)})'
+            self.db.executemany(query, ([row.get(c) for c in columns] for row in rows))
+
+        self.rows = {}
+        self.nb_rows = 0
+
+    def close(self):
+        try:
+            self.flush()
+            self.db.execute('COMMIT')
+
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+
+        finally:
+            self.db.close()
+
+    def abort(self):
+        self.db.execute('ROLLBACK')
+        self.db.close()
+
+def _get_sqlite_columns(db: sqlite3.Connection) -> dict[str, list[str]]:
+    '''Returns the columns of each table of the database `db`.'''
+
+    columns = {}
+    for table, in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall():
+        columns[table] = [c[1] for c in db.execute(f'PRAGMA table_info("{table}")')]
+
+    return columns
+
+def _add_sqlite_columns(db: sqlite3.Connection, columns: dict[str, list[str]], table: str, needed: list[str]):
+    '''
+    Creates the table `table` if it does not exist, and adds the columns of `needed` that it does not have.
+
+    - db      : the database ;
+    - columns : the columns of each table (see `_get_sqlite_columns`), updated ;
+    - table   : the table ;
+    - needed  : the columns needed.
+    '''
+
+    if table not in columns:
+        cols = ', '.join('"' + c + '"' for c in needed)
+        db.execute(f'CREATE TABLE "{table}" ({cols})')
+        columns[table] = list(needed)
+        return
+
+    for c in needed:
+        if c not in columns[table]:
+            db.execute(f'ALTER TABLE "{table}" ADD COLUMN "{c}"')
+            columns[table].append(c)
+
+def merge_sqlite(fn: str, part_fns: list[str]):
+    '''
+    Copies the content of the databases `part_fns` (written by `SqliteSink`, e.g by different processes) into the database `fn`,
+    and removes them.
+
+    - fn       : the filename of the database ;
+    - part_fns : the filenames of the databases to merge into it.
+    '''
+
+    db = sqlite3.connect(fn, isolation_level=None)
+    columns = _get_sqlite_columns(db)
+
+    for part_fn in part_fns:
+        db.execute('ATTACH DATABASE ? AS part', (part_fn,))
+        db.execute('BEGIN')
+
+        for table, in db.execute("SELECT name FROM part.sqlite_master WHERE type = 'table'").fetchall():
+            part_columns = [c[1] for c in db.execute(f'PRAGMA part.table_info("{table}")')]
+            _add_sqlite_columns(db, columns, table, part_columns)
+
+            cols = ', '.join('"' + c + '"' for c in part_columns)
+            db.execute(f'INSERT INTO main."{table}" ({cols}) SELECT {cols} FROM part."{table}"')
+
+        db.execute('COMMIT')
+        db.execute('DETACH DATABASE part')
+        remove_sqlite(part_fn)
+
+    db.close()
+
+def remove_sqlite(fn: str):
+    '''
+    Removes the SQLite database `fn`, and its temporary files.
+
+    - fn : the filename of the database.
+    '''
+
+    for ext in ('', '-wal', '-shm'):
+        if os.path.isfile(fn + ext):
+            os.remove(fn + ext)
+
+def create_sqlite_indexes(fn: str):
+    '''
+    Creates the indexes of a database written by `SqliteSink` : on `cypher_id` for the node tables, on `src` and `dst` for the link tables,
+    and on the properties of `property_indexes`.
+    The full-text indexes (`fulltext_indexes`) are FTS5 tables `fts_<name>`, with the columns `cypher_id`, `label` and the indexed property
+    (e.g `SELECT cypher_id FROM fts_lyrics WHERE fts_lyrics MATCH 'word'`). They are not created if SQLite is built without FTS5.
+    To call once all the files are written.
+
+    - fn : the filename of the database.
+    '''
+
+    db = sqlite3.connect(fn, isolation_level=None)
+    tables = {table: columns for table, columns in _get_sqlite_columns(db).items() if not table.startswith('fts_')}
+
+    for table, columns in tables.items():
+        for c in ('cypher_id', 'src', 'dst') + tuple(key for label, key in property_indexes if label == table):
+            if c in columns:
+                db.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table}_{c}" ON "{table}" ("{c}")')
+
+    for name, labels, key in fulltext_indexes:
+        indexed = [label for label in labels if key in tables.get(label, [])]
+        if len(indexed) == 0:
+            continue
+
+        try:
+            db.execute(f'DROP TABLE IF EXISTS "fts_{name}"')
+            db.execute(f'CREATE VIRTUAL TABLE "fts_{name}" USING fts5(cypher_id UNINDEXED, label UNINDEXED, "{key}")')
+
+        except sqlite3.OperationalError:
+            break # No FTS5
+
+        for label in indexed:
+            db.execute(f'INSERT INTO "fts_{name}" SELECT cypher_id, ?, "{key}" FROM "{label}"', (label,))
+
+    db.execute('ANALYZE')
+    db.close()
+
+##-Database
+class Neo4jSink(Sink):
+    '''
+    Writes the graph directly into a Neo4j database (without cypher dump).
+
+    The nodes and links are sent in batches with `UNWIND`, one query per label (or link type) and per batch.
+    As the links need the nodes to exist, everything is kept until the sink is closed.
+    An index on `cypher_id` is created for each label, to find the ends of the links.
+    '''
+
+    name = 'neo4j'
+
+    def __init__(self, driver, batch_size: int = 5000):
+        '''
+        Initiates the sink.
+
+        - driver     : the Neo4j driver (see `neo4j_connection.connect_to_neo4j`) ;
+        - batch_size : the number of nodes or links sent in one query.
+        '''
+
+        self.driver = driver
+        self.batch_size = batch_size
+
+        self.labels = {} # cypher_id -> label
+        self.nodes = {} # label -> list of properties
+        self.links = {} # (type, label1, label2) -> list of {'a': id1, 'b': id2, 'props': properties}
+
+    def node(self, cypher_id: str, label: str, data: dict):
+        self.labels[cypher_id] = label
+        self.nodes.setdefault(label, []).append(format_properties(data))
+
+    def link(self, id1: str, id2: str, type_: str, data: dict|None = None):
+        key = (type_, self.labels[id1], self.labels[id2])
+        self.links.setdefault(key, []).append({'a': id1, 'b': id2, 'props': {} if data == None else format_properties(data)})
+
+    def close(self):
+        with self.driver.session() as session:
+            for label in self.nodes:
+                session.run(f'CREATE INDEX IF NOT EXISTS FOR (n:{label}) ON (n.cypher_id)')
+
+            for label, key in property_indexes:
+                if label in self.nodes:
+                    session.run(f'CREATE INDEX IF NOT EXISTS FOR (n:{label}) ON (n.{key})')
+
+            for name, labels, key in fulltext_indexes:
+                if any(label in self.nodes for label in labels):
+                    session.run(make_fulltext_index_string(name, labels, key))
+
+            for label, rows in self.nodes.items():
+                for k in range(0, len(rows), self.batch_size):
+                    session.run(f'UNWIND $rows AS row CREATE (n:{label}) SET n = row', rows=rows[k:k + self.batch_size])
+
+            for (type_, label1, label2), rows in self.links.items():
+                query = f'UNWIND $rows AS row MATCH (a:{label1} {{cypher_id: row.a}}), (b:{label2} {{cypher_id: row.b}}) CREATE (a)-[r:{type_}]->(b) SET r = row.props'
+                for k in range(0, len(rows), self.batch_size):
+                    session.run(query, rows=rows[k:k + self.batch_size])
+
+    def abort(self):
+        pass # Nothing has been sent to the database yet
+
+##-Ids
+class IdSink(Sink):
+    '''
+    Computes the digest of the `cypher_id` of each node (see `id_registry`), to check that the ids are unique in a whole run.
+    The digests can be written in a file when the sink is closed, so that they are not sent back from a process (see `load_digests`).
+    '''
+
+    name = 'ids'
+
+    def __init__(self, keep_ids: bool = False, fn: str|None = None):
+        '''
+        Initiates the sink.
+
+        - keep_ids : if True, also keep the ids (to show them in the report of a collision) ;
+        - fn       : if not None, the digests are written in this file (8 bytes each) when the sink is closed, and then dropped.
+        '''
+
+        self.digests = array('Q')
+        self.ids = [] if keep_ids else None
+        self.fn = fn
+
+    def node(self, cypher_id: str, label: str, data: dict):
+        self.digests.append(id_digest(cypher_id))
+
+        if self.ids != None:
+            self.ids.append(cypher_id)
+
+    def link(self, id1: str, id2: str, type_: str, data: dict|None = None):
+        pass
+
+    def close(self):
+        if self.fn != None:
+            with open(self.fn, 'wb') as f:
+                self.digests.tofile(f)
+
+            self.digests = array('Q')
+
+    def abort(self):
+        pass
+
+def load_digests(fn: str) -> array:
+    '''
+    Returns the digests of the ids written by an `IdSink` in the file `fn`.
+
+    - fn : the filename.
+    '''
+
+    digests = array('Q')
+    with open(fn, 'rb') as f:
+        digests.frombytes(f.read())
+
+    return digests
+
+##-Projection
+class ProjectionSink(Sink):
+    '''Sends the nodes to another sink with only some of their properties (see `profiles.py`). The links are sent unchanged.'''
+
+    def __init__(self, sink: Sink, properties: dict[str, frozenset[str]]):
+        '''
+        Initiates the sink.
+
+        - sink       : the sink to write to ;
+        - properties : label -> the names of the properties kept (as exported : `type`, not `type_`). The nodes of the other labels keep all their properties.
+        '''
+
+        self.sink = sink
+        self.properties = properties
+        self.name = sink.name # The time is reported for the sink written
+
+    def node(self, cypher_id: str, label: str, data: dict):
+        keys = self.properties.get(label)
+        if keys != None:
+            data = {k: v for k, v in data.items() if (k[:-1] if k[-1] == '_' else k) in keys}
+
+        self.sink.node(cypher_id, label, data)
+
+    def link(self, id1: str, id2: str, type_: str, data: dict|None = None):
+        self.sink.link(id1, id2, type_, data)
+
+    def close(self):
+        self.sink.close()
+
+    def abort(self):
+        self.sink.abort()
+
+##-Several sinks
+class MultiSink(Sink):
+    '''Sends each node and link to several sinks, and measures the time spent in each one.'''
+
+    name = 'multi'
+
+    def __init__(self, sinks: list[Sink]):
+        '''
+        Initiates the sink.
+
+        - sinks : the sinks to write to.
+        '''
+
+        self.sinks = sinks
+        self.times = [0.0 for s in sinks] # self.times[k] is the time spent in self.sinks[k], in seconds
+
+    def node(self, cypher_id: str, label: str, data: dict):
+        for k, s in enumerate(self.sinks):
+            t0 = perf_counter()
+            s.node(cypher_id, label, data)
+            self.times[k] += perf_counter() - t0
+
+    def link(self, id1: str, id2: str, type_: str, data: dict|None = None):
+        for k, s in enumerate(self.sinks):
+            t0 = perf_counter()
+            s.link(id1, id2, type_, data)
+            self.times[k] += perf_counter() - t0
+
+    def close(self):
+        for k, s in enumerate(self.sinks):
+            t0 = perf_counter()
+            s.close()
+            self.times[k] += perf_counter() - t0
+
+    def abort(self):
+        for s in self.sinks:
+            s.abort()
+
+    def get_times(self) -> dict[str, float]:
+        '''Returns the time spent in each sink (in seconds), by sink name.'''
+
+        times = {}
+        for s, t in zip(self.sinks, self.times):
+            times[s.name] = times.get(s.name, 0) + t
+
+        return times
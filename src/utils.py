@@ -11,29 +11,161 @@
 
 
 ##-Imports
-from sys import stderr
+import sys
 from os.path import isfile
 from datetime import datetime as dt
+from functools import lru_cache
+from time import monotonic
 import unicodedata
+import atexit
+import json
+import os
 import re
 
-##-IO
-def log(lvl: str, msg: str, use_stderr: bool = False):
+##-Logs
+log_levels = {'debug': 10, 'info': 20, 'warn': 30, 'err': 40, 'error': 40} # The other levels are considered as 'info'
+
+class LogWriter:
+    '''
+    Writes the logs (see `log`), with a buffer : the lines are written by groups of `buffer_size`,
+    or when `flush_interval` seconds have passed since the last write (checked at each log), or for a warning or an error.
+
+    Each message is written either as text :
+        [date time] - Musypher: [level]: [message]
+    or as a JSON object per line, with the keys 'time', 'level', 'msg', and the fields given to `log` (e.g 'file', 'duration').
+    '''
+
+    def __init__(self, level: str = 'info', json_lines: bool = False, fn: str|None = None, buffer_size: int|None = None, flush_interval: float = 1.):
+        '''
+        Initiates the writer.
+
+        - level          : the minimum level of the messages written (see `log_levels`) ;
+        - json_lines     : if True, write JSON lines instead of text ;
+        - fn             : the file where the logs are appended (None for the console : stdout, or stderr for the messages asking it) ;
+        - buffer_size    : the number of lines kept before writing them. If None, 1 for a terminal (no buffer) and 64 otherwise ;
+        - flush_interval : the maximum time (in seconds) a line is kept, if another message is logged after it.
+        '''
+
+        if level not in log_levels:
+            raise ValueError(f'LogWriter: unknown level "{level}" (possible values : {", ".join(log_levels)})')
+
+        self.level = log_levels[level]
+        self.json_lines = json_lines
+        self.fn = fn
+        self.flush_interval = flush_interval
+
+        self.f = None if fn == None else open(fn, 'a')
+
+        if buffer_size == None:
+            buffer_size = 1 if self.f == None and sys.stdout.isatty() else 64
+
+        self.buffer_size = buffer_size
+        self.lines = []
+        self.last_flush = monotonic()
+
+        self.counts = {} # level -> number of messages logged (written or not)
+
+    def write(self, lvl: str, msg: str, use_stderr: bool = False, fields: dict = {}):
+        '''
+        Logs a message (see `log`).
+
+        - lvl        : the level ;
+        - msg        : the message ;
+        - use_stderr : if True and the logs are written to the console, write to stderr (without buffer) ;
+        - fields     : the additional fields, written only in JSON lines.
+        '''
+
+        self.counts[lvl] = self.counts.get(lvl, 0) + 1
+
+        level = log_levels.get(lvl, log_levels['info'])
+        if level < self.level:
+            return
+
+        now = dt.now()
+        if self.json_lines:
+            line = json.dumps({'time': now.isoformat(), 'level': lvl, 'msg': msg, **fields}, ensure_ascii=False, default=str)
+        else:
+            line = f'{now} - Musypher: {lvl}: {msg}'
+
+        if use_stderr and self.f == None:
+            self.flush() # Keeps the order of the messages
+            print(line, file=sys.stderr)
+            return
+
+        self.lines.append(line)
+
+        if len(self.lines) >= self.buffer_size or level >= log_levels['warn'] or monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        '''Writes the lines kept.'''
+
+        if len(self.lines) > 0:
+            out = sys.stdout if self.f == None else self.f
+            out.write('\n'.join(self.lines) + '\n')
+            out.flush()
+
+            self.lines = []
+
+        self.last_flush = monotonic()
+
+    def close(self):
+        '''Writes the lines kept, and closes the file.'''
+
+        self.flush()
+
+        if self.f != None:
+            self.f.close()
+            self.f = None
+
+_log_writer = LogWriter()
+
+def configure_log(level: str = 'info', json_lines: bool = False, fn: str|None = None, buffer_size: int|None = None):
+    '''
+    Replaces the writer of the logs (see `LogWriter`). The counts of the messages are kept.
+
+    - level       : the minimum level of the messages written ;
+    - json_lines  : if True, write JSON lines instead of text ;
+    - fn          : the file where the logs are appended (None for the console) ;
+    - buffer_size : the number of lines kept before writing them (None for the default).
+    '''
+
+    global _log_writer
+
+    counts = _log_writer.counts
+    _log_writer.close()
+
+    _log_writer = LogWriter(level, json_lines, fn, buffer_size)
+    _log_writer.counts = counts
+
+def flush_log():
+    '''Writes the logs kept in the buffer (also done at exit, and before a fork so that the child process does not write them again).'''
+
+    _log_writer.flush()
+
+def get_log_counts() -> dict[str, int]:
+    '''Returns the number of messages logged by this process, by level.'''
+
+    return dict(_log_writer.counts)
+
+atexit.register(flush_log)
+os.register_at_fork(before=flush_log)
+
+def log(lvl: str, msg: str, use_stderr: bool = False, **fields):
     '''
     Write msg as a log, in the following format :
         [date time] - Musypher: [level]: [message]
+    or as a JSON line, depending on the configuration (see `configure_log`). The logs are buffered (see `LogWriter`).
 
     - lvl        : the level of the message (usually 'info', 'warn', 'error') ;
     - msg        : the message to log ;
-    - use_stderr : if True, write to stderr. Otherwise write to stdout. Default is False.
+    - use_stderr : if True, write to stderr. Otherwise write to stdout. Default is False ;
+    - fields     : additional data, written in the JSON lines (e.g file='a.mei', duration=1.2).
     '''
 
-    p = f'{dt.now()} - Musypher: {lvl}: {msg}'
+    _log_writer.write(lvl, msg, use_stderr, fields)
 
-    if use_stderr:
-        print(p, file=stderr)
-    else:
-        print(p)
+##-IO
 
 def write_file(fn: str, content: str, no_confirmation: bool = False, verbose: bool = False) -> bool:
     '''
@@ -49,16 +181,36 @@ def write_file(fn: str, content: str, no_confirmation: bool = False, verbose: bo
         - False otherwise (canceled by the user).
     '''
 
+    if not confirm_overwrite(fn, no_confirmation, verbose):
+        return False
+
+    with open(fn, 'w') as f:
+        f.write(content)
+
+    return True
+
+def confirm_overwrite(fn: str, no_confirmation: bool = False, verbose: bool = False) -> bool:
+    '''
+    If the file `fn` exists, ask confirmation to overwrite it, unless if `no_confirmation` is True.
+
+    - fn              : the filename ;
+    - no_confirmation : if True, do not ask for confirmation ;
+    - verbose         : if True, log when overwriting a file without confirmation.
+
+    Return:
+        - True  if the file can be written ;
+        - False otherwise (canceled by the user).
+    '''
+
     if (not no_confirmation) and isfile(fn):
+        flush_log() # Before the prompt
+
         if input(f'Do you want to overwrite file "{fn}" (y/n) ? (rerun with -n to avoid those prompts)\n>').lower() not in ('y', 'yes'):
             return False
 
     elif verbose and no_confirmation and isfile(fn):
         log('info', f'Overwriting file "{fn}".')
 
-    with open(fn, 'w') as f:
-        f.write(content)
-
     return True
 
 def basename(f):
@@ -111,6 +263,7 @@ def convert_note_to_sharp(note: str) -> str:
 
     return note
 
+@lru_cache(maxsize=None) # Only a few hundreds of different notes
 def calculate_note_interval(class_1: str, octave_1: int, class_2: str, octave_2: int) -> int:
     '''
     Calculates the distance between (`class_1`, `octave_1`) and (`class_2`, `octave_2`), in semitones.
@@ -133,6 +286,7 @@ def calculate_note_interval(class_1: str, octave_1: int, class_2: str, octave_2:
     #---Calculate interval
     return 12 * (octave_2 - octave_1) + notes.index(c2) - notes.index(c1)
 
+@lru_cache(maxsize=None)
 def get_frequency(class_: str, octave: int) -> float:
     '''
     Return the frequency of the given note (in Hz).
@@ -153,3 +307,129 @@ def get_frequency(class_: str, octave: int) -> float:
     #---Calculate frequency
     n = calculate_note_interval(base_note, base_octave, class_, octave)
     return f(base_freq, n)
+
+##-Keys
+letters = 'cdefgab'
+letter_pcs = (0, 2, 4, 5, 7, 9, 11) # Pitch class of each letter of `letters`
+accid_alterations = {'s': 1, 'f': -1, 'n': 0, 'ss': 2, 'x': 2, 'ff': -2}
+
+# Number of letters between the tonic of the major key and the tonic of each mode with the same key signature
+mode_offsets = {'major': 0, 'ionian': 0, 'dorian': 1, 'phrygian': 2, 'lydian': 3, 'mixolydian': 4, 'minor': 5, 'aeolian': 5, 'locrian': 6}
+
+def _make_key_table() -> dict[tuple[int, str], tuple[int, int, tuple[int, ...]]]:
+    '''
+    Returns the table of the keys : (fifths, mode) -> (letter index of the tonic, pitch class of the tonic, alteration of each letter),
+    for the key signatures from 7 flats (fifths = -7) to 7 sharps (fifths = 7).
+    '''
+
+    table = {}
+    for fifths in range(-7, 8):
+        alterations = [0] * 7
+        for k in range(abs(fifths)):
+            if fifths > 0:
+                alterations[letters.index('fcgdaeb'[k])] = 1
+            else:
+                alterations[letters.index('beadgcf'[k])] = -1
+
+        major_tonic = (4 * fifths) % 7 # A fifth is 4 letters above
+
+        for mode, offset in mode_offsets.items():
+            tonic = (major_tonic + offset) % 7
+            table[(fifths, mode)] = (tonic, (letter_pcs[tonic] + alterations[tonic]) % 12, tuple(alterations))
+
+    return table
+
+key_table = _make_key_table()
+
+def parse_key_signature(sig: str|None) -> int|None:
+    '''
+    Returns the number of fifths of a MEI key signature (positive for sharps, negative for flats), or None if it is not understood.
+
+    - sig : the value of the attribute `sig` of a `keySig` (or `key.sig` of a `scoreDef` / `staffDef`), e.g '0', '2s', '3f'.
+    '''
+
+    if sig == None:
+        return None
+
+    m = re.fullmatch(r'(\d)([sf]?)', sig.strip())
+    if m == None or (m.group(1) != '0' and m.group(2) == ''):
+        return None
+
+    n = int(m.group(1))
+    if n > 7:
+        return None
+
+    return -n if m.group(2) == 'f' else n
+
+@lru_cache(maxsize=None) # Only a few thousands of different (note, key) pairs
+def get_scale_degree(class_: str, octave: int, accid: str|None, fifths: int, mode: str) -> tuple[int, int, int]:
+    '''
+    Returns the position of a note in a key (see `key_table`) : its scale degree (1 to 7), its diatonic number
+    (number of letters from C0, e.g 28 for C4 and 33 for A4, whatever the key) and its pitch class relative to the tonic (0 to 11).
+
+    - class_ : the letter of the note ('a', ..., 'g') ;
+    - octave : the octave of the note ;
+    - accid  : the accidental sounding on the note ('s', 'f', 'n', ...), or None to use the key signature ;
+    - fifths : the key signature (see `parse_key_signature`) ;
+    - mode   : the mode (see `mode_offsets`).
+    '''
+
+    tonic, tonic_pc, alterations = key_table[(fifths, mode)]
+    letter = letters.index(class_)
+
+    alteration = alterations[letter] if accid == None else accid_alterations.get(accid, 0)
+
+    degree = (letter - tonic) % 7 + 1
+    diatonic_number = 7 * octave + letter
+    key_pc = (letter_pcs[letter] + alteration - tonic_pc) % 12
+
+    return degree, diatonic_number, key_pc
+
+@lru_cache(maxsize=None)
+def get_alteration(class_: str, accid: str|None, fifths: int|None) -> int:
+    '''
+    Returns the alteration (in semitones) sounding on a note : its accidental if it has one, otherwise the one of the key signature.
+
+    - class_ : the letter of the note ('a', ..., 'g') ;
+    - accid  : the accidental of the note ('s', 'f', 'n', ...), None if there is none ;
+    - fifths : the key signature (see `parse_key_signature`), None if unknown (then no alteration).
+    '''
+
+    if accid != None:
+        return accid_alterations.get(accid, 0)
+
+    if fifths != None:
+        return key_table[(fifths, 'major')][2][letters.index(class_)]
+
+    return 0
+
+##-Pitch class sets
+pc_names = '0123456789te' # Name of each pitch class in the prime forms (t for 10, e for 11)
+
+@lru_cache(maxsize=None) # At most 4096 sets
+def get_prime_form(mask: int) -> str:
+    '''
+    Returns the prime form (as defined by Rahn) of a pitch class set, in brackets so that it is always exported as a string :
+    e.g '[037]' for a major or minor triad, '[0258]' for a dominant seventh chord ('[]' for the empty set).
+
+    The prime form is the most packed to the left of the transpositions and inversions of the set that contain 0.
+    With the pitch class k as the bit k of a mask, it is the smallest mask, since comparing masks compares their highest pitch classes first.
+
+    - mask : the set, as a 12-bit mask (bit k is set if the pitch class k is in the set).
+    '''
+
+    if mask == 0:
+        return '[]'
+
+    inversion = 0
+    for k in range(12):
+        if mask >> k & 1:
+            inversion |= 1 << (-k % 12)
+
+    best = mask
+    for m in (mask, inversion):
+        for t in range(12):
+            if m >> t & 1: # Transposition putting t on 0
+                best = min(best, ((m >> t) | (m << (12 - t))) & 0xfff)
+
+    return '[' + ''.join(pc_names[k] for k in range(12) if best >> k & 1) + ']'
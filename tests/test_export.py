@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''Tests that the other ways of producing the graph (streaming, -J, graph cache) give the same dumps as the sequential parsing.'''
+
+##-Imports
+import glob
+import os
+
+import pytest
+
+from src.MeiToGraph import MeiToGraph
+
+##-Init
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+corpus = sorted(glob.glob(os.path.join(root, 'mei', '*', '*.mei')))
+
+all_links = dict(simultaneous=True, grace_bypass=True, time_index=True, unfold_repeats=True)
+
+##-Utils
+def dump(converter: MeiToGraph, out_fn: str, **options) -> str:
+    '''
+    Writes the dump of `converter` in `out_fn`, and returns it.
+
+    - converter : the converter ;
+    - out_fn    : the filename of the dump ;
+    - options   : the options of `MeiToGraph.to_file`.
+    '''
+
+    converter.to_file(out_fn, True, **options)
+
+    with open(out_fn) as f:
+        return f.read()
+
+##-Tests
+@pytest.mark.parametrize('fn', corpus, ids=os.path.basename)
+def test_stream(fn, tmp_path):
+    '''Streaming gives the same dump.'''
+
+    ref = dump(MeiToGraph(fn), os.path.join(tmp_path, 'ref.cypher'))
+    assert dump(MeiToGraph(fn), os.path.join(tmp_path, 'stream.cypher'), stream=True) == ref
+
+@pytest.mark.parametrize('fn', corpus, ids=os.path.basename)
+def test_measure_jobs(fn, tmp_path):
+    '''Parsing by ranges of measures in other processes gives the same dump, with and without streaming.'''
+
+    ref = dump(MeiToGraph(fn), os.path.join(tmp_path, 'ref.cypher'))
+    assert dump(MeiToGraph(fn, jobs=2), os.path.join(tmp_path, 'jobs.cypher')) == ref
+    assert dump(MeiToGraph(fn, jobs=3), os.path.join(tmp_path, 'jobs_stream.cypher'), stream=True) == ref
+
+@pytest.mark.parametrize('fn', corpus, ids=os.path.basename)
+def test_cache_round_trip(fn, tmp_path):
+    '''A graph loaded from its cache has the same objects, and gives the same dump with all the optional links.'''
+
+    converter = MeiToGraph(fn)
+    converter.to_cache(os.path.join(tmp_path, 'test_graph.skg'))
+
+    cached = MeiToGraph(os.path.join(tmp_path, 'test_graph.skg'))
+    cached.parse_mei()
+
+    assert cached.score.ticksPerWhole == converter.score.ticksPerWhole
+
+    for v1, v2 in zip(converter.score.voices, cached.score.voices, strict=True):
+        for e1, e2 in zip(v1.events, v2.events, strict=True):
+            assert [(k, v) for k, v in e1.__dict__.items() if k != 'facts'] == [(k, v) for k, v in e2.__dict__.items() if k != 'facts']
+            assert [f.__dict__ for f in e1.facts] == [f.__dict__ for f in e2.facts]
+
+    assert dump(cached, os.path.join(tmp_path, 'cached.cypher'), **all_links) == dump(converter, os.path.join(tmp_path, 'ref.cypher'), **all_links)
+
+def test_cache_version(tmp_path):
+    '''A cache written with another version of the format is refused.'''
+
+    fn = os.path.join(tmp_path, 'test_graph.skg')
+    MeiToGraph(corpus[0]).to_cache(fn)
+
+    with open(fn, 'r+b') as f:
+        f.seek(6)
+        f.write(b'\x00\x00')
+
+    with pytest.raises(ValueError):
+        MeiToGraph(fn).parse_mei()
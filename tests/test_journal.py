@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''Tests of the journal of a run (--journal) and of its resumption (--resume), through the command line.'''
+
+##-Imports
+import os
+import shutil
+import subprocess
+import sys
+
+from tests.test_export import root
+
+##-Utils
+def run(*args: str) -> str:
+    '''
+    Runs `main.py` with the arguments `args` (without confirmation), and returns its logs.
+
+    - args : the arguments.
+    '''
+
+    p = subprocess.run([sys.executable, os.path.join(root, 'main.py'), '-n', *args], cwd=root, capture_output=True, text=True, check=True)
+    return p.stdout + p.stderr
+
+def make_run(tmp_path) -> tuple[list[str], str, str]:
+    '''
+    Copies two MEI files in `tmp_path`, and returns their filenames, the output folder and the filename of the journal.
+
+    - tmp_path : the temporary folder.
+    '''
+
+    files = []
+    for name in ('luzel1.mei', 'luzel2.mei'):
+        files.append(os.path.join(tmp_path, name))
+        shutil.copy(os.path.join(root, 'mei', 'Luzel', name), files[-1])
+
+    out = os.path.join(tmp_path, 'out')
+    os.mkdir(out)
+
+    return files, out, os.path.join(tmp_path, 'run.jsonl')
+
+##-Tests
+def test_no_journal(tmp_path):
+    '''Without --journal nor --resume, no journal is written.'''
+
+    files, out, journal = make_run(tmp_path)
+    run('-o', out, *files)
+
+    assert sorted(os.listdir(tmp_path)) == ['luzel1.mei', 'luzel2.mei', 'out']
+
+def test_resume(tmp_path):
+    '''The files recorded in the journal are skipped, without touching their outputs.'''
+
+    files, out, journal = make_run(tmp_path)
+    run('-o', out, '--journal', journal, *files)
+
+    dumps = [os.path.join(out, name) for name in ('luzel1_dump.cypher', 'luzel2_dump.cypher')]
+    mtimes = [os.stat(fn).st_mtime_ns for fn in dumps]
+
+    logs = run('-o', out, '--journal', journal, '--resume', *files)
+
+    assert logs.count('has already been converted') == 2
+    assert [os.stat(fn).st_mtime_ns for fn in dumps] == mtimes
+
+def test_resume_changed(tmp_path):
+    '''A file whose output was changed since it was recorded is converted again, and the other one is skipped.'''
+
+    files, out, journal = make_run(tmp_path)
+    run('-o', out, '--journal', journal, *files)
+
+    dump_fn = os.path.join(out, 'luzel2_dump.cypher')
+    with open(dump_fn) as f:
+        ref = f.read()
+
+    with open(dump_fn, 'w') as f:
+        f.write(ref[:len(ref) // 2]) # As if the run was interrupted while writing it
+
+    logs = run('-o', out, '--journal', journal, '--resume', *files)
+
+    assert 'File "' + files[0] + '" has already been converted' in logs
+    assert 'File "' + files[1] + '" has already been converted' not in logs
+
+    with open(dump_fn) as f:
+        assert f.read() == ref
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''Tests of the optional links : :SIMULTANEOUS, :NEXT skipping the grace notes, and :PERF_NEXT (repeats unfolded).'''
+
+##-Imports
+from tests.utils import make_converter, RecordSink
+
+##-Simultaneous
+def test_simultaneous():
+    '''A half note is linked to the two quarter notes sounding with it in the other voice, and rests are ignored.'''
+
+    converter = make_converter(2, (
+        '<measure xml:id="m1" n="1">'
+        '<staff n="1"><layer n="1"><note xml:id="a1" dur="2" pname="c" oct="4" /><note xml:id="a2" dur="2" pname="d" oct="4" /></layer></staff>'
+        '<staff n="2"><layer n="1"><note xml:id="b1" dur="4" pname="e" oct="4" /><note xml:id="b2" dur="4" pname="f" oct="4" />'
+        '<rest xml:id="b3" dur="4" /><note xml:id="b4" dur="4" pname="a" oct="4" /></layer></staff>'
+        '</measure>'
+    ))
+
+    sink = RecordSink()
+    converter.export([sink], simultaneous=True)
+
+    links = {(id1, id2): data['overlap'] for id1, id2, data in sink.get_links('SIMULTANEOUS')}
+    assert links == {('a1', 'b1'): .25, ('a1', 'b2'): .25, ('a2', 'b4'): .25}
+
+def test_simultaneous_overlap():
+    '''A note starting during a note of the other voice is paired with it once, the note that started first being the first of the pair.'''
+
+    converter = make_converter(2, (
+        '<measure xml:id="m1" n="1">'
+        '<staff n="1"><layer n="1"><note xml:id="a1" dur="4" pname="c" oct="4" /><note xml:id="a2" dur="2" pname="d" oct="4" />'
+        '<note xml:id="a3" dur="4" pname="e" oct="4" /></layer></staff>'
+        '<staff n="2"><layer n="1"><note xml:id="b1" dur="2" pname="e" oct="3" /><note xml:id="b2" dur="2" pname="f" oct="3" /></layer></staff>'
+        '</measure>'
+    ))
+
+    converter.parse_mei()
+
+    pairs = [(e1.id_, e2.id_) for e1, e2 in converter.score.find_simultaneous_events()]
+    assert sorted(pairs) == [('a1', 'b1'), ('a2', 'b2'), ('b1', 'a2'), ('b2', 'a3')]
+
+##-Grace notes
+grace_measure = (
+    '<measure xml:id="m1" n="1">'
+    '<staff n="1"><layer n="1"><note xml:id="n1" dur="2" pname="c" oct="4" /><note xml:id="g1" dur="8" grace="acc" pname="d" oct="4" />'
+    '<note xml:id="n2" dur="2" pname="e" oct="4" /></layer></staff>'
+    '</measure>'
+)
+
+def test_grace_no_duration():
+    '''A grace note takes no time : the note after it starts at the same time.'''
+
+    converter = make_converter(1, grace_measure)
+    converter.parse_mei()
+
+    starts = {e.id_: e.start for e in converter.score.voices[0].events}
+    assert starts['g1'] == starts['n2'] == .5
+
+def test_grace_bypass():
+    '''With `grace_bypass`, a :NEXT link goes from the note before the grace note to the note after it.'''
+
+    converter = make_converter(1, grace_measure)
+
+    sink = RecordSink()
+    converter.export([sink], grace_bypass=True)
+
+    links = [(id1, id2) for id1, id2, data in sink.get_links('NEXT')]
+    assert ('n1', 'g1') in links and ('g1', 'n2') in links
+
+    bypass = [(id1, id2) for id1, id2, data in sink.get_links('NEXT') if data.get('grace_bypass') == 1]
+    assert bypass == [('n1', 'n2')]
+
+##-Repeats
+repeat_measures = (
+    '<measure xml:id="m1" n="1"><staff n="1"><layer n="1"><note xml:id="e1" dur="1" pname="c" oct="4" /></layer></staff></measure>'
+    '<measure xml:id="m2" n="2"><staff n="1"><layer n="1"><note xml:id="e2" dur="1" pname="d" oct="4" /></layer></staff></measure>'
+    '<ending xml:id="v1" n="1"><measure xml:id="m3" n="3" right="rptend"><staff n="1"><layer n="1"><note xml:id="e3" dur="1" pname="e" oct="4" /></layer></staff></measure></ending>'
+    '<ending xml:id="v2" n="2"><measure xml:id="m4" n="4"><staff n="1"><layer n="1"><note xml:id="e4" dur="1" pname="f" oct="4" /></layer></staff></measure></ending>'
+    '<measure xml:id="m5" n="5" left="rptstart"><staff n="1"><layer n="1"><note xml:id="e5" dur="1" pname="g" oct="4" /></layer></staff></measure>'
+    '<measure xml:id="m6" n="6" right="rptend"><staff n="1"><layer n="1"><note xml:id="e6" dur="1" pname="a" oct="4" /></layer></staff></measure>'
+)
+
+def test_performance_order():
+    '''The repeated sections are played twice, with the first ending on the first pass and the second one after.'''
+
+    converter = make_converter(1, repeat_measures)
+    converter.parse_mei()
+
+    order = [m.id_ for m in converter.top_rhythmic.performance_order()]
+    assert order == ['m1', 'm2', 'm3', 'm1', 'm2', 'm4', 'm5', 'm6', 'm5', 'm6']
+
+def test_perf_next():
+    '''The :PERF_NEXT links follow the performance order, numbered from 1, and end at the END event.'''
+
+    converter = make_converter(1, repeat_measures)
+
+    sink = RecordSink()
+    converter.export([sink], unfold_repeats=True)
+
+    links = sorted(sink.get_links('PERF_NEXT'), key=lambda l: l[2]['order'])
+    assert [l[2]['order'] for l in links] == list(range(1, 11))
+    assert [l[1] for l in links[:-1]] == ['e2', 'e3', 'e1', 'e2', 'e4', 'e5', 'e6', 'e5', 'e6']
+    assert links[0][0] == 'e1'
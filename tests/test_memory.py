@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''Tests of the memory used per note (see `bench.bench_memory` and `memprofile`).'''
+
+##-Imports
+from bench.bench_memory import bench_memory
+
+##-Tests
+def test_memory_budgets():
+    '''The graph and the peaks of the conversion stay below the limits of `bench_memory`, with and without streaming (on its default sizes, as the limit of the streaming is for the largest one).'''
+
+    assert bench_memory() == []
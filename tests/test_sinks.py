@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''Tests that a failed export leaves no output looking complete (see `Sink.abort`).'''
+
+##-Imports
+import os
+
+import pytest
+
+from src.MeiToGraph import MeiToGraph
+from src.sinks import ShardedCypherSink, SummarySink, Sink
+from tests.test_export import corpus
+
+##-Utils
+class FailingSink(Sink):
+    '''Raises an error after `limit` nodes.'''
+
+    name = 'failing'
+
+    def __init__(self, limit: int):
+        '''
+        Initiates the sink.
+
+        - limit : the number of nodes received before failing.
+        '''
+
+        self.limit = limit
+
+    def node(self, cypher_id: str, label: str, data: dict):
+        self.limit -= 1
+        if self.limit < 0:
+            raise RuntimeError('FailingSink: failure')
+
+    def link(self, id1: str, id2: str, type_: str, data: dict|None = None):
+        pass
+
+##-Tests
+def test_close(tmp_path):
+    '''A complete export writes the summary and the manifest of the shards.'''
+
+    folder = os.path.join(tmp_path, 'shards')
+    MeiToGraph(corpus[0]).export([SummarySink(os.path.join(tmp_path, 'summary.json'), corpus[0]), ShardedCypherSink(folder, 50)])
+
+    assert os.path.isfile(os.path.join(tmp_path, 'summary.json'))
+    assert os.path.isfile(os.path.join(folder, 'manifest.cql'))
+
+def test_abort(tmp_path):
+    '''A failed export writes no summary, and removes the shards already written.'''
+
+    folder = os.path.join(tmp_path, 'shards')
+
+    with pytest.raises(RuntimeError):
+        MeiToGraph(corpus[0]).export([SummarySink(os.path.join(tmp_path, 'summary.json'), corpus[0]), ShardedCypherSink(folder, 10), FailingSink(100)])
+
+    assert os.listdir(tmp_path) == []
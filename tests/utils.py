@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#
+# Author            : Lasercata
+# Last modification : 2026.10.19
+# Version           : v1.0.0
+#
+#--------------------------------
+
+'''Helpers shared by the tests : small MEI scores written inline, and a sink keeping what it receives.'''
+
+##-Imports
+import io
+
+from src.MeiToGraph import MeiToGraph
+from src.sinks import Sink
+
+##-MEI
+def make_mei(nb_staves: int, measures: str) -> str:
+    '''
+    Returns a MEI document with `nb_staves` staves (n = 1, 2, ...), and the XML `measures` in its section.
+
+    - nb_staves : the number of staves (voices) ;
+    - measures  : the XML of the measures (and endings).
+    '''
+
+    staff_defs = ''.join(f'<staffDef xml:id="P{n}" n="{n}" lines="5" />' for n in range(1, nb_staves + 1))
+
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<mei xmlns="http://www.music-encoding.org/ns/mei" meiversion="5.0">'
+        '<meiHead><fileDesc><titleStmt><respStmt>'
+        '<persName role="composer">Test</persName><persName role="collection">Test</persName>'
+        '</respStmt></titleStmt></fileDesc></meiHead>'
+        f'<music><body><mdiv><score><scoreDef><staffGrp xml:id="sg">{staff_defs}</staffGrp></scoreDef>'
+        f'<section>{measures}</section></score></mdiv></body></music></mei>'
+    )
+
+def make_converter(nb_staves: int, measures: str, name: str = 'test.mei') -> MeiToGraph:
+    '''
+    Returns a converter reading the MEI document made by `make_mei`.
+
+    - nb_staves : the number of staves ;
+    - measures  : the XML of the measures ;
+    - name      : the name of the file (used in the cypher ids).
+    '''
+
+    return MeiToGraph(io.BytesIO(make_mei(nb_staves, measures).encode('utf-8')), name=name)
+
+##-Sink
+class RecordSink(Sink):
+    '''Keeps the nodes and links received.'''
+
+    name = 'record'
+
+    def __init__(self):
+        '''Initiates the sink.'''
+
+        self.nodes = {} # cypher id -> (label, data)
+        self.links = [] # (id1, id2, type, data)
+        self.closed = False
+
+    def node(self, cypher_id: str, label: str, data: dict):
+        self.nodes[cypher_id] = (label, dict(data))
+
+    def link(self, id1: str, id2: str, type_: str, data: dict|None = None):
+        self.links.append((id1, id2, type_, data))
+
+    def close(self):
+        self.closed = True
+
+    def get_links(self, type_: str) -> list[tuple[str, str, dict|None]]:
+        '''
+        Returns the links of type `type_`, with the MEI ids of their nodes instead of the cypher ids.
+
+        - type_ : the type of the links.
+        '''
+
+        return [(self.nodes[id1][1]['id_'], self.nodes[id2][1]['id_'], data) for id1, id2, t, data in self.links if t == type_]